@@ -1,17 +1,41 @@
 import os
 import json
 import random
-from typing import Dict, List, Optional, Any
-from anthropic import Anthropic
+import time
+import asyncio
+from typing import Dict, List, Optional, Any, Tuple, AsyncIterator
 from datetime import datetime
-# Import database functions - hybrid import for local/production compatibility
+# Import backend modules - hybrid import for local/production compatibility
 try:
-    from backend.database import get_database
+    from backend.llm_client import create_message, stream_message
+    from backend.llm_profiles import get_profile, CallProfile
+    from backend.answer_cache import get_cached_answer, store_answer, normalize_question
+    from backend.similarity_index import find_similar_verdict, add_similar_verdict
+    from backend.micro_batcher import MicroBatcher
+    from backend.structured_output import LLM_STRUCTURED_OUTPUT, RESULT_TOOL_NAME, StructuredOutputError, record_parse, result_tool, parse_text_output, validate
+    from backend.json_extract import extract_json, parse_partial_json
+    from backend.rate_limits import get_stage_counts, reserve_slot, release_slot
+    from backend.interaction_log import log_interaction_document
 except ImportError:
-    from database import get_database
-
-# Initialize Anthropic client
-anthropic = Anthropic(api_key=os.getenv("CLAUDE_API_KEY"))
+    from llm_client import create_message, stream_message
+    from llm_profiles import get_profile, CallProfile
+    from answer_cache import get_cached_answer, store_answer, normalize_question
+    from similarity_index import find_similar_verdict, add_similar_verdict
+    from micro_batcher import MicroBatcher
+    from structured_output import LLM_STRUCTURED_OUTPUT, RESULT_TOOL_NAME, StructuredOutputError, record_parse, result_tool, parse_text_output, validate
+    from json_extract import extract_json, parse_partial_json
+    from rate_limits import get_stage_counts, reserve_slot, release_slot
+    from interaction_log import log_interaction_document
+
+# Cross-user micro-batching of riddle questions: questions about the same riddle
+# arriving within the window are judged together in one numbered prompt
+RIDDLE_BATCH_ENABLED = os.getenv("RIDDLE_BATCH_ENABLED", "false").lower() == "true"
+RIDDLE_BATCH_WINDOW_MS = float(os.getenv("RIDDLE_BATCH_WINDOW_MS", "100"))
+RIDDLE_BATCH_MAX_SIZE = int(os.getenv("RIDDLE_BATCH_MAX_SIZE", "20"))
+riddle_batch_stats = {"batchedQuestions": 0, "fallbackQuestions": 0}
+
+# Mark system prompts and static prompt prefixes for provider-side prompt caching
+LLM_PROMPT_CACHING = os.getenv("LLM_PROMPT_CACHING", "true").lower() == "true"
 
 GUIDANCE_SYSTEM_PROMPT = """You are an AI assistant named Nuudle, designed to help users think through their problems. Your goal is to ask thoughtful, open-ended questions that encourage users to explore their own thinking, assumptions, and potential actions. You must not give direct advice, solutions, or tell users what to do.
 
@@ -501,25 +525,165 @@ Each contingency should be 1-2 complete sentences providing a concrete, actionab
   }
 }
 
-async def get_claude_response(prompt: str, temperature: float = 0.4, system_prompt: str = GUIDANCE_SYSTEM_PROMPT) -> Dict[str, Any]:
-    """Get response from Claude API"""
+def _cached_text_block(text: str) -> Dict[str, Any]:
+    """Text content block marked as a provider-side prompt cache breakpoint"""
+    block = {"type": "text", "text": text}
+    if LLM_PROMPT_CACHING:
+        block["cache_control"] = {"type": "ephemeral"}
+    return block
+
+def _message_params(call_profile: CallProfile, prompt: str, temperature: Optional[float], system_prompt: str, prompt_prefix: Optional[str], output_schema: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Build Messages API arguments for a call profile"""
+    content = [{"type": "text", "text": prompt}]
+    if prompt_prefix:
+        content.insert(0, _cached_text_block(prompt_prefix))
+    params = {
+        "model": call_profile.model,
+        "max_tokens": call_profile.max_tokens,
+        "system": [_cached_text_block(system_prompt)],
+        "temperature": call_profile.temperature if temperature is None else temperature,
+        "timeout": call_profile.timeout,
+        "messages": [{"role": "user", "content": content}]
+    }
+    if output_schema and LLM_STRUCTURED_OUTPUT:
+        params["tools"] = [result_tool(output_schema)]
+        params["tool_choice"] = {"type": "tool", "name": RESULT_TOOL_NAME}
+    return params
+
+def _extract_structured(message: Any, response_text: str, output_schema: Dict[str, Any], call_site: str) -> Any:
+    """
+    Get the call site's result object from a response and check it against its schema.
+
+    Raises:
+        StructuredOutputError: No matching object could be extracted
+    """
+    mode = "tool" if LLM_STRUCTURED_OUTPUT else "text"
+    # What the error carries as .doc for the callers' fallbacks: the serialized
+    # tool input in tool mode (response_text has no tool blocks), else the text
+    raw_output = response_text
     try:
-        message = anthropic.messages.create(
-            model="claude-sonnet-4-5",
-            max_tokens=1024,
-            system=system_prompt,
-            temperature=temperature,
-            messages=[{"role": "user", "content": prompt}]
+        if LLM_STRUCTURED_OUTPUT:
+            tool_inputs = [block.input for block in message.content if block.type == "tool_use" and block.name == RESULT_TOOL_NAME]
+            if not tool_inputs:
+                raise StructuredOutputError("Model did not call the result tool", response_text)
+            data = tool_inputs[0]
+            raw_output = json.dumps(data)
+        else:
+            data = parse_text_output(response_text)
+        error = validate(data, output_schema)
+        if error:
+            raise StructuredOutputError(f"Output does not match schema: {error}", raw_output)
+    except json.JSONDecodeError:
+        record_parse(call_site, mode, False)
+        raise
+    record_parse(call_site, mode, True)
+    return data
+
+def _salvage_field(error: json.JSONDecodeError, key: str) -> Any:
+    """A field of the malformed or schema-invalid object in a parse error's .doc, or None"""
+    partial = parse_partial_json(error.doc or "")
+    return partial.get(key) if isinstance(partial, dict) else None
+
+def _record_usage(call_profile: CallProfile, message: Any, started: float) -> Dict[str, Any]:
+    """Record a completed call against its profile and return the standard result dict"""
+    # Cache token counts are only present on responses that used prompt caching
+    cache_read_tokens = getattr(message.usage, "cache_read_input_tokens", None) or 0
+    cache_write_tokens = getattr(message.usage, "cache_creation_input_tokens", None) or 0
+    call_profile.record(
+        (time.perf_counter() - started) * 1000,
+        message.usage.input_tokens,
+        message.usage.output_tokens,
+        cache_read_tokens=cache_read_tokens,
+        cache_write_tokens=cache_write_tokens
+    )
+    return {
+        "responseText": "".join(block.text for block in message.content if block.type == "text"),
+        "inputTokens": message.usage.input_tokens,
+        "outputTokens": message.usage.output_tokens,
+        "cacheReadTokens": cache_read_tokens,
+        "cacheWriteTokens": cache_write_tokens,
+        "model": call_profile.model,
+    }
+
+async def get_claude_response(prompt: str, temperature: Optional[float] = None, system_prompt: str = GUIDANCE_SYSTEM_PROMPT, profile: str = "guidance", prompt_prefix: Optional[str] = None, output_schema: Optional[Dict[str, Any]] = None, call_site: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Get response from Claude API via the shared non-blocking client.
+
+    The system prompt and the optional static prompt_prefix are sent as
+    cacheable blocks, so repeated calls only pay full price for the dynamic
+    prompt that follows them.
+
+    Args:
+        prompt: The dynamic part of the user message
+        temperature: Optional override of the profile's temperature
+        system_prompt: System prompt for the call
+        profile: Name of the call profile (see llm_profiles) that selects the
+            model, output token budget, temperature, deadline and hedging
+        prompt_prefix: Optional static instructions/few-shot block placed
+            before the prompt and marked for prompt caching
+        output_schema: Optional JSON schema of the expected result. The parsed,
+            validated object is returned under "data" (and serialized as
+            responseText when it came back through the result tool)
+        call_site: Name the parse outcome is counted under (defaults to the profile)
+
+    Raises:
+        CircuitOpenError: The model's circuit breaker is open; callers fall back
+            to their heuristics without waiting on the upstream
+        asyncio.TimeoutError: The profile's deadline was exceeded
+        StructuredOutputError: output_schema was given and no matching object came back
+    """
+    call_profile = get_profile(profile)
+    started = time.perf_counter()
+    try:
+        message = await create_message(
+            deadline=call_profile.timeout,
+            hedge_after=call_profile.hedge_after or None,
+            **_message_params(call_profile, prompt, temperature, system_prompt, prompt_prefix, output_schema)
         )
-        
-        return {
-            "responseText": message.content[0].text,
-            "inputTokens": message.usage.input_tokens,
-            "outputTokens": message.usage.output_tokens,
-        }
     except Exception as e:
+        call_profile.record((time.perf_counter() - started) * 1000, error=True)
+        raise e
+
+    ai_result = _record_usage(call_profile, message, started)
+    if output_schema:
+        ai_result["data"] = _extract_structured(message, ai_result["responseText"], output_schema, call_site or profile)
+        if not ai_result["responseText"]:
+            ai_result["responseText"] = json.dumps(ai_result["data"])
+    return ai_result
+
+async def stream_claude_response(prompt: str, temperature: Optional[float] = None, system_prompt: str = GUIDANCE_SYSTEM_PROMPT, profile: str = "guidance", prompt_prefix: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Streaming variant of get_claude_response.
+
+    Yields {"type": "text", "text": ...} events as tokens arrive, then a single
+    {"type": "done", ...} event carrying the same keys get_claude_response returns.
+    """
+    call_profile = get_profile(profile)
+    started = time.perf_counter()
+    message = None
+    try:
+        async for event in stream_message(**_message_params(call_profile, prompt, temperature, system_prompt, prompt_prefix)):
+            if event.type == "text":
+                yield {"type": "text", "text": event.text}
+            elif event.type == "message_stop":
+                message = event.message
+        if message is None:
+            raise RuntimeError("Stream ended without a final message")
+    except Exception as e:
+        call_profile.record((time.perf_counter() - started) * 1000, error=True)
         raise e
 
+    yield {"type": "done", **_record_usage(call_profile, message, started)}
+
+def _estimate_cost_usd(ai_result: Dict[str, Any]) -> float:
+    """Estimated cost of a call from its token usage"""
+    # Pricing for Claude 3 Haiku ($ per 1M tokens)
+    input_cost = (ai_result["inputTokens"] / 1000000) * 0.25
+    output_cost = (ai_result["outputTokens"] / 1000000) * 1.25
+    # Cache writes bill at 1.25x the input rate, cache reads at 0.1x
+    cache_cost = (ai_result["cacheWriteTokens"] / 1000000) * 0.3125 + (ai_result["cacheReadTokens"] / 1000000) * 0.025
+    return input_cost + output_cost + cache_cost
+
 def format_context_value(key: str, value: Any) -> str:
     """Format context values for AI prompts"""
     if not value:
@@ -702,35 +866,26 @@ def analyze_ai_interactions(ai_interaction_log: List[Dict], session_data: Dict)
         "feedbackGrowth": feedback_growth
     }
 
-async def check_rate_limits(user_id: str, session_id: str, stage: str = None) -> Dict[str, Any]:
-    """Check rate limits for user - now per-button (per-stage) limits"""
-    db = get_database()
-    
-    # Count per-stage usage for this session
-    stage_usage_by_stage = {}
-    pipeline = [
-        {"$match": {"session_id": session_id}},
-        {"$group": {"_id": "$stage", "count": {"$sum": 1}}}
-    ]
-    
-    async for result in db.ai_interactions.aggregate(pipeline):
-        stage_usage_by_stage[result["_id"]] = result["count"]
-    
-    # Count total session requests for this session
-    session_usage = await db.ai_interactions.count_documents({"session_id": session_id})
+# Requests allowed per button (stage) per session
+STAGE_RATE_LIMIT = 5
+
+def _rate_limit_usage(stage_usage_by_stage: Dict[str, int], stage: Optional[str], stage_allowed: Optional[bool] = None) -> Dict[str, Any]:
+    """Build the usage dict returned by the rate limit functions"""
+    stage_usage_by_stage = dict(stage_usage_by_stage)
+    session_usage = sum(stage_usage_by_stage.values())
     
     # Set limits - 5 per button/stage, no daily limit
-    stage_limit = 5
+    stage_limit = STAGE_RATE_LIMIT
     
     # Check if the specific stage is allowed (if stage is provided)
-    stage_allowed = True
     stage_usage = 0
     if stage:
         stage_usage = stage_usage_by_stage.get(stage, 0)
-        stage_allowed = stage_usage < stage_limit
+        if stage_allowed is None:
+            stage_allowed = stage_usage < stage_limit
     
     return {
-        "stageAllowed": stage_allowed,
+        "stageAllowed": True if stage_allowed is None else stage_allowed,
         "stageUsage": stage_usage,
         "stageLimit": stage_limit,
         "sessionUsage": session_usage,
@@ -743,10 +898,24 @@ async def check_rate_limits(user_id: str, session_id: str, stage: str = None) ->
         "sessionLimit": 999  # High number to indicate no limit
     }
 
+async def check_rate_limits(user_id: str, session_id: str, stage: str = None) -> Dict[str, Any]:
+    """Check rate limits for user - now per-button (per-stage) limits"""
+    return _rate_limit_usage(await get_stage_counts(session_id), stage)
+
+async def reserve_rate_limit(user_id: str, session_id: str, stage: str) -> Dict[str, Any]:
+    """
+    Claim one of the stage's requests before calling the LLM.
+
+    Returns the same dict as check_rate_limits, counting the claimed request.
+    stageAllowed is False if the stage was already at its limit, in which case
+    nothing was claimed. A claimed request that does not end in a logged
+    interaction must be given back with release_slot.
+    """
+    claimed, counts = await reserve_slot(session_id, stage, STAGE_RATE_LIMIT)
+    return _rate_limit_usage(counts, stage, stage_allowed=claimed)
+
 async def log_ai_interaction(interaction_data: Dict[str, Any]) -> str:
-    """Log AI interaction to database"""
-    db = get_database()
-    
+    """Log AI interaction to database (written in batches by the interaction log)"""
     # Create interaction document
     interaction_doc = {
         "user_id": interaction_data["userId"],
@@ -755,13 +924,13 @@ async def log_ai_interaction(interaction_data: Dict[str, Any]) -> str:
         "created_at": datetime.utcnow(),
         "input_tokens": interaction_data["inputTokens"],
         "output_tokens": interaction_data["outputTokens"],
+        "cache_read_tokens": interaction_data.get("cacheReadTokens", 0),
+        "cache_write_tokens": interaction_data.get("cacheWriteTokens", 0),
         "cost_usd": interaction_data["costUsd"]
     }
     
-    # Insert the interaction
-    result = await db.ai_interactions.insert_one(interaction_doc)
-    
-    return str(result.inserted_id)
+    # Queue the interaction; its id is assigned before it is written
+    return await log_interaction_document(interaction_doc)
 
 
 def detect_loop_and_summarize(history: List[str]) -> Optional[str]:
@@ -809,6 +978,14 @@ def detect_user_uncertainty(response: str) -> bool:
     
     return False
 
+ROOT_CAUSE_OPTIONS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "root_cause_options": {"type": "array", "items": {"type": "string"}, "minItems": 1}
+    },
+    "required": ["root_cause_options"]
+}
+
 async def get_next_cause_analysis_question(cause: str, history: List[str], pain_point: str, regenerate: bool = False) -> Dict[str, Any]:
     """
     Determines the next question in the adaptive conversational cause analysis.
@@ -844,8 +1021,8 @@ The user has expressed uncertainty multiple times. Generate 4 diverse root cause
         
         root_cause_options = []
         try:
-            summary_response = await get_claude_response(summary_prompt, system_prompt=OPTION_GENERATION_SYSTEM_PROMPT)
-            summary_data = json.loads(summary_response['responseText'])
+            summary_response = await get_claude_response(summary_prompt, system_prompt=OPTION_GENERATION_SYSTEM_PROMPT, profile="options", output_schema=ROOT_CAUSE_OPTIONS_SCHEMA, call_site="root_cause_options")
+            summary_data = summary_response["data"]
             root_cause_options = summary_data.get("root_cause_options", [])
             print(f"Generated root causes due to uncertainty: {root_cause_options}")
             
@@ -873,8 +1050,8 @@ Generate 4 diverse root cause statements that dig deeper than the surface-level
         
         root_cause_options = []
         try:
-            summary_response = await get_claude_response(summary_prompt, system_prompt=OPTION_GENERATION_SYSTEM_PROMPT)
-            summary_data = json.loads(summary_response['responseText'])
+            summary_response = await get_claude_response(summary_prompt, system_prompt=OPTION_GENERATION_SYSTEM_PROMPT, profile="options", output_schema=ROOT_CAUSE_OPTIONS_SCHEMA, call_site="root_cause_options")
+            summary_data = summary_response["data"]
             root_cause_options = summary_data.get("root_cause_options", [])
             print(f"AI generated {len(root_cause_options)} root cause options: {root_cause_options}")
             
@@ -943,8 +1120,8 @@ Generate 4 diverse root cause statements that dig deeper than the surface-level
             
             root_cause_options = []
             try:
-                summary_response = await get_claude_response(summary_prompt, system_prompt=OPTION_GENERATION_SYSTEM_PROMPT)
-                summary_data = json.loads(summary_response['responseText'])
+                summary_response = await get_claude_response(summary_prompt, system_prompt=OPTION_GENERATION_SYSTEM_PROMPT, profile="options", output_schema=ROOT_CAUSE_OPTIONS_SCHEMA, call_site="root_cause_options")
+                summary_data = summary_response["data"]
                 root_cause_options = summary_data.get("root_cause_options", [])
                 
             except (json.JSONDecodeError, Exception) as e:
@@ -1076,6 +1253,14 @@ Return only the question text, no other formatting."""
         "is_complete": False
     }
 
+ACTION_PLAN_OPTIONS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "action_plan_options": {"type": "array", "items": {"type": "string"}, "minItems": 1}
+    },
+    "required": ["action_plan_options"]
+}
+
 async def get_next_action_planning_question(
     cause: str,
     history: List[str],
@@ -1247,31 +1432,19 @@ Return ONLY valid JSON:
             ai_result = await get_claude_response(
                 action_planning_prompt,
                 temperature=temperature,
-                system_prompt=OPTION_GENERATION_SYSTEM_PROMPT
+                system_prompt=OPTION_GENERATION_SYSTEM_PROMPT,
+                profile="options",
+                output_schema=ACTION_PLAN_OPTIONS_SCHEMA,
+                call_site="action_plan_options"
             )
             print(f"Raw AI response for action planning: {ai_result['responseText']}")
             
-            # Try to extract JSON even if wrapped in markdown
-            response_text = ai_result['responseText'].strip()
-            if response_text.startswith('```json'):
-                response_text = response_text.replace('```json', '').replace('```', '').strip()
-            elif response_text.startswith('```'):
-                response_text = response_text.replace('```', '').strip()
-            
-            # Clean up response text to handle line breaks and special characters in JSON strings
-            import re
-            # Replace literal line breaks in JSON strings with escaped line breaks
-            response_text = re.sub(r'(?<!\\)\n(?=\s*["}])', '\\n', response_text)
-            # Remove any remaining unescaped line breaks that might cause JSON parsing issues
-            response_text = re.sub(r'(?<!\\)\n(?!\s*["}])', ' ', response_text)
-            
-            summary_data = json.loads(response_text)
-            action_plan_options = summary_data.get("action_plan_options", [])
+            action_plan_options = ai_result["data"].get("action_plan_options", [])
             print(f"Successfully parsed AI generated {len(action_plan_options)} action plan options: {action_plan_options}")
             
         except json.JSONDecodeError as e:
             print(f"JSON parsing failed for action plan options: {e}")
-            print(f"Attempted to parse: '{response_text if 'response_text' in locals() else ai_result['responseText'] if 'ai_result' in locals() else 'No response'}'")
+            print(f"Attempted to parse: '{e.doc}'")
         except Exception as e:
             print(f"AI response failed for action plan options: {e}")
             
@@ -1441,18 +1614,17 @@ def _generate_guidance_focused_fallback_options(cause: str, action_type: str, us
     
     return guidance_options
 
-async def get_ai_response(user_id: str, session_id: str, stage: str, user_input: str, session_context: Dict[str, Any], force_guidance: bool = False) -> Dict[str, Any]:
-    """Get AI response for a given stage and context"""
-    
-    # Check rate limits for this specific stage
-    limits = await check_rate_limits(user_id, session_id, stage)
-    if not limits["stageAllowed"]:
-        return {
-            "success": False,
-            "error": f"Rate limit reached for this button. You've used {limits['stageUsage']}/{limits['stageLimit']} requests for this type of assistance.",
-            "fallback": "You've reached the limit for this button. Continue with your own thinking—you've got this! Other AI buttons are still available.",
-            "usage": limits
-        }
+INTERVENTION_STAGES = ['problem_articulation_intervention', 'problem_articulation_intervention_goal', 'problem_articulation_context_aware_goal']
+
+async def _prepare_ai_prompt(user_id: str, session_id: str, stage: str, user_input: str, session_context: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], str, str, Any]:
+    """
+    Build the prompt for an AI assist stage.
+
+    Returns:
+        Tuple of (early_result, prompt, actual_stage, prompt_config). early_result is
+        set when the stage was answered without a direct model call.
+    """
+    early_result = None
 
     # Use user input directly without summarization
     processed_user_input = user_input
@@ -1482,25 +1654,23 @@ async def get_ai_response(user_id: str, session_id: str, stage: str, user_input:
         if result.get("is_complete", False):
             # When complete, we have root_cause_options instead of a question
             response_text = "Please select a root cause option from the choices provided."
-            return {
+            early_result = {
                 "success": True,
                 "interactionId": None,
                 "response": response_text,
                 "cost": 0,
                 "tokensUsed": 0,
-                "usage": await check_rate_limits(user_id, session_id),
                 "is_complete": True,
                 "root_cause_options": result.get("root_cause_options", [])
             }
         else:
             # When not complete, we have a next question
-            return {
+            early_result = {
                 "success": True,
                 "interactionId": None,
                 "response": result.get("next_question", "Could you tell me more about that?"),
                 "cost": 0,
                 "tokensUsed": 0,
-                "usage": await check_rate_limits(user_id, session_id),
                 "is_complete": False
             }
     elif isinstance(prompt_config, str):
@@ -1508,7 +1678,7 @@ async def get_ai_response(user_id: str, session_id: str, stage: str, user_input:
         prompt = prompt_config
     elif isinstance(prompt_config, dict) and 'body' in prompt_config:
         # Special handling for problem_articulation_intervention and goal variants
-        if actual_stage in ['problem_articulation_intervention', 'problem_articulation_intervention_goal', 'problem_articulation_context_aware_goal']:
+        if actual_stage in INTERVENTION_STAGES:
             # Proceed with AI question generation (old validation logic removed)
             instructions = prompt_config['body']
             
@@ -1579,67 +1749,169 @@ Your conversational response begins now:"""
         formatted_value = format_context_value(key, value)
         prompt = prompt.replace('{{' + key + '}}', formatted_value)
 
-    try:
-        ai_result = await get_claude_response(prompt)
-        
-        # Special post-processing for problem_articulation_intervention and goal variants
-        final_response = ai_result["responseText"]
-        if actual_stage in ['problem_articulation_intervention', 'problem_articulation_intervention_goal', 'problem_articulation_context_aware_goal']:
-            # Wrap the AI's questions with randomly selected intro and conclusion
-            random_intro = random.choice(prompt_config['intros'])
-            random_conclusion = random.choice(prompt_config['conclusions'])
-            final_response = f"{random_intro}\n\n{ai_result['responseText']}\n\n{random_conclusion}"
-        
-        # Pricing for Claude 3 Haiku ($ per 1M tokens)
-        input_cost = (ai_result["inputTokens"] / 1000000) * 0.25
-        output_cost = (ai_result["outputTokens"] / 1000000) * 1.25
-        cost_usd = input_cost + output_cost
-
-        interaction_id = await log_ai_interaction({
-            "sessionId": session_id,
-            "userId": user_id,
-            "stage": stage,  # Keep original stage for logging consistency
-            "userInput": user_input,
-            "sessionContext": session_context,
-            "aiResponse": final_response,
-            "inputTokens": ai_result["inputTokens"],
-            "outputTokens": ai_result["outputTokens"],
-            "costUsd": cost_usd
-        })
+    return early_result, prompt, actual_stage, prompt_config
 
-        return {
-            "success": True,
-            "interactionId": interaction_id,
-            "response": final_response,
-            "cost": cost_usd,
-            "tokensUsed": ai_result["inputTokens"] + ai_result["outputTokens"],
-            "usage": await check_rate_limits(user_id, session_id)
-        }
+def _intervention_wrapping(actual_stage: str, prompt_config: Any) -> Optional[Tuple[str, str]]:
+    """Randomly selected intro and conclusion for intervention stages, None for other stages"""
+    if actual_stage not in INTERVENTION_STAGES:
+        return None
+    return random.choice(prompt_config['intros']), random.choice(prompt_config['conclusions'])
+
+async def _finish_ai_response(user_id: str, session_id: str, stage: str, user_input: str, session_context: Dict[str, Any], final_response: str, ai_result: Dict[str, Any]) -> Dict[str, Any]:
+    """Log the interaction with its cost and build the success response"""
+    cost_usd = _estimate_cost_usd(ai_result)
+
+    interaction_id = await log_ai_interaction({
+        "sessionId": session_id,
+        "userId": user_id,
+        "stage": stage,  # Keep original stage for logging consistency
+        "userInput": user_input,
+        "sessionContext": session_context,
+        "aiResponse": final_response,
+        "inputTokens": ai_result["inputTokens"],
+        "outputTokens": ai_result["outputTokens"],
+        "cacheReadTokens": ai_result["cacheReadTokens"],
+        "cacheWriteTokens": ai_result["cacheWriteTokens"],
+        "costUsd": cost_usd
+    })
+
+    return {
+        "success": True,
+        "interactionId": interaction_id,
+        "response": final_response,
+        "cost": cost_usd,
+        "tokensUsed": ai_result["inputTokens"] + ai_result["outputTokens"],
+        "usage": await check_rate_limits(user_id, session_id)
+    }
 
-    except Exception as error:
-        print(f"Anthropic API error: {error}")
-        error_message = str(error) if hasattr(error, 'message') else 'The AI service is currently unavailable.'
+async def get_ai_response(user_id: str, session_id: str, stage: str, user_input: str, session_context: Dict[str, Any], force_guidance: bool = False) -> Dict[str, Any]:
+    """Get AI response for a given stage and context"""
+    
+    # Claim a request for this specific stage
+    limits = await reserve_rate_limit(user_id, session_id, stage)
+    if not limits["stageAllowed"]:
         return {
             "success": False,
-            "error": error_message,
-            "fallback": "It seems the AI is having a moment to itself. Please continue with your own thoughts for now.",
+            "error": f"Rate limit reached for this button. You've used {limits['stageUsage']}/{limits['stageLimit']} requests for this type of assistance.",
+            "fallback": "You've reached the limit for this button. Continue with your own thinking—you've got this! Other AI buttons are still available.",
             "usage": limits
         }
 
-async def get_ai_summary(user_id: str, session_id: str, session_data: Dict[str, Any], ai_interaction_log: List[Dict] = None) -> Dict[str, Any]:
-    """Get AI summary for a completed session"""
-    if ai_interaction_log is None:
-        ai_interaction_log = []
-        
-    limits = await check_rate_limits(user_id, session_id, "session_summary")
+    slot_held = True
+    try:
+        early_result, prompt, actual_stage, prompt_config = await _prepare_ai_prompt(user_id, session_id, stage, user_input, session_context)
+        if early_result is not None:
+            # No interaction is logged for these, so they do not use up the stage's requests
+            await release_slot(session_id, stage)
+            slot_held = False
+            early_result["usage"] = await check_rate_limits(user_id, session_id)
+            return early_result
+
+        try:
+            ai_result = await get_claude_response(prompt)
+            
+            # Special post-processing for problem_articulation_intervention and goal variants
+            final_response = ai_result["responseText"]
+            wrapping = _intervention_wrapping(actual_stage, prompt_config)
+            if wrapping:
+                # Wrap the AI's questions with randomly selected intro and conclusion
+                random_intro, random_conclusion = wrapping
+                final_response = f"{random_intro}\n\n{ai_result['responseText']}\n\n{random_conclusion}"
+
+            result = await _finish_ai_response(user_id, session_id, stage, user_input, session_context, final_response, ai_result)
+            slot_held = False
+            return result
+
+        except Exception as error:
+            await release_slot(session_id, stage)
+            slot_held = False
+            print(f"Anthropic API error: {error}")
+            error_message = str(error) if hasattr(error, 'message') else 'The AI service is currently unavailable.'
+            return {
+                "success": False,
+                "error": error_message,
+                "fallback": "It seems the AI is having a moment to itself. Please continue with your own thoughts for now.",
+                "usage": await check_rate_limits(user_id, session_id, stage)
+            }
+    finally:
+        if slot_held:
+            # The request went away before its interaction was logged
+            await release_slot(session_id, stage)
+
+async def stream_ai_response(user_id: str, session_id: str, stage: str, user_input: str, session_context: Dict[str, Any], force_guidance: bool = False) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Streaming variant of get_ai_response.
+
+    Yields {"type": "text", "text": ...} events as the response is generated
+    (including the intro and conclusion of intervention stages), then either a
+    {"type": "done", ...} event with the same fields get_ai_response returns
+    or a {"type": "error", ...} event with its error fields. The interaction is
+    logged with its cost once the stream has finished.
+    """
+    # Claim a request for this specific stage
+    limits = await reserve_rate_limit(user_id, session_id, stage)
     if not limits["stageAllowed"]:
-        return {
+        yield {
+            "type": "error",
             "success": False,
-            "error": f"Rate limit reached for session summary. You've used {limits['stageUsage']}/{limits['stageLimit']} summary requests.",
-            "fallback": "You've reached the limit for AI summaries. You can still review your session data.",
+            "error": f"Rate limit reached for this button. You've used {limits['stageUsage']}/{limits['stageLimit']} requests for this type of assistance.",
+            "fallback": "You've reached the limit for this button. Continue with your own thinking—you've got this! Other AI buttons are still available.",
             "usage": limits
         }
+        return
+
+    slot_held = True
+    try:
+        early_result, prompt, actual_stage, prompt_config = await _prepare_ai_prompt(user_id, session_id, stage, user_input, session_context)
+        if early_result is not None:
+            # No interaction is logged for these, so they do not use up the stage's requests
+            await release_slot(session_id, stage)
+            slot_held = False
+            early_result["usage"] = await check_rate_limits(user_id, session_id)
+            yield {"type": "text", "text": early_result["response"]}
+            yield {"type": "done", **early_result}
+            return
+
+        try:
+            wrapping = _intervention_wrapping(actual_stage, prompt_config)
+            if wrapping:
+                yield {"type": "text", "text": f"{wrapping[0]}\n\n"}
+
+            ai_result = None
+            async for event in stream_claude_response(prompt):
+                if event["type"] == "text":
+                    yield event
+                else:
+                    ai_result = event
+
+            final_response = ai_result["responseText"]
+            if wrapping:
+                yield {"type": "text", "text": f"\n\n{wrapping[1]}"}
+                final_response = f"{wrapping[0]}\n\n{ai_result['responseText']}\n\n{wrapping[1]}"
+
+            result = await _finish_ai_response(user_id, session_id, stage, user_input, session_context, final_response, ai_result)
+            slot_held = False
+            yield {"type": "done", **result}
+
+        except Exception as error:
+            await release_slot(session_id, stage)
+            slot_held = False
+            print(f"Anthropic API streaming error: {error}")
+            error_message = str(error) if hasattr(error, 'message') else 'The AI service is currently unavailable.'
+            yield {
+                "type": "error",
+                "success": False,
+                "error": error_message,
+                "fallback": "It seems the AI is having a moment to itself. Please continue with your own thoughts for now.",
+                "usage": await check_rate_limits(user_id, session_id, stage)
+            }
+    finally:
+        if slot_held:
+            # The client disconnected before the interaction was logged
+            await release_slot(session_id, stage)
 
+def _build_summary_prompt(session_data: Dict[str, Any], ai_interaction_log: List[Dict]) -> str:
+    """Fill the session summary prompt from the session data"""
     prompt = PROMPTS["session_summary"]
     
     # Analyze AI interactions for adaptive feedback
@@ -1666,55 +1938,161 @@ async def get_ai_summary(user_id: str, session_id: str, session_data: Dict[str,
     for key, value in formatted_data.items():
         prompt = prompt.replace('{{' + key + '}}', str(value))
 
+    return prompt
+
+# Top-level fields of the session_summary prompt's JSON structure
+SESSION_SUMMARY_FIELDS = ("title", "problem_overview", "key_insights", "action_plan", "feedback", "conclusion")
+
+async def _finish_ai_summary(user_id: str, session_id: str, session_data: Dict[str, Any], ai_result: Dict[str, Any]) -> Dict[str, Any]:
+    """Parse the summary JSON, log the interaction with its cost and build the response"""
+    # The summary is streamed as text, so it is always parsed from the text response
     try:
-        ai_result = await get_claude_response(prompt, system_prompt=OPTION_GENERATION_SYSTEM_PROMPT)
+        summary_data = extract_json(ai_result["responseText"])
+        record_parse("session_summary", "text", True)
+    except json.JSONDecodeError as parse_error:
+        record_parse("session_summary", "text", False)
+        # A response cut off at max_tokens is only used if it completed every field
+        summary_data = parse_partial_json(ai_result["responseText"])
+        if isinstance(summary_data, dict) and all(field in summary_data for field in SESSION_SUMMARY_FIELDS):
+            print(f"AI summary JSON was not closed ({parse_error}), using the completed fields")
+        else:
+            print(f"Failed to parse AI response as JSON: {parse_error}")
+            summary_data = None
+    if summary_data is None:
+        return {
+            "success": False,
+            "error": "Failed to generate structured summary",
+            "fallback": ai_result["responseText"]
+        }
+
+    cost_usd = _estimate_cost_usd(ai_result)
+
+    interaction_id = await log_ai_interaction({
+        "sessionId": session_id,
+        "userId": user_id,
+        "stage": "session_summary",
+        "userInput": "Session summary request",
+        "sessionContext": session_data,
+        "aiResponse": ai_result["responseText"],
+        "inputTokens": ai_result["inputTokens"],
+        "outputTokens": ai_result["outputTokens"],
+        "cacheReadTokens": ai_result["cacheReadTokens"],
+        "cacheWriteTokens": ai_result["cacheWriteTokens"],
+        "costUsd": cost_usd
+    })
+
+    return {
+        "success": True,
+        "interactionId": interaction_id,
+        "summary": summary_data,
+        "cost": cost_usd,
+        "tokensUsed": ai_result["inputTokens"] + ai_result["outputTokens"],
+        "usage": await check_rate_limits(user_id, session_id)
+    }
+
+async def get_ai_summary(user_id: str, session_id: str, session_data: Dict[str, Any], ai_interaction_log: List[Dict] = None) -> Dict[str, Any]:
+    """Get AI summary for a completed session"""
+    if ai_interaction_log is None:
+        ai_interaction_log = []
         
-        # Try to parse JSON from the response
+    limits = await reserve_rate_limit(user_id, session_id, "session_summary")
+    if not limits["stageAllowed"]:
+        return {
+            "success": False,
+            "error": f"Rate limit reached for session summary. You've used {limits['stageUsage']}/{limits['stageLimit']} summary requests.",
+            "fallback": "You've reached the limit for AI summaries. You can still review your session data.",
+            "usage": limits
+        }
+
+    slot_held = True
+    try:
+        prompt = _build_summary_prompt(session_data, ai_interaction_log)
+
         try:
-            summary_data = json.loads(ai_result["responseText"])
-        except json.JSONDecodeError as parse_error:
-            print(f"Failed to parse AI response as JSON: {parse_error}")
+            ai_result = await get_claude_response(prompt, system_prompt=OPTION_GENERATION_SYSTEM_PROMPT, profile="summary")
+            result = await _finish_ai_summary(user_id, session_id, session_data, ai_result)
+            # A summary that could not be parsed is not logged
+            slot_held = not result["success"]
+            return result
+
+        except Exception as error:
+            await release_slot(session_id, "session_summary")
+            slot_held = False
+            print(f"Anthropic API error: {error}")
+            error_message = str(error) if hasattr(error, 'message') else 'The AI service is currently unavailable.'
             return {
                 "success": False,
-                "error": "Failed to generate structured summary",
-                "fallback": ai_result["responseText"]
+                "error": error_message,
+                "fallback": "Unable to generate AI summary at this time. You can still review your session data.",
+                "usage": await check_rate_limits(user_id, session_id, "session_summary")
             }
+    finally:
+        if slot_held:
+            await release_slot(session_id, "session_summary")
 
-        # Pricing for Claude 3 Haiku ($ per 1M tokens)
-        input_cost = (ai_result["inputTokens"] / 1000000) * 0.25
-        output_cost = (ai_result["outputTokens"] / 1000000) * 1.25
-        cost_usd = input_cost + output_cost
-
-        interaction_id = await log_ai_interaction({
-            "sessionId": session_id,
-            "userId": user_id,
-            "stage": "session_summary",
-            "userInput": "Session summary request",
-            "sessionContext": session_data,
-            "aiResponse": ai_result["responseText"],
-            "inputTokens": ai_result["inputTokens"],
-            "outputTokens": ai_result["outputTokens"],
-            "costUsd": cost_usd
-        })
-
-        return {
-            "success": True,
-            "interactionId": interaction_id,
-            "summary": summary_data,
-            "cost": cost_usd,
-            "tokensUsed": ai_result["inputTokens"] + ai_result["outputTokens"],
-            "usage": await check_rate_limits(user_id, session_id)
-        }
+async def stream_ai_summary(user_id: str, session_id: str, session_data: Dict[str, Any], ai_interaction_log: List[Dict] = None) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Streaming variant of get_ai_summary.
 
-    except Exception as error:
-        print(f"Anthropic API error: {error}")
-        error_message = str(error) if hasattr(error, 'message') else 'The AI service is currently unavailable.'
-        return {
+    Yields {"type": "text", "text": ...} events with the raw summary JSON as it
+    is generated, then a {"type": "done", ...} event with the parsed summary
+    (same fields as get_ai_summary) or a {"type": "error", ...} event.
+    """
+    if ai_interaction_log is None:
+        ai_interaction_log = []
+        
+    limits = await reserve_rate_limit(user_id, session_id, "session_summary")
+    if not limits["stageAllowed"]:
+        yield {
+            "type": "error",
             "success": False,
-            "error": error_message,
-            "fallback": "Unable to generate AI summary at this time. You can still review your session data.",
+            "error": f"Rate limit reached for session summary. You've used {limits['stageUsage']}/{limits['stageLimit']} summary requests.",
+            "fallback": "You've reached the limit for AI summaries. You can still review your session data.",
             "usage": limits
         }
+        return
+
+    slot_held = True
+    try:
+        prompt = _build_summary_prompt(session_data, ai_interaction_log)
+
+        try:
+            ai_result = None
+            async for event in stream_claude_response(prompt, system_prompt=OPTION_GENERATION_SYSTEM_PROMPT, profile="summary"):
+                if event["type"] == "text":
+                    yield event
+                else:
+                    ai_result = event
+
+            result = await _finish_ai_summary(user_id, session_id, session_data, ai_result)
+            # A summary that could not be parsed is not logged
+            slot_held = not result["success"]
+            yield {"type": "done" if result["success"] else "error", **result}
+
+        except Exception as error:
+            await release_slot(session_id, "session_summary")
+            slot_held = False
+            print(f"Anthropic API streaming error: {error}")
+            error_message = str(error) if hasattr(error, 'message') else 'The AI service is currently unavailable.'
+            yield {
+                "type": "error",
+                "success": False,
+                "error": error_message,
+                "fallback": "Unable to generate AI summary at this time. You can still review your session data.",
+                "usage": await check_rate_limits(user_id, session_id, "session_summary")
+            }
+    finally:
+        if slot_held:
+            await release_slot(session_id, "session_summary")
+
+PROBLEM_VALIDATION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "isValid": {"type": "boolean"},
+        "reason": {"type": "string"}
+    },
+    "required": ["isValid", "reason"]
+}
 
 async def validate_problem_statement(problem_statement: str) -> Dict[str, Any]:
     """
@@ -1756,29 +2134,29 @@ Your response must be valid JSON only, no other text."""
 
     try:
         # Use the existing Claude API function
-        ai_result = await get_claude_response(validation_prompt)
+        ai_result = await get_claude_response(validation_prompt, profile="classification", output_schema=PROBLEM_VALIDATION_SCHEMA, call_site="validate_problem_statement")
+        validation_result = ai_result["data"]
         
-        # Try to parse the JSON response
-        try:
-            import json
-            validation_result = json.loads(ai_result["responseText"])
-            
-            return {
-                "success": True,
-                "isValid": validation_result.get("isValid", False),
-                "reason": validation_result.get("reason", "Unable to determine validation status")
-            }
+        return {
+            "success": True,
+            "isValid": validation_result.get("isValid", False),
+            "reason": validation_result.get("reason", "Unable to determine validation status")
+        }
             
-        except json.JSONDecodeError:
-            # If JSON parsing fails, fall back to a simple heuristic
-            response_text = ai_result["responseText"].lower()
+    except json.JSONDecodeError as e:
+        # Use the flag if the object got that far, else a simple heuristic on the raw response
+        flag = _salvage_field(e, "isValid")
+        if flag is not None:
+            is_valid = str(flag).strip().lower() == "true"
+        else:
+            response_text = e.doc.lower()
             is_valid = "true" in response_text or "valid" in response_text
-            
-            return {
-                "success": True,
-                "isValid": is_valid,
-                "reason": "AI validation completed" if is_valid else "Problem statement needs more detail"
-            }
+        
+        return {
+            "success": True,
+            "isValid": is_valid,
+            "reason": "AI validation completed" if is_valid else "Problem statement needs more detail"
+        }
             
     except Exception as e:
         print(f"AI validation error: {e}")
@@ -1792,6 +2170,15 @@ Your response must be valid JSON only, no other text."""
             "reason": "AI validation unavailable, using basic validation" if is_valid else "Problem statement appears too brief"
         }
 
+SELF_AWARENESS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "selfAwarenessDetected": {"type": "boolean"},
+        "reason": {"type": "string"}
+    },
+    "required": ["selfAwarenessDetected", "reason"]
+}
+
 async def analyze_self_awareness(causes: List[str]) -> Dict[str, Any]:
     """
     Analyze user's submitted causes to determine if they demonstrate self-awareness.
@@ -1842,29 +2229,29 @@ Your response must be valid JSON only, no other text."""
 
     try:
         # Use the existing Claude API function
-        ai_result = await get_claude_response(analysis_prompt)
+        ai_result = await get_claude_response(analysis_prompt, output_schema=SELF_AWARENESS_SCHEMA, call_site="analyze_self_awareness")
+        analysis_result = ai_result["data"]
         
-        # Try to parse the JSON response
-        try:
-            import json
-            analysis_result = json.loads(ai_result["responseText"])
-            
-            return {
-                "success": True,
-                "selfAwarenessDetected": analysis_result.get("selfAwarenessDetected", False),
-                "reason": analysis_result.get("reason", "Analysis completed")
-            }
+        return {
+            "success": True,
+            "selfAwarenessDetected": analysis_result.get("selfAwarenessDetected", False),
+            "reason": analysis_result.get("reason", "Analysis completed")
+        }
             
-        except json.JSONDecodeError:
-            # If JSON parsing fails, fall back to a simple heuristic
-            response_text = ai_result["responseText"].lower()
+    except json.JSONDecodeError as e:
+        # Use the flag if the object got that far, else a simple heuristic on the raw response
+        flag = _salvage_field(e, "selfAwarenessDetected")
+        if flag is not None:
+            self_awareness_detected = str(flag).strip().lower() == "true"
+        else:
+            response_text = e.doc.lower()
             self_awareness_detected = "true" in response_text or "self-awareness detected" in response_text
-            
-            return {
-                "success": True,
-                "selfAwarenessDetected": self_awareness_detected,
-                "reason": "AI analysis completed" if self_awareness_detected else "No clear self-awareness patterns found"
-            }
+        
+        return {
+            "success": True,
+            "selfAwarenessDetected": self_awareness_detected,
+            "reason": "AI analysis completed" if self_awareness_detected else "No clear self-awareness patterns found"
+        }
             
     except Exception as e:
         print(f"Self-awareness analysis error: {e}")
@@ -1893,6 +2280,25 @@ Your response must be valid JSON only, no other text."""
             "reason": "Fallback analysis using improved keyword detection" if final_self_awareness else "No self-referential action patterns detected"
         }
 
+ACTION_OPTIONS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "action_options": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "text": {"type": "string"},
+                    "reasoning": {"type": "string"}
+                },
+                "required": ["text", "reasoning"]
+            },
+            "minItems": 1
+        }
+    },
+    "required": ["action_options"]
+}
+
 async def generate_action_options(cause: str, is_contribution: bool, user_responses: List[str]) -> List[Dict[str, Any]]:
     """
     Generate action options based on cause analysis and user responses from the action planning modal.
@@ -1914,55 +2320,47 @@ Generate 3 diverse, actionable options that directly address this {cause_type}.
 4. **Root-cause focused** - addresses the underlying issue, not just symptoms
 
 **Response Format:**
-Return a JSON array of action options. Each option should have:
+Return a JSON object with an "action_options" array. Each option should have:
 - "text": A clear, specific action statement (1-2 sentences)
 - "reasoning": Brief explanation of why this approach would be effective (1 sentence)
 
 Example format:
-[
-  {{
-    "text": "Set a daily 25-minute focused work timer first thing each morning before checking email or social media",
-    "reasoning": "This creates a consistent trigger and removes decision fatigue by making it automatic."
-  }},
-  {{
-    "text": "Identify your top priority task the night before and put it prominently on your desk",
-    "reasoning": "This reduces morning decision-making and creates visual accountability."
-  }}
-]
+{{
+  "action_options": [
+    {{
+      "text": "Set a daily 25-minute focused work timer first thing each morning before checking email or social media",
+      "reasoning": "This creates a consistent trigger and removes decision fatigue by making it automatic."
+    }},
+    {{
+      "text": "Identify your top priority task the night before and put it prominently on your desk",
+      "reasoning": "This reduces morning decision-making and creates visual accountability."
+    }}
+  ]
+}}
 
 **Critical:** Return only valid JSON. No additional text or formatting."""
 
     try:
-        ai_result = await get_claude_response(action_planning_prompt)
-        
-        # Try to parse JSON response
-        try:
-            import json
-            action_options = json.loads(ai_result["responseText"])
-            
-            # Ensure we have a list of options
-            if not isinstance(action_options, list):
-                action_options = [action_options] if isinstance(action_options, dict) else []
+        ai_result = await get_claude_response(action_planning_prompt, profile="options", output_schema=ACTION_OPTIONS_SCHEMA, call_site="generate_action_options")
+        return ai_result["data"]["action_options"]
             
-            return action_options
-            
-        except json.JSONDecodeError:
-            # Fallback to generic action options if AI fails
-            generic_actions = [
-                {
-                    "text": f"Create a specific plan to address this {cause_type} with clear steps and timeline",
-                    "reasoning": "Having a concrete plan makes action more likely than vague intentions."
-                },
-                {
-                    "text": f"Start with the smallest possible step toward resolving this {cause_type}",
-                    "reasoning": "Small wins build momentum and reduce the barrier to getting started."
-                },
-                {
-                    "text": f"Set up environmental cues or reminders to help you address this {cause_type}",
-                    "reasoning": "External prompts reduce reliance on willpower and memory."
-                }
-            ]
-            return generic_actions
+    except json.JSONDecodeError:
+        # Fallback to generic action options if AI fails
+        generic_actions = [
+            {
+                "text": f"Create a specific plan to address this {cause_type} with clear steps and timeline",
+                "reasoning": "Having a concrete plan makes action more likely than vague intentions."
+            },
+            {
+                "text": f"Start with the smallest possible step toward resolving this {cause_type}",
+                "reasoning": "Small wins build momentum and reduce the barrier to getting started."
+            },
+            {
+                "text": f"Set up environmental cues or reminders to help you address this {cause_type}",
+                "reasoning": "External prompts reduce reliance on willpower and memory."
+            }
+        ]
+        return generic_actions
             
     except Exception as e:
         print(f"Action planning error: {e}")
@@ -2007,6 +2405,19 @@ Provide only the refined action statement (2-3 sentences maximum). Do not includ
         # Return the original action if refinement fails
         return initial_action
 
+ROOT_CAUSE_EVALUATION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "total_score": {"type": "integer"},
+        "foundational_score": {"type": "integer"},
+        "causal_score": {"type": "integer"},
+        "is_root_cause": {"type": "boolean"},
+        "reasoning": {"type": "string"},
+        "suggested_follow_up": {"type": "string", "enum": ["foundational", "causal"]}
+    },
+    "required": ["total_score", "foundational_score", "causal_score", "is_root_cause", "reasoning", "suggested_follow_up"]
+}
+
 async def evaluate_root_cause_depth(cause_text: str, user_response: str = None) -> Dict[str, Any]:
     """
     Evaluates how close a cause or user response is to being a true root cause
@@ -2047,20 +2458,8 @@ CRITICAL: Respond with ONLY this JSON format, no other text:
 Set is_root_cause to true if total_score >= 5. Set suggested_follow_up to the lowest-scoring dimension."""
 
     try:
-        ai_result = await get_claude_response(evaluation_prompt)
-        response_text = ai_result['responseText'].strip()
-        
-        # Clean up common JSON formatting issues
-        if response_text.startswith('```json'):
-            response_text = response_text.replace('```json', '').replace('```', '').strip()
-        elif response_text.startswith('```'):
-            response_text = response_text.replace('```', '').strip()
-        
-        # Handle potential line break issues in reasoning field
-        import re
-        response_text = re.sub(r'(?<!\\)"\s*\n\s*"', '" "', response_text)
-        
-        evaluation_result = json.loads(response_text)
+        ai_result = await get_claude_response(evaluation_prompt, profile="classification", output_schema=ROOT_CAUSE_EVALUATION_SCHEMA, call_site="evaluate_root_cause_depth")
+        evaluation_result = ai_result["data"]
         
         return {
             "success": True,
@@ -2074,7 +2473,7 @@ Set is_root_cause to true if total_score >= 5. Set suggested_follow_up to the lo
         
     except json.JSONDecodeError as e:
         print(f"JSON parsing failed for root cause evaluation: {e}")
-        print(f"Attempted to parse: '{response_text if 'response_text' in locals() else ai_result['responseText'] if 'ai_result' in locals() else 'No response'}'")
+        print(f"Attempted to parse: '{e.doc}'")
         
         # Enhanced fallback with heuristic analysis
         fallback_score = _analyze_root_cause_heuristically(text_to_analyze)
@@ -2205,6 +2604,18 @@ Return only the question text, no other formatting or explanation."""
         questions = fallback_questions.get(focus_area, fallback_questions["foundational"])
         return questions[min(question_count - 1, len(questions) - 1)]
 
+MITIGATION_OPTIONS_SCHEMA = {
+    "type": "object",
+    "properties": {"mitigation_options": {"type": "array", "items": {"type": "string"}, "minItems": 1}},
+    "required": ["mitigation_options"]
+}
+
+CONTINGENCY_OPTIONS_SCHEMA = {
+    "type": "object",
+    "properties": {"contingency_options": {"type": "array", "items": {"type": "string"}, "minItems": 1}},
+    "required": ["contingency_options"]
+}
+
 async def get_fear_analysis_options(mitigation_plan: str, fear_context: dict = None):
     """
     Generate mitigation and contingency options for fear analysis
@@ -2232,7 +2643,19 @@ async def get_fear_analysis_options(mitigation_plan: str, fear_context: dict = N
             formatted_value = format_context_value(key, value)
             mitigation_prompt = mitigation_prompt.replace('{{' + key + '}}', formatted_value)
         
-        mitigation_ai_result = await get_claude_response(mitigation_prompt, system_prompt=OPTION_GENERATION_SYSTEM_PROMPT)
+        mitigation_options = []
+        try:
+            mitigation_ai_result = await get_claude_response(mitigation_prompt, system_prompt=OPTION_GENERATION_SYSTEM_PROMPT, profile="options", output_schema=MITIGATION_OPTIONS_SCHEMA, call_site="fear_mitigation_options")
+            mitigation_options = mitigation_ai_result["data"]["mitigation_options"]
+            print(f"Successfully parsed {len(mitigation_options)} mitigation options")
+        except json.JSONDecodeError as e:
+            print(f"JSON parsing failed for mitigation options: {e}")
+            # Fallback to the options that did come back, else to parsing the response text
+            salvaged = _salvage_field(e, "mitigation_options")
+            if isinstance(salvaged, list):
+                mitigation_options = [str(option) for option in salvaged if option][:5]
+            else:
+                mitigation_options = parse_ai_suggestions(e.doc)
         
         # Generate contingency options using direct AI call
         contingency_prompt = PROMPTS["fear_contingency"]["body"]
@@ -2242,48 +2665,20 @@ async def get_fear_analysis_options(mitigation_plan: str, fear_context: dict = N
             formatted_value = format_context_value(key, value)
             contingency_prompt = contingency_prompt.replace('{{' + key + '}}', formatted_value)
         
-        contingency_ai_result = await get_claude_response(contingency_prompt, system_prompt=OPTION_GENERATION_SYSTEM_PROMPT)
-        
-        mitigation_options = []
         contingency_options = []
-        
-        # Parse mitigation options from JSON response
-        if mitigation_ai_result and mitigation_ai_result.get("responseText"):
-            try:
-                # Clean up JSON response
-                response_text = mitigation_ai_result["responseText"].strip()
-                if response_text.startswith('```json'):
-                    response_text = response_text.replace('```json', '').replace('```', '').strip()
-                elif response_text.startswith('```'):
-                    response_text = response_text.replace('```', '').strip()
-                
-                mitigation_response = json.loads(response_text)
-                mitigation_options = mitigation_response.get("mitigation_options", [])
-                print(f"Successfully parsed {len(mitigation_options)} mitigation options")
-            except json.JSONDecodeError as e:
-                print(f"JSON parsing failed for mitigation options: {e}")
-                # Fallback to parsing the response text
-                mitigation_options = parse_ai_suggestions(mitigation_ai_result["responseText"])
-        
-        # Parse contingency options from JSON response
-        if contingency_ai_result and contingency_ai_result.get("responseText"):
-            try:
-                # Clean up JSON response
-                response_text = contingency_ai_result["responseText"].strip()
-                if response_text.startswith('```json'):
-                    response_text = response_text.replace('```json', '').replace('```', '').strip()
-                elif response_text.startswith('```'):
-                    response_text = response_text.replace('```', '').strip()
-                
-                contingency_response = json.loads(response_text)
-                contingency_options = contingency_response.get("contingency_options", [])
-                # Ensure we never return more than 4 contingency options
-                contingency_options = contingency_options[:4]
-                print(f"Successfully parsed {len(contingency_options)} contingency options")
-            except json.JSONDecodeError as e:
-                print(f"JSON parsing failed for contingency options: {e}")
-                # Fallback to parsing the response text
-                contingency_options = parse_ai_suggestions(contingency_ai_result["responseText"])
+        try:
+            contingency_ai_result = await get_claude_response(contingency_prompt, system_prompt=OPTION_GENERATION_SYSTEM_PROMPT, profile="options", output_schema=CONTINGENCY_OPTIONS_SCHEMA, call_site="fear_contingency_options")
+            # Ensure we never return more than 4 contingency options
+            contingency_options = contingency_ai_result["data"]["contingency_options"][:4]
+            print(f"Successfully parsed {len(contingency_options)} contingency options")
+        except json.JSONDecodeError as e:
+            print(f"JSON parsing failed for contingency options: {e}")
+            # Fallback to the options that did come back, else to parsing the response text
+            salvaged = _salvage_field(e, "contingency_options")
+            if isinstance(salvaged, list):
+                contingency_options = [str(option) for option in salvaged if option][:4]
+            else:
+                contingency_options = parse_ai_suggestions(e.doc)
         
         print(f"Final result: {len(mitigation_options)} mitigation, {len(contingency_options)} contingency options")
         
@@ -2328,7 +2723,7 @@ def parse_ai_suggestions(response_text: str) -> list:
     
     return suggestions[:5]  # Limit to 5 suggestions
 
-async def get_riddle_question_response(question: str, riddle_solution: str) -> Dict[str, Any]:
+async def get_riddle_question_response(question: str, riddle_solution: str, riddle_id: Optional[str] = None) -> Dict[str, Any]:
     """
     Use AI to determine if a yes/no question about a riddle should be answered with "Yes" or "No".
     Uses a "Chain of Thought" reasoning process to intelligently handle ambiguous questions.
@@ -2336,14 +2731,33 @@ async def get_riddle_question_response(question: str, riddle_solution: str) -> D
     Args:
         question: The user's yes/no question about the riddle
         riddle_solution: The correct answer to the riddle
+        riddle_id: Optional riddle ID; when given, verdicts are served from and stored in
+            the answer cache and the riddle's reworded-question index
     
     Returns:
         Dict with 'response' key containing "Yes" or "No"
     """
-    riddle_prompt = f"""You are an AI assistant for a riddle game. Your task is to intelligently analyze a user's question and provide an accurate "Yes" or "No" response.
+    if riddle_id:
+        cached = await get_cached_answer(riddle_id, "question", question)
+        if cached:
+            return cached
+        similar = find_similar_verdict("riddle", riddle_id, question)
+        if similar:
+            return similar
+
+    if riddle_id and RIDDLE_BATCH_ENABLED:
+        verdict, parsed = await riddle_question_batcher.submit(str(riddle_id), (question, riddle_solution))
+    else:
+        verdict, parsed = await _judge_riddle_question(question, riddle_solution)
 
-**Riddle Solution:** "{riddle_solution}"
-**User's Question:** "{question}"
+    # Only parsed AI verdicts are cached - fallbacks are not
+    if riddle_id and parsed:
+        await store_answer(riddle_id, "question", question, verdict)
+        add_similar_verdict("riddle", riddle_id, question, verdict)
+
+    return verdict
+
+RIDDLE_JUDGE_INSTRUCTIONS = """You are an AI assistant for a riddle game. Your task is to intelligently analyze a user's question and provide an accurate "Yes" or "No" response. The riddle solution and the user's question follow these instructions.
 
 **Your "Chain of Thought" Analysis Process:**
 
@@ -2372,21 +2786,59 @@ Return a JSON object with your final answer and a brief explanation of your reas
   4. **Final Answer:** A fan is a solid object, so the answer is "Yes".
 - **JSON Output:**
   ```json
-  {{
+  {
     "answer": "Yes",
     "reasoning": "The user specified 'a solid,' indicating they are asking about the physical state of the object. A fan is a solid object."
-  }}
+  }
   ```
 
 **Additional Examples:**
 
 **Example for "The man was hanged in a locked room":**
-- "Did he die inside the room?" → {{"answer": "Yes", "reasoning": "The solution states he was in a room when he died."}}
-- "Was there a rope?" → {{"answer": "Yes", "reasoning": "Hanging requires a rope, which is implied by the solution."}}
+- "Did he die inside the room?" → {"answer": "Yes", "reasoning": "The solution states he was in a room when he died."}
+- "Was there a rope?" → {"answer": "Yes", "reasoning": "Hanging requires a rope, which is implied by the solution."}
 
 **Example for "The 52 bicycles are a deck of playing cards":**
-- "Are the bicycles a deck of cards?" → {{"answer": "Yes", "reasoning": "The solution explicitly states the bicycles are a deck of cards."}}
-- "Are they actual bicycles?" → {{"answer": "No", "reasoning": "They are cards, not real bicycles."}}
+- "Are the bicycles a deck of cards?" → {"answer": "Yes", "reasoning": "The solution explicitly states the bicycles are a deck of cards."}
+- "Are they actual bicycles?" → {"answer": "No", "reasoning": "They are cards, not real bicycles."}"""
+
+RIDDLE_VERDICT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "answer": {"type": "string", "description": "Yes or No"},
+        "reasoning": {"type": "string"}
+    },
+    "required": ["answer", "reasoning"]
+}
+
+RIDDLE_BATCH_VERDICTS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "answers": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "id": {"type": "integer"},
+                    "answer": {"type": "string", "description": "Yes or No"},
+                    "reasoning": {"type": "string"}
+                },
+                "required": ["id", "answer"]
+            }
+        }
+    },
+    "required": ["answers"]
+}
+
+async def _judge_riddle_question(question: str, riddle_solution: str) -> Tuple[Dict[str, str], bool]:
+    """
+    Ask the model about a single riddle question.
+
+    Returns:
+        Tuple of (verdict, parsed) - parsed is False when the verdict is a fallback
+    """
+    riddle_prompt = f"""**Riddle Solution:** "{riddle_solution}"
+**User's Question:** "{question}"
 
 **Your Task:**
 Analyze the user's question now and return a JSON object with your answer and reasoning.
@@ -2394,45 +2846,153 @@ Analyze the user's question now and return a JSON object with your answer and re
 **CRITICAL:** Return ONLY the JSON object, with no other text or formatting."""
 
     try:
-        ai_result = await get_claude_response(riddle_prompt, temperature=0.3)
-        response_text = ai_result['responseText'].strip()
+        ai_result = await get_claude_response(riddle_prompt, profile="riddle_judge", prompt_prefix=RIDDLE_JUDGE_INSTRUCTIONS, output_schema=RIDDLE_VERDICT_SCHEMA, call_site="riddle_judge")
+        result = ai_result["data"]
+        answer = result['answer']
+        reasoning = result.get('reasoning', '')
         
-        # Clean up JSON formatting if wrapped in markdown
-        if response_text.startswith('```json'):
-            response_text = response_text.replace('```json', '').replace('```', '').strip()
-        elif response_text.startswith('```'):
-            response_text = response_text.replace('```', '').strip()
+        # Log the reasoning for debugging
+        print(f"AI Question Analysis: {reasoning}")
         
-        # Parse the JSON response
-        try:
-            result = json.loads(response_text)
-            answer = result.get('answer', 'No')
-            reasoning = result.get('reasoning', '')
-            
-            # Log the reasoning for debugging
-            print(f"AI Question Analysis: {reasoning}")
-            
-            # Normalize the answer to ensure it's either Yes or No
-            if answer.lower() == 'yes':
-                return {"response": "Yes"}
-            else:
-                return {"response": "No"}
-                
-        except json.JSONDecodeError as e:
-            print(f"JSON parsing failed for riddle question: {e}")
-            print(f"Response text: {response_text}")
+        # Normalize the answer to ensure it's either Yes or No
+        return ({"response": "Yes"} if answer.lower() == 'yes' else {"response": "No"}), True
             
-            # Fallback: try to extract Yes/No from the text
-            response_lower = response_text.lower()
-            if 'yes' in response_lower and 'no' not in response_lower:
-                return {"response": "Yes"}
-            else:
-                return {"response": "No"}
+    except json.JSONDecodeError as e:
+        print(f"JSON parsing failed for riddle question: {e}")
+        print(f"Response text: {e.doc}")
+        
+        # Fallback: use the answer if the object got that far, else try to extract Yes/No from the text
+        answer = _salvage_field(e, "answer")
+        if answer is not None:
+            return ({"response": "Yes"} if str(answer).strip().lower() == 'yes' else {"response": "No"}), False
+        response_lower = e.doc.lower()
+        if 'yes' in response_lower and 'no' not in response_lower:
+            return {"response": "Yes"}, False
+        else:
+            return {"response": "No"}, False
             
     except Exception as e:
         print(f"Error in riddle question AI: {e}")
         # Fallback to "No" if AI fails
-        return {"response": "No"}
+        return {"response": "No"}, False
+
+async def _judge_riddle_question_batch(riddle_id: str, items: List[Tuple[str, str]]) -> List[Tuple[Dict[str, str], bool]]:
+    """
+    Answer several questions about the same riddle with one numbered prompt.
+
+    Called by the riddle question micro-batcher. Duplicate questions in a batch
+    are asked once. If the batch response cannot be parsed, or leaves any
+    question unanswered, the missing questions fall back to per-question calls.
+
+    Args:
+        riddle_id: ID of the riddle every question is about
+        items: (question, riddle_solution) pairs in arrival order
+
+    Returns:
+        One (verdict, parsed) tuple per item, in the same order
+    """
+    riddle_solution = items[0][1]
+    unique_questions: List[str] = []
+    positions: Dict[str, int] = {}
+    for question, _ in items:
+        key = normalize_question(question)
+        if key not in positions:
+            positions[key] = len(unique_questions)
+            unique_questions.append(question)
+
+    if len(unique_questions) == 1:
+        result = await _judge_riddle_question(unique_questions[0], riddle_solution)
+        return [result] * len(items)
+
+    numbered_questions = "\n".join(f"{i}. \"{q}\"" for i, q in enumerate(unique_questions, 1))
+    batch_prompt = f"""You are an AI assistant for a riddle game. Several players have asked yes/no questions about the same riddle. Answer each question independently with an accurate "Yes" or "No".
+
+**Riddle Solution:** "{riddle_solution}"
+
+**Questions:**
+{numbered_questions}
+
+**How to answer each question:**
+1. Identify any words that could be ambiguous. For example, "state" could mean physical state (solid/liquid/gas) or operational state (on/off).
+2. Use the other words in the question to decide what the player most likely means. For example, "Is the object's state, a solid?" is asking about physical state.
+3. Answer "Yes" or "No" for that interpretation.
+
+**Examples for "The 52 bicycles are a deck of playing cards":**
+- "Are the bicycles a deck of cards?" → Yes (the solution explicitly states the bicycles are a deck of cards)
+- "Are they actual bicycles?" → No (they are cards, not real bicycles)
+
+**Output format:**
+Return a JSON object whose "answers" array has exactly one entry per question, in order:
+{{"answers": [
+  {{"id": 1, "answer": "Yes", "reasoning": "brief explanation"}},
+  {{"id": 2, "answer": "No", "reasoning": "brief explanation"}}
+]}}
+
+**CRITICAL:** Return ONLY the JSON object, with no other text or formatting."""
+
+    entries: List[Any] = []
+    try:
+        ai_result = await get_claude_response(batch_prompt, profile="riddle_judge_batch", output_schema=RIDDLE_BATCH_VERDICTS_SCHEMA, call_site="riddle_judge_batch")
+        entries = ai_result["data"]["answers"]
+    except json.JSONDecodeError as e:
+        # A batch that failed the schema (e.g. cut off at max_tokens) still holds the
+        # answers it completed: e.doc is the tool input in tool mode, the raw text otherwise
+        entries = _salvage_field(e, "answers")
+        if not isinstance(entries, list):
+            entries = []
+        print(f"Batch riddle question parsing failed for riddle {riddle_id}: {e} (salvaged {len(entries)} answers)")
+    except Exception as e:
+        print(f"Batch riddle question parsing failed for riddle {riddle_id}: {e}")
+
+    answers: Dict[int, Dict[str, str]] = {}
+    for entry in entries:
+        if not isinstance(entry, dict) or not str(entry.get('id', '')).isdigit():
+            continue
+        answer = str(entry.get('answer', '')).strip().lower()
+        if answer in ('yes', 'no'):
+            answers[int(entry['id'])] = {"response": answer.capitalize()}
+
+    results: List[Optional[Tuple[Dict[str, str], bool]]] = [
+        (answers[i], True) if i in answers else None
+        for i in range(1, len(unique_questions) + 1)
+    ]
+
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        riddle_batch_stats["fallbackQuestions"] += len(missing)
+        print(f"Falling back to per-question calls for {len(missing)}/{len(unique_questions)} riddle questions")
+        fallbacks = await asyncio.gather(*(
+            _judge_riddle_question(unique_questions[i], riddle_solution) for i in missing
+        ))
+        for i, result in zip(missing, fallbacks):
+            results[i] = result
+
+    riddle_batch_stats["batchedQuestions"] += len(unique_questions) - len(missing)
+    return [results[positions[normalize_question(question)]] for question, _ in items]
+
+# Cross-user micro-batcher for riddle questions (opt-in via RIDDLE_BATCH_ENABLED)
+riddle_question_batcher = MicroBatcher(
+    _judge_riddle_question_batch,
+    window_ms=RIDDLE_BATCH_WINDOW_MS,
+    max_size=RIDDLE_BATCH_MAX_SIZE
+)
+
+def get_riddle_batch_stats() -> Dict[str, Any]:
+    """Get riddle question micro-batching statistics"""
+    return {
+        "enabled": RIDDLE_BATCH_ENABLED,
+        **riddle_question_batcher.get_stats(),
+        **riddle_batch_stats
+    }
+
+SOLUTION_EVALUATION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "is_correct": {"type": "boolean"},
+        "reasoning": {"type": "string"}
+    },
+    "required": ["is_correct", "reasoning"]
+}
 
 async def evaluate_riddle_solution_with_ai(user_answer: str, correct_solution: str) -> Dict[str, Any]:
     """
@@ -2489,16 +3049,8 @@ The user is correct if they have identified the right answer, even if phrased as
 }}"""
 
     try:
-        ai_result = await get_claude_response(evaluation_prompt, temperature=0.2)
-        response_text = ai_result['responseText'].strip()
-        
-        # Clean up JSON formatting
-        if response_text.startswith('```json'):
-            response_text = response_text.replace('```json', '').replace('```', '').strip()
-        elif response_text.startswith('```'):
-            response_text = response_text.replace('```', '').strip()
-        
-        evaluation_result = json.loads(response_text)
+        ai_result = await get_claude_response(evaluation_prompt, profile="solution_check", output_schema=SOLUTION_EVALUATION_SCHEMA, call_site="evaluate_riddle_solution")
+        evaluation_result = ai_result["data"]
         
         return {
             "success": True,
@@ -2508,7 +3060,7 @@ The user is correct if they have identified the right answer, even if phrased as
         
     except json.JSONDecodeError as e:
         print(f"JSON parsing failed for riddle solution evaluation: {e}")
-        print(f"Response text: {response_text if 'response_text' in locals() else 'No response'}")
+        print(f"Response text: {e.doc or 'No response'}")
         
         # Fallback: simple string matching
         user_lower = user_answer.lower().strip()
@@ -2554,22 +3106,8 @@ The user is correct if they have identified the right answer, even if phrased as
             "is_correct": is_match,
             "reasoning": "Evaluation service unavailable, using fallback"
         }
-async def triage_classify_input(user_input: str, riddle_solution: str) -> Dict[str, Any]:
-    """
-    Stage 1: Triage AI - Classifies user input as QUESTION or SOLUTION
-    
-    Args:
-        user_input: The user's submission text
-        riddle_solution: The correct answer to the riddle
-        
-    Returns:
-        Dict with 'classification' (QUESTION/SOLUTION), 'confidence', and 'reasoning'
-    """
-    triage_prompt = f"""You are a triage classifier for a riddle game. Your ONLY job is to determine if the user's input is a QUESTION or a SOLUTION attempt.
 
-**Riddle Answer:** "{riddle_solution}"
-
-**User Input:** "{user_input}"
+TRIAGE_INSTRUCTIONS = """You are a triage classifier for a riddle game. Your ONLY job is to determine if the user's input is a QUESTION or a SOLUTION attempt. The riddle answer and the user's input follow these rules.
 
 **CRITICAL CLASSIFICATION RULES:**
 
@@ -2603,23 +3141,42 @@ When the user asks "Is/Are [subject] [a/an] [noun]?", they are proposing that [n
 When the user asks "Is/Are [subject] [adjective]?" or "Does [subject] [verb]?", they are asking about properties → QUESTION
 
 **CRITICAL:** Return ONLY valid JSON in this exact format:
-{{
+{
   "classification": "QUESTION" or "SOLUTION",
   "confidence": 0.0 to 1.0,
   "reasoning": "Brief explanation citing which rule was applied"
-}}"""
+}"""
+
+TRIAGE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "classification": {"type": "string", "description": "QUESTION or SOLUTION"},
+        "confidence": {"type": "number"},
+        "reasoning": {"type": "string"}
+    },
+    "required": ["classification", "confidence", "reasoning"]
+}
 
-    try:
-        ai_result = await get_claude_response(triage_prompt, temperature=0.1)
-        response_text = ai_result['responseText'].strip()
-        
-        # Clean up JSON formatting
-        if response_text.startswith('```json'):
-            response_text = response_text.replace('```json', '').replace('```', '').strip()
-        elif response_text.startswith('```'):
-            response_text = response_text.replace('```', '').strip()
+async def triage_classify_input(user_input: str, riddle_solution: str) -> Dict[str, Any]:
+    """
+    Stage 1: Triage AI - Classifies user input as QUESTION or SOLUTION
+    
+    Args:
+        user_input: The user's submission text
+        riddle_solution: The correct answer to the riddle
         
-        result = json.loads(response_text)
+    Returns:
+        Dict with 'classification' (QUESTION/SOLUTION), 'confidence', and 'reasoning'
+    """
+    triage_prompt = f"""**Riddle Answer:** "{riddle_solution}"
+
+**User Input:** "{user_input}"
+
+Classify this input using the rules above and return ONLY the JSON object."""
+
+    try:
+        ai_result = await get_claude_response(triage_prompt, profile="classification", prompt_prefix=TRIAGE_INSTRUCTIONS, output_schema=TRIAGE_SCHEMA, call_site="triage_classify_input")
+        result = ai_result["data"]
         
         return {
             "success": True,
@@ -2630,24 +3187,34 @@ When the user asks "Is/Are [subject] [adjective]?" or "Does [subject] [verb]?",
         
     except json.JSONDecodeError as e:
         print(f"Triage classification JSON error: {e}")
-        # Fallback: simple heuristic
-        question_indicators = ["is it", "does it", "can it", "has it", "are they", "do they", "?"]
-        is_question = any(indicator in user_input.lower() for indicator in question_indicators)
-        
-        return {
-            "success": False,
-            "classification": "QUESTION" if is_question else "SOLUTION",
-            "confidence": 0.3,
-            "reasoning": "Fallback heuristic classification"
-        }
+        return _classify_input_heuristically(user_input)
     except Exception as e:
+        # Upstream failures (including an open circuit breaker) use the same keyword triage
         print(f"Triage classification error: {e}")
-        return {
-            "success": False,
-            "classification": "QUESTION",
-            "confidence": 0.0,
-            "reasoning": f"Error: {str(e)}"
-        }
+        return _classify_input_heuristically(user_input)
+
+def _classify_input_heuristically(user_input: str) -> Dict[str, Any]:
+    """Keyword triage used when the AI classification is unavailable"""
+    question_indicators = ["is it", "does it", "can it", "has it", "are they", "do they", "?"]
+    is_question = any(indicator in user_input.lower() for indicator in question_indicators)
+    
+    return {
+        "success": False,
+        "classification": "QUESTION" if is_question else "SOLUTION",
+        "confidence": 0.3,
+        "reasoning": "Fallback heuristic classification"
+    }
+
+COMPONENT_MATCH_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "matched": {"type": "boolean"},
+        "component_index": {"type": ["integer", "null"]},
+        "component_text": {"type": ["string", "null"]},
+        "reasoning": {"type": "string"}
+    },
+    "required": ["matched", "component_index", "reasoning"]
+}
 
 async def semantic_match_component(user_input: str, solution_components: List[str], solution_context: List[str], solved_components: List[int]) -> Dict[str, Any]:
     """
@@ -2740,16 +3307,8 @@ Determine if the user's input matches the KEY INSIGHT of ANY unsolved component.
 If no match is found, set matched to false and component_index to null."""
 
     try:
-        ai_result = await get_claude_response(semantic_prompt, temperature=0.2)
-        response_text = ai_result['responseText'].strip()
-        
-        # Clean up JSON formatting
-        if response_text.startswith('```json'):
-            response_text = response_text.replace('```json', '').replace('```', '').strip()
-        elif response_text.startswith('```'):
-            response_text = response_text.replace('```', '').strip()
-        
-        result = json.loads(response_text)
+        ai_result = await get_claude_response(semantic_prompt, profile="solution_check", output_schema=COMPONENT_MATCH_SCHEMA, call_site="semantic_match_component")
+        result = ai_result["data"]
         
         return {
             "success": True,
@@ -2795,7 +3354,7 @@ If no match is found, set matched to false and component_index to null."""
             "reasoning": f"Error: {str(e)}"
         }
 
-async def verify_solution(user_input: str, riddle_solution: str, solution_components: List[str], solved_components: List[int]) -> Dict[str, Any]:
+async def verify_solution(user_input: str, riddle_solution: str, solution_components: List[str], solved_components: List[int], riddle_id: Optional[str] = None) -> Dict[str, Any]:
     """
     Stage 3: Verification AI - Verifies if the user has correctly identified the complete solution
     
@@ -2804,10 +3363,17 @@ async def verify_solution(user_input: str, riddle_solution: str, solution_compon
         riddle_solution: The correct complete answer
         solution_components: List of all solution components
         solved_components: List of indices of solved components
+        riddle_id: Optional riddle ID for the answer cache. Only pass this when the
+            verdict depends on the solution alone (no component progress).
         
     Returns:
         Dict with 'is_correct', 'all_components_solved', and 'reasoning'
     """
+    if riddle_id:
+        cached = await get_cached_answer(riddle_id, "verification", user_input)
+        if cached:
+            return cached
+
     all_solved = len(solved_components) == len(solution_components)
     
     # Build list of unsolved components for the prompt
@@ -2859,24 +3425,21 @@ async def verify_solution(user_input: str, riddle_solution: str, solution_compon
 }}"""
 
     try:
-        ai_result = await get_claude_response(verification_prompt, temperature=0.1)
-        response_text = ai_result['responseText'].strip()
-        
-        # Clean up JSON formatting
-        if response_text.startswith('```json'):
-            response_text = response_text.replace('```json', '').replace('```', '').strip()
-        elif response_text.startswith('```'):
-            response_text = response_text.replace('```', '').strip()
-        
-        result = json.loads(response_text)
+        ai_result = await get_claude_response(verification_prompt, profile="verification", output_schema=SOLUTION_EVALUATION_SCHEMA, call_site="verify_solution")
+        result = ai_result["data"]
         
-        return {
+        verdict = {
             "success": True,
             "is_correct": result.get("is_correct", False),
             "all_components_solved": all_solved,
             "reasoning": result.get("reasoning", "Verification completed")
         }
         
+        if riddle_id:
+            await store_answer(riddle_id, "verification", user_input, verdict)
+        
+        return verdict
+        
     except json.JSONDecodeError as e:
         print(f"Solution verification JSON error: {e}")
         # Fallback: simple string matching
@@ -2903,6 +3466,60 @@ async def verify_solution(user_input: str, riddle_solution: str, solution_compon
             "all_components_solved": all_solved,
             "reasoning": f"Error: {str(e)}"
         }
+
+PUZZLE_ANALYSIS_INSTRUCTIONS = """You are an intelligent puzzle game assistant analyzing a user's submission for a lateral thinking puzzle. The puzzle context and the user's submission follow these instructions.
+
+**YOUR TASK:**
+Analyze the user's submission holistically and provide an intelligent, context-aware response. Consider:
+
+1. **Component Discovery:** Does the submission reveal a key insight matching an unsolved component?
+2. **Correctness:** Is the submission a correct statement/question about the puzzle?
+3. **Complete Solution:** Does the submission provide the full, correct explanation?
+
+**RESPONSE GUIDELINES:**
+
+**If the submission matches an UNSOLVED COMPONENT:**
+- Return type: "component_discovered"
+- Respond with "Yes"
+
+**If the submission is the COMPLETE CORRECT SOLUTION:**
+- Return type: "solution_correct"
+- Respond with "Correct"
+
+**If the submission is a CORRECT statement/question (but not complete solution):**
+- Return type: "statement_correct"
+- Respond with "Yes"
+
+**If the submission is INCORRECT:**
+- Return type: "statement_incorrect"
+- Respond with "No" for questions, "Incorrect" for statements
+
+**CRITICAL RULES:**
+- Questions (ending with "?") are NEVER complete solutions, even if correct
+- Do NOT provide any conversational feedback or hints.
+- Your response message must be one of the following: "Yes", "No", "Correct", "Incorrect".
+
+**Return ONLY valid JSON in this exact format:**
+{
+  "response_type": "component_discovered" | "solution_correct" | "statement_correct" | "statement_incorrect",
+  "message": "Yes" | "No" | "Correct" | "Incorrect",
+  "component_index": null or number (only for component_discovered),
+  "component_text": null or "text" (only for component_discovered),
+  "reasoning": "Brief explanation of your analysis"
+}"""
+
+PUZZLE_ANALYSIS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "response_type": {"type": "string", "enum": ["component_discovered", "solution_correct", "statement_correct", "statement_incorrect"]},
+        "message": {"type": "string", "enum": ["Yes", "No", "Correct", "Incorrect"]},
+        "component_index": {"type": ["integer", "null"]},
+        "component_text": {"type": ["string", "null"]},
+        "reasoning": {"type": "string"}
+    },
+    "required": ["response_type", "message", "reasoning"]
+}
+
 async def analyze_puzzle_submission(
     user_input: str,
     puzzle_solution: str,
@@ -2928,7 +3545,6 @@ async def analyze_puzzle_submission(
     Returns:
         Dict with response type, message, and any discovered components
     """
-    
     # Build conversation history context if available
     history_text = ""
     if conversation_history and len(conversation_history) > 0:
@@ -2954,9 +3570,7 @@ async def analyze_puzzle_submission(
     # Build solved components summary
     solved_text = f"{len(solved_components)}/{len(solution_components)} components discovered"
     
-    analysis_prompt = f"""You are an intelligent puzzle game assistant analyzing a user's submission for a lateral thinking puzzle.
-
-**PUZZLE CONTEXT:**
+    analysis_prompt = f"""**PUZZLE CONTEXT:**
 - **Complete Solution:** "{puzzle_solution}"
 - **Solution Keywords:** {', '.join(solution_context)}
 - **Progress:** {solved_text}
@@ -2969,56 +3583,11 @@ async def analyze_puzzle_submission(
 **CONVERSATION HISTORY:**
 {history_text if history_text else "No previous conversation."}
 
-**YOUR TASK:**
-Analyze the user's submission holistically and provide an intelligent, context-aware response. Consider:
-
-1. **Component Discovery:** Does the submission reveal a key insight matching an unsolved component?
-2. **Correctness:** Is the submission a correct statement/question about the puzzle?
-3. **Complete Solution:** Does the submission provide the full, correct explanation?
-
-**RESPONSE GUIDELINES:**
-
-**If the submission matches an UNSOLVED COMPONENT:**
-- Return type: "component_discovered"
-- Respond with "Yes"
-
-**If the submission is the COMPLETE CORRECT SOLUTION:**
-- Return type: "solution_correct"
-- Respond with "Correct"
-
-**If the submission is a CORRECT statement/question (but not complete solution):**
-- Return type: "statement_correct"
-- Respond with "Yes"
-
-**If the submission is INCORRECT:**
-- Return type: "statement_incorrect"
-- Respond with "No" for questions, "Incorrect" for statements
-
-**CRITICAL RULES:**
-- Questions (ending with "?") are NEVER complete solutions, even if correct
-- Do NOT provide any conversational feedback or hints.
-- Your response message must be one of the following: "Yes", "No", "Correct", "Incorrect".
-
-**Return ONLY valid JSON in this exact format:**
-{{
-  "response_type": "component_discovered" | "solution_correct" | "statement_correct" | "statement_incorrect",
-  "message": "Yes" | "No" | "Correct" | "Incorrect",
-  "component_index": null or number (only for component_discovered),
-  "component_text": null or "text" (only for component_discovered),
-  "reasoning": "Brief explanation of your analysis"
-}}"""
+Analyze this submission using the guidelines above and return ONLY the JSON object."""
 
     try:
-        ai_result = await get_claude_response(analysis_prompt, temperature=0.3)
-        response_text = ai_result['responseText'].strip()
-        
-        # Clean up JSON formatting
-        if response_text.startswith('```json'):
-            response_text = response_text.replace('```json', '').replace('```', '').strip()
-        elif response_text.startswith('```'):
-            response_text = response_text.replace('```', '').strip()
-        
-        result = json.loads(response_text)
+        ai_result = await get_claude_response(analysis_prompt, profile="puzzle_analysis", prompt_prefix=PUZZLE_ANALYSIS_INSTRUCTIONS, output_schema=PUZZLE_ANALYSIS_SCHEMA, call_site="analyze_puzzle_submission")
+        result = ai_result["data"]
         
         return {
             "success": True,
@@ -3031,7 +3600,7 @@ Analyze the user's submission holistically and provide an intelligent, context-a
         
     except json.JSONDecodeError as e:
         print(f"JSON parsing failed for puzzle submission analysis: {e}")
-        print(f"Response text: {response_text if 'response_text' in locals() else 'No response'}")
+        print(f"Response text: {e.doc or 'No response'}")
         
         # Fallback: Use the old multi-step approach
         print("Falling back to multi-step analysis")
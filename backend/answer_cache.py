@@ -0,0 +1,122 @@
+"""
+Riddle Answer Cache
+Caches AI verdicts per (riddle id, normalized question) so repeat questions
+about the same daily riddle are answered without another LLM call.
+
+Two tiers:
+1. In-process LRU (per worker, microsecond lookups)
+2. Mongo `riddle_answers` collection (shared across workers and restarts)
+"""
+import os
+import re
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional, Dict, Any, Tuple
+
+# Import database functions - hybrid import for local/production compatibility
+try:
+    from backend.database import get_database
+except ImportError:
+    from database import get_database
+
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "5000"))
+
+class AnswerCache:
+    entries: "OrderedDict[Tuple[str, str, str], Dict[str, Any]]" = OrderedDict()
+    hits: int = 0
+    shared_hits: int = 0
+    misses: int = 0
+
+# Global answer cache instance
+answer_cache = AnswerCache()
+
+def normalize_question(question: str) -> str:
+    """Normalize a question so trivial variations share a cache key"""
+    text = question.lower().strip()
+    text = re.sub(r"[^\w\s']", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+def _remember(key: Tuple[str, str, str], value: Dict[str, Any]):
+    answer_cache.entries[key] = value
+    answer_cache.entries.move_to_end(key)
+    while len(answer_cache.entries) > ANSWER_CACHE_MAX_ENTRIES:
+        answer_cache.entries.popitem(last=False)
+
+async def get_cached_answer(riddle_id: str, kind: str, question: str) -> Optional[Dict[str, Any]]:
+    """
+    Look up a cached verdict.
+
+    Args:
+        riddle_id: ID of the riddle the question is about
+        kind: Verdict type (e.g. "question" or "verification")
+        question: The user's raw question text
+
+    Returns:
+        The cached verdict dict, or None on a miss
+    """
+    key = (str(riddle_id), kind, normalize_question(question))
+
+    cached = answer_cache.entries.get(key)
+    if cached is not None:
+        answer_cache.entries.move_to_end(key)
+        answer_cache.hits += 1
+        return cached
+
+    try:
+        db = get_database()
+        doc = await db.riddle_answers.find_one(
+            {"riddle_id": key[0], "kind": kind, "question_key": key[2]},
+            {"verdict": 1}
+        )
+    except Exception as e:
+        print(f"Answer cache lookup failed: {e}")
+        doc = None
+
+    if doc and doc.get("verdict") is not None:
+        _remember(key, doc["verdict"])
+        answer_cache.shared_hits += 1
+        return doc["verdict"]
+
+    answer_cache.misses += 1
+    return None
+
+async def store_answer(riddle_id: str, kind: str, question: str, verdict: Dict[str, Any]):
+    """Store a verdict in both cache tiers"""
+    key = (str(riddle_id), kind, normalize_question(question))
+    _remember(key, verdict)
+
+    try:
+        db = get_database()
+        await db.riddle_answers.update_one(
+            {"riddle_id": key[0], "kind": kind, "question_key": key[2]},
+            {"$set": {"verdict": verdict, "created_at": datetime.utcnow()}},
+            upsert=True
+        )
+    except Exception as e:
+        print(f"Answer cache store failed: {e}")
+
+async def invalidate_riddle_answers(riddle_id: str):
+    """Drop every cached verdict for a riddle (e.g. when it is overwritten)"""
+    riddle_id = str(riddle_id)
+    stale_keys = [key for key in answer_cache.entries if key[0] == riddle_id]
+    for key in stale_keys:
+        del answer_cache.entries[key]
+
+    try:
+        db = get_database()
+        result = await db.riddle_answers.delete_many({"riddle_id": riddle_id})
+        print(f"Invalidated answer cache for riddle {riddle_id} ({len(stale_keys)} local, {result.deleted_count} shared)")
+    except Exception as e:
+        print(f"Answer cache invalidation failed: {e}")
+
+def get_answer_cache_stats() -> Dict[str, Any]:
+    """Get hit/miss statistics for the answer cache"""
+    lookups = answer_cache.hits + answer_cache.shared_hits + answer_cache.misses
+    return {
+        "entries": len(answer_cache.entries),
+        "maxEntries": ANSWER_CACHE_MAX_ENTRIES,
+        "hits": answer_cache.hits,
+        "sharedHits": answer_cache.shared_hits,
+        "misses": answer_cache.misses,
+        "hitRate": (answer_cache.hits + answer_cache.shared_hits) / lookups if lookups else 0.0
+    }
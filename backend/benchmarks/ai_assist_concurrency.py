@@ -0,0 +1,73 @@
+"""
+Benchmark: concurrent /api/ai/assist requests.
+
+Fires N simultaneous assist requests through the ASGI app against a simulated
+upstream with fixed latency. With a non-blocking LLM client the requests
+overlap, so wall time stays close to a single upstream latency instead of
+N x latency.
+
+Requires MONGODB_URI (rate limiting and interaction logging hit Mongo).
+Run from the backend directory:
+    python -m benchmarks.ai_assist_concurrency --requests 20 --latency 0.5
+"""
+import argparse
+import asyncio
+import time
+import uuid
+import httpx
+
+try:
+    from backend.main import app
+    from backend.database import connect_to_mongo, close_mongo_connection, get_database
+    from backend.llm_client import init_llm_client, close_llm_client, get_llm_client_stats
+    from backend.benchmarks.fake_upstream import FakeAnthropicUpstream
+except ImportError:
+    from main import app
+    from database import connect_to_mongo, close_mongo_connection, get_database
+    from llm_client import init_llm_client, close_llm_client, get_llm_client_stats
+    from benchmarks.fake_upstream import FakeAnthropicUpstream
+
+async def run(num_requests: int, latency: float):
+    upstream = FakeAnthropicUpstream(latency=latency)
+    init_llm_client(transport=upstream.transport())
+    await connect_to_mongo()
+
+    run_id = uuid.uuid4().hex[:8]
+    session_ids = [f"bench-{run_id}-{i}" for i in range(num_requests)]
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def one(session_id: str) -> float:
+            start = time.perf_counter()
+            response = await client.post("/api/ai/assist", json={
+                "sessionId": session_id,
+                "stage": "problem_articulation_direct",
+                "userInput": "I keep missing deadlines at work because I start too late",
+                "sessionContext": {"painPoint": "I keep missing deadlines at work"}
+            })
+            response.raise_for_status()
+            return time.perf_counter() - start
+
+        wall_start = time.perf_counter()
+        latencies = await asyncio.gather(*[one(s) for s in session_ids])
+        wall_time = time.perf_counter() - wall_start
+
+    stats = get_llm_client_stats()
+    print(f"\n=== /api/ai/assist concurrency ({num_requests} requests, upstream latency {latency:.2f}s) ===")
+    print(f"  Wall time:             {wall_time:.2f}s")
+    print(f"  Serial lower bound:    {num_requests * latency:.2f}s")
+    print(f"  Mean request latency:  {sum(latencies) / len(latencies):.2f}s")
+    print(f"  Max request latency:   {max(latencies):.2f}s")
+    print(f"  Peak in-flight calls:  {stats['peakInFlight']} (concurrency cap {stats['maxConcurrency']})")
+    print(f"  Overlap factor:        {(num_requests * latency) / wall_time:.1f}x")
+
+    # Remove the interactions this run logged
+    await get_database().ai_interactions.delete_many({"session_id": {"$in": session_ids}})
+    await close_llm_client()
+    await close_mongo_connection()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.5)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.latency))
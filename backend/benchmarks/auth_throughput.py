@@ -0,0 +1,93 @@
+"""
+Benchmark: identity resolution throughput.
+
+Measures requests per second on /api/auth/status and /api/v1/riddles/daily/status
+through the ASGI app, authenticated two ways:
+- legacy: token with only the email claim, user cache disabled, so every
+  request looks the user up by email (the previous behaviour)
+- cached: token with the uid claim and the user cache enabled, so identity
+  needs no database read after the first request
+
+Requires MONGODB_URI. Uses (and drops) a scratch database, never `nuudle`.
+Run from the backend directory:
+    python -m benchmarks.auth_throughput --requests 2000 --concurrency 20
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime, timedelta
+import httpx
+import pytz
+
+try:
+    import backend.database as database
+    import backend.user_cache as user_cache
+    from backend.main import app, create_access_token
+    from backend.database import connect_to_mongo, close_mongo_connection
+except ImportError:
+    import database
+    import user_cache
+    from main import app, create_access_token
+    from database import connect_to_mongo, close_mongo_connection
+
+ENDPOINTS = ["/api/auth/status", "/api/v1/riddles/daily/status"]
+
+async def measure(client: httpx.AsyncClient, path: str, token: str, num_requests: int, concurrency: int) -> float:
+    """Returns requests per second"""
+    remaining = iter(range(num_requests))
+
+    async def worker():
+        for _ in remaining:
+            response = await client.get(path, cookies={"access_token": token})
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return num_requests / (time.perf_counter() - start)
+
+async def run(num_requests: int, concurrency: int):
+    await connect_to_mongo()
+    scratch = f"nuudle_bench_{uuid.uuid4().hex[:8]}"
+    db = database.db.client[scratch]
+    database.db.database = db
+    try:
+        email = f"bench-{uuid.uuid4().hex[:8]}@bench.test"
+        result = await db.users.insert_one({"email": email, "hashed_password": "x", "created_at": datetime.utcnow()})
+        await db.users.create_index("email", unique=True)
+        today = datetime.now(pytz.timezone("America/Los_Angeles")).strftime("%Y-%m-%d")
+        await db.riddles.insert_one({"riddle_text": "bench", "solution": "bench", "date": today})
+        await db.riddles.create_index("date", unique=True)
+
+        expires = timedelta(minutes=30)
+        tokens = {
+            "legacy": create_access_token({"sub": email}, expires),
+            "cached": create_access_token({"sub": email, "uid": str(result.inserted_id)}, expires),
+        }
+
+        results = {}
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            for mode, token in tokens.items():
+                user_cache.USER_CACHE_TTL = 300 if mode == "cached" else 0
+                user_cache.user_cache.entries.clear()
+                for path in ENDPOINTS:
+                    # Warm up (and fill the cache) before timing
+                    await measure(client, path, token, concurrency, concurrency)
+                    results[(mode, path)] = await measure(client, path, token, num_requests, concurrency)
+    finally:
+        await database.db.client.drop_database(scratch)
+        await close_mongo_connection()
+
+    print(f"\n=== Identity resolution ({num_requests} requests, concurrency {concurrency}) ===")
+    print(f"  {'endpoint':<26}{'legacy rps':>12}{'cached rps':>12}{'speedup':>10}")
+    for path in ENDPOINTS:
+        legacy, cached = results[("legacy", path)], results[("cached", path)]
+        print(f"  {path:<26}{legacy:>12.0f}{cached:>12.0f}{cached / legacy:>9.2f}x")
+    print(f"  User cache: {user_cache.get_user_cache_stats()}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.concurrency))
@@ -0,0 +1,32 @@
+"""
+Simulated Anthropic upstream for benchmarks.
+Answers Messages API requests after a fixed delay so benchmarks measure our
+own overhead and concurrency rather than real model latency.
+"""
+import asyncio
+import json
+import httpx
+
+class FakeAnthropicUpstream:
+    def __init__(self, latency: float = 0.5, response_text: str = "- What happens right before this?"):
+        self.latency = latency
+        self.response_text = response_text
+        self.requests = 0
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        body = json.loads(request.content or b"{}")
+        await asyncio.sleep(self.latency)
+        return httpx.Response(200, json={
+            "id": f"msg_bench_{self.requests}",
+            "type": "message",
+            "role": "assistant",
+            "model": body.get("model", "claude-sonnet-4-5"),
+            "content": [{"type": "text", "text": self.response_text}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": {"input_tokens": 400, "output_tokens": 40}
+        })
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
@@ -0,0 +1,133 @@
+"""
+Benchmark: query plans for the hot Mongo queries.
+
+Seeds a scratch database, runs explain (executionStats) on each hot query
+before and after ensure_indexes, and prints the winning plan's stages with
+keys/documents examined. Exits non-zero if any query still collection-scans
+once the declared indexes exist, so it doubles as an index coverage check.
+
+Requires MONGODB_URI. Uses (and drops) a scratch database, never `nuudle`.
+Run from the backend directory:
+    python -m benchmarks.index_plans --documents 20000
+"""
+import argparse
+import asyncio
+import sys
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Set
+
+try:
+    import backend.database as database
+    from backend.database import connect_to_mongo, close_mongo_connection
+    from backend.indexes import ensure_indexes
+except ImportError:
+    import database
+    from database import connect_to_mongo, close_mongo_connection
+    from indexes import ensure_indexes
+
+USER_ID = "bench-user-7"
+TODAY = "2026-03-14"
+
+# (label, explain command) for each hot query, as issued by main.py, the generators and rate_limits.py
+HOT_QUERIES = [
+    ("users by email", {"find": "users", "filter": {"email": "user7@bench.test"}, "limit": 1}),
+    ("session history", {"find": "sessions", "filter": {"user_id": USER_ID}, "sort": {"created_at": -1}}),
+    ("solved riddle session", {"find": "sessions", "filter": {"session_type": "daily-riddle", "user_id": USER_ID, "riddle_id": "riddle-14", "solved": True}, "limit": 1}),
+    ("solved puzzle session", {"find": "sessions", "filter": {"session_type": "daily-puzzle", "user_id": USER_ID, "puzzle_id": "puzzle-14", "solved": True}, "limit": 1}),
+    ("riddle by date", {"find": "riddles", "filter": {"date": TODAY}, "limit": 1}),
+    ("puzzle by date", {"find": "puzzles", "filter": {"date": TODAY}, "limit": 1}),
+    ("rate-limit rebuild", {"aggregate": "ai_interactions", "pipeline": [
+        {"$match": {"session_id": "bench-session-7"}},
+        {"$group": {"_id": "$stage", "count": {"$sum": 1}}}
+    ], "cursor": {}}),
+]
+
+async def seed(db, documents: int):
+    users = max(documents // 20, 1)
+    start = datetime(2025, 1, 1)
+    await db.users.insert_many([{"email": f"user{i}@bench.test", "password": "x"} for i in range(users)])
+    await db.sessions.insert_many([
+        {
+            "user_id": f"bench-user-{i % users}",
+            "session_type": "daily-riddle" if i % 2 else "daily-puzzle",
+            "riddle_id": f"riddle-{i % 365}",
+            "puzzle_id": f"puzzle-{i % 365}",
+            "solved": i % 3 == 0,
+            "created_at": start + timedelta(minutes=i)
+        }
+        for i in range(documents)
+    ])
+    dates = [(start + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(min(documents, 3650))]
+    await db.riddles.insert_many([{"date": date, "riddle_text": "bench"} for date in dates])
+    await db.puzzles.insert_many([{"date": date, "puzzle_text": "bench"} for date in dates])
+    await db.ai_interactions.insert_many([
+        {"session_id": f"bench-session-{i % users}", "stage": f"stage-{i % 4}", "user_id": f"bench-user-{i % users}"}
+        for i in range(documents)
+    ])
+
+def _find_all(node: Any, key: str, found: List[Any]) -> List[Any]:
+    """Every value stored under key anywhere in an explain document"""
+    if isinstance(node, dict):
+        for k, v in node.items():
+            if k == key:
+                found.append(v)
+            _find_all(v, key, found)
+    elif isinstance(node, list):
+        for item in node:
+            _find_all(item, key, found)
+    return found
+
+def summarize(explain: Dict[str, Any]) -> Dict[str, Any]:
+    winning = _find_all(explain, "winningPlan", [])
+    stages: Set[str] = set(_find_all(winning, "stage", []))
+    stats = (_find_all(explain, "executionStats", []) or [{}])[0]
+    return {
+        "stages": stages,
+        "keys": stats.get("totalKeysExamined", 0),
+        "docs": stats.get("totalDocsExamined", 0),
+        "returned": stats.get("nReturned", 0),
+        "ms": stats.get("executionTimeMillis", 0)
+    }
+
+async def explain_all(db) -> Dict[str, Dict[str, Any]]:
+    return {
+        label: summarize(await db.command("explain", command, verbosity="executionStats"))
+        for label, command in HOT_QUERIES
+    }
+
+def print_plans(title: str, plans: Dict[str, Dict[str, Any]]):
+    print(f"\n=== {title} ===")
+    print(f"  {'query':<24}{'plan':<28}{'keys':>8}{'docs':>8}{'returned':>10}{'ms':>6}")
+    for label, plan in plans.items():
+        stages = "+".join(sorted(plan["stages"])) or "?"
+        print(f"  {label:<24}{stages[:27]:<28}{plan['keys']:>8}{plan['docs']:>8}{plan['returned']:>10}{plan['ms']:>6}")
+
+async def run(documents: int) -> bool:
+    await connect_to_mongo()
+    scratch = f"nuudle_bench_{uuid.uuid4().hex[:8]}"
+    db = database.db.client[scratch]
+    # ensure_indexes works on get_database(), so point it at the scratch database
+    database.db.database = db
+    try:
+        await seed(db, documents)
+        print_plans(f"Without indexes ({documents} sessions)", await explain_all(db))
+        await ensure_indexes(build=True)
+        plans = await explain_all(db)
+        print_plans("With declared indexes", plans)
+    finally:
+        await database.db.client.drop_database(scratch)
+        await close_mongo_connection()
+
+    scans = [label for label, plan in plans.items() if "COLLSCAN" in plan["stages"]]
+    if scans:
+        print(f"\n  Still collection-scanning: {', '.join(scans)}")
+        return False
+    print("\n  Every hot query uses an index")
+    return True
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=20000)
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(run(args.documents)) else 1)
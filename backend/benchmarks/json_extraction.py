@@ -0,0 +1,137 @@
+"""
+Benchmark: JSON extraction from model responses.
+
+Parses a corpus of malformed model outputs (fences, surrounding prose, raw
+newlines in strings, braces inside strings, truncated responses) with the
+shared extractor and with the character-loop clean_json_response the riddle
+and puzzle generators used to carry. Reports how many outputs each one
+recovers and the mean time per parse.
+
+No network or database needed. Run from the backend directory:
+    python -m benchmarks.json_extraction --iterations 2000
+"""
+import argparse
+import json
+import time
+from typing import Any, Callable, List, Tuple
+
+try:
+    from backend.json_extract import extract_json, parse_partial_json
+except ImportError:
+    from json_extract import extract_json, parse_partial_json
+
+CONCEPT = {
+    "theme": "A natural phenomenon that follows you but isn't alive",
+    "difficulty": "Medium",
+    "answer": "shadow",
+    "properties": ["mimics your movements but has no will", "is born from light but flees from it", "has no weight but can be seen"],
+    "logical_explanation": "A shadow's paradoxical relationship with light and its mimicry of movement create interesting metaphorical opportunities"
+}
+
+BATCH = {"answers": [{"id": i, "answer": "Yes" if i % 2 else "No", "reasoning": f"Question {i} refers to the solution directly."} for i in range(1, 16)]}
+
+# (name, model output) pairs modelled on responses seen from the generation and judge prompts
+CORPUS: List[Tuple[str, str]] = [
+    ("bare", json.dumps(CONCEPT)),
+    ("json fence", "```json\n" + json.dumps(CONCEPT, indent=2) + "\n```"),
+    ("plain fence", "```\n" + json.dumps({"is_correct": True, "reasoning": "The user named the needle directly."}) + "\n```"),
+    ("leading prose", "Here is the concept you asked for:\n\n" + json.dumps(CONCEPT, indent=2)),
+    ("trailing prose", json.dumps({"answer": "No", "reasoning": "They are cards, not real bicycles."}) + "\n\nLet me know if you need another riddle!"),
+    ("raw newlines in strings", '{\n  "riddle_text": "I follow you by day,\n mimic your every move,\n yet I have no will of my own.\n What am I?",\n  "solution": "A shadow.\tIt follows you and mimics your movements."\n}'),
+    ("braces inside strings", '{"reasoning": "The user wrote {ice} and [water] - only one matches", "matched": false, "component_index": null, "component_text": null}'),
+    ("escaped quotes", '{"reasoning": "They asked \\"is it a needle?\\" which names the answer", "is_correct": true}'),
+    ("fence and prose", "Sure! Here's my classification:\n```json\n{\"classification\": \"QUESTION\", \"confidence\": 0.92, \"reasoning\": \"Ends with a question mark\"}\n```\nHope this helps."),
+    ("bracket in prose", 'Note [see below]: {"answer": "No", "reasoning": "The solution never mentions water"}'),
+    ("large batch", "```json\n" + json.dumps(BATCH, indent=2) + "\n```"),
+    ("truncated batch", json.dumps(BATCH, indent=2)[:-180]),
+]
+
+def legacy_clean_json_response(response_text: str) -> str:
+    """The clean_json_response previously duplicated in riddle_generator.py and puzzle_generator.py"""
+    if response_text.startswith('```json'):
+        response_text = response_text.replace('```json', '').replace('```', '').strip()
+    elif response_text.startswith('```'):
+        response_text = response_text.replace('```', '').strip()
+
+    try:
+        json.loads(response_text)
+        return response_text
+    except json.JSONDecodeError:
+        pass
+
+    first_brace = response_text.find('{')
+    last_brace = response_text.rfind('}')
+    if first_brace != -1 and last_brace != -1 and last_brace > first_brace:
+        json_str = response_text[first_brace:last_brace + 1]
+    else:
+        json_str = response_text
+
+    cleaned_chars = []
+    in_string = False
+    prev_char = ''
+    for char in json_str:
+        if char == '"' and prev_char != '\\':
+            in_string = not in_string
+            cleaned_chars.append(char)
+            prev_char = char
+            continue
+        if in_string:
+            char_code = ord(char)
+            if char_code < 32 or char_code == 127:
+                if char == '\r':
+                    continue
+                cleaned_chars.append(' ')
+            else:
+                cleaned_chars.append(char)
+        else:
+            cleaned_chars.append(' ' if char in ['\n', '\r', '\t'] else char)
+        prev_char = char
+
+    cleaned = ''.join(cleaned_chars)
+    try:
+        json.loads(cleaned)
+    except json.JSONDecodeError:
+        pass
+    return cleaned
+
+def legacy_parse(text: str) -> Any:
+    return json.loads(legacy_clean_json_response(text.strip()))
+
+def measure(parse: Callable[[str], Any], text: str, iterations: int) -> Tuple[bool, float]:
+    """Returns (recovered, mean microseconds per parse)"""
+    try:
+        recovered = parse(text) is not None
+    except (json.JSONDecodeError, ValueError):
+        recovered = False
+    start = time.perf_counter()
+    for _ in range(iterations):
+        try:
+            parse(text)
+        except (json.JSONDecodeError, ValueError):
+            pass
+    return recovered, (time.perf_counter() - start) / iterations * 1e6
+
+def run(iterations: int):
+    parsers = [("legacy", legacy_parse), ("extract_json", extract_json), ("partial", parse_partial_json)]
+    totals = {name: [0, 0.0] for name, _ in parsers}
+
+    print(f"\n=== JSON extraction ({len(CORPUS)} outputs, {iterations} iterations each) ===")
+    print(f"  {'output':<26}{'chars':>7}" + "".join(f"{name:>20}" for name, _ in parsers))
+    for label, text in CORPUS:
+        row = f"  {label:<26}{len(text):>7}"
+        for name, parse in parsers:
+            recovered, micros = measure(parse, text, iterations)
+            totals[name][0] += recovered
+            totals[name][1] += micros
+            row += f"{(f'{micros:.1f}us' if recovered else 'FAIL'):>20}"
+        print(row)
+
+    print()
+    for name, (recovered, micros) in totals.items():
+        print(f"  {name:<14} recovered {recovered}/{len(CORPUS)}, mean {micros / len(CORPUS):.1f}us per parse")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+    run(args.iterations)
@@ -0,0 +1,102 @@
+"""
+Benchmark: full-document vs delta session saves.
+
+Replays a problem-solver session that autosaves after every step, either by
+resending the whole session (as POST /api/sessions does) or by sending a
+PATCH /api/sessions/{id} diff. Reports per-save request payload (JSON bytes)
+and write size (BSON bytes of the replacement document vs the update
+document). The write size is what goes into the oplog and over replication;
+WiredTiger still rewrites the stored document either way.
+
+No network or database needed. Run from the backend directory:
+    python -m benchmarks.session_saves --summary-chars 4000
+"""
+import argparse
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+import bson
+
+# (step, kind, field, value): kind is "set" or "push"
+FLOW: List[Tuple[str, str, str, Any]] = [
+    ("pain point", "set", "pain_point", "I keep putting off the quarterly report until the night before it is due"),
+    ("causes", "set", "causes", ["I don't know where to start", "The data arrives late", "I find the format tedious"]),
+    ("assumption 1", "push", "assumptions", ["The report has to be perfect"]),
+    ("assumption 2", "push", "assumptions", ["Nobody reads it carefully anyway"]),
+    ("assumption 3", "push", "assumptions", ["I work better under pressure"]),
+    ("perpetuation 1", "push", "perpetuations", ["I reward myself for finishing, not for starting"]),
+    ("perpetuation 2", "push", "perpetuations", ["I leave the template closed until the last day"]),
+    ("solution 1", "push", "solutions", ["Block 30 minutes on day one to outline the sections"]),
+    ("solution 2", "push", "solutions", ["Ask the data team for a preliminary extract"]),
+    ("solution 3", "push", "solutions", ["Reuse last quarter's narrative as a draft"]),
+    ("fear 1", "push", "fears", [{"name": "The outline will be wrong", "mitigation": "Share it early", "contingency": "Restructure after feedback"}]),
+    ("fear 2", "push", "fears", [{"name": "The extract will change", "mitigation": "Label figures as preliminary", "contingency": "Update the tables only"}]),
+    ("action plan", "set", "action_plan", "Block 30 minutes on day one to outline the sections; Ask the data team for a preliminary extract"),
+]
+
+def summary(chars: int) -> Dict[str, Any]:
+    return {
+        "title": "Starting the Quarterly Report Early",
+        "summary": ("You noticed that the report is delayed by the first step, not by the work itself. " * (chars // 80 + 1))[:chars],
+        "action_plan": {"steps": ["Outline on day one", "Request a preliminary extract", "Reuse last quarter's narrative"]}
+    }
+
+def full_document(state: Dict[str, Any]) -> Dict[str, Any]:
+    """The document create_session stores for a state"""
+    causes = state.get("causes") or []
+    return {
+        "created_at": datetime(2026, 1, 1),
+        "session_type": "problem-solver",
+        "pain_point": state.get("pain_point"),
+        "issue_tree": {"primary_cause": causes[0], "sub_causes": causes[1:]} if causes else None,
+        "assumptions": state.get("assumptions", []),
+        "perpetuations": state.get("perpetuations", []),
+        "solutions": state.get("solutions", []),
+        "fears": state.get("fears", []),
+        "action_plan": state.get("action_plan"),
+        "ai_summary": state.get("ai_summary"),
+        "summary_header": (state.get("ai_summary") or {}).get("title"),
+        "user_id": "6ad3f95df5f4146ccc199fd4",
+        "version": 0,
+    }
+
+def run(summary_chars: int):
+    flow = FLOW + [("ai summary", "set", "ai_summary", summary(summary_chars))]
+    state: Dict[str, Any] = {}
+    version = 0
+    rows = []
+    for step, kind, field, value in flow:
+        if kind == "set":
+            state[field] = value
+        else:
+            state[field] = state.get(field, []) + value
+
+        full_payload = len(json.dumps(state).encode())
+        full_write = len(bson.encode(full_document(state)))
+
+        patch = {kind: {field: value}, "expected_version": version}
+        update = {"$set": {"updated_at": datetime(2026, 1, 1)}, "$inc": {"version": 1}}
+        if kind == "set":
+            update["$set"][field] = value
+        else:
+            update["$push"] = {field: {"$each": value}}
+        delta_payload = len(json.dumps(patch).encode())
+        delta_write = len(bson.encode(update))
+        version += 1
+        rows.append((step, full_payload, delta_payload, full_write, delta_write))
+
+    print(f"\n=== Session autosave ({len(rows)} saves, ai_summary {summary_chars} chars) ===")
+    print(f"  {'step':<16}{'full body':>11}{'patch body':>12}{'full write':>12}{'patch write':>13}")
+    for step, full_payload, delta_payload, full_write, delta_write in rows:
+        print(f"  {step:<16}{full_payload:>11}{delta_payload:>12}{full_write:>12}{delta_write:>13}")
+
+    totals = [sum(row[i] for row in rows) for i in range(1, 5)]
+    print(f"  {'total':<16}{totals[0]:>11}{totals[1]:>12}{totals[2]:>12}{totals[3]:>13}")
+    print(f"\n  Request bytes: {totals[0] / totals[1]:.1f}x less with PATCH")
+    print(f"  Write bytes:   {totals[2] / totals[3]:.1f}x less with PATCH")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--summary-chars", type=int, default=4000)
+    args = parser.parse_args()
+    run(args.summary_chars)
@@ -0,0 +1,103 @@
+"""
+Benchmark: session creation write path under concurrent load.
+
+Starts N riddle sessions with a fixed number in flight through the ASGI app
+and reports throughput and latency percentiles for:
+- legacy: insert_one followed by find_one of the new document (the previous
+  create_unified_session), connection-default write concern
+- w=majority: POST /api/v1/sessions, one round trip
+- w=1: POST /api/v1/sessions, one round trip, primary acknowledgement only
+
+On a replica set the w=majority/w=1 gap is the replication wait; on a
+standalone server the two are the same.
+
+Requires MONGODB_URI. Uses (and drops) a scratch database, never `nuudle`.
+Run from the backend directory:
+    python -m benchmarks.session_writes --sessions 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime
+from typing import List
+import httpx
+
+try:
+    import backend.database as database
+    from backend.main import app
+    from backend.database import connect_to_mongo, close_mongo_connection
+except ImportError:
+    import database
+    from main import app
+    from database import connect_to_mongo, close_mongo_connection
+
+@app.post("/bench/legacy-session")
+async def legacy_create_session(body: dict):
+    """The insert-then-read create_unified_session, kept here for comparison"""
+    db = database.get_database()
+    session_doc = {
+        "created_at": datetime.utcnow(),
+        "session_type": body["session_type"],
+        "user_id": body["user_id"],
+        "riddle_id": body.get("riddle_id"),
+        "assumptions": [],
+        "fears": [],
+    }
+    result = await db.sessions.insert_one(session_doc)
+    created_session = await db.sessions.find_one({"_id": result.inserted_id})
+    return {"id": str(result.inserted_id), "created_at": created_session["created_at"].isoformat()}
+
+MODES = [
+    ("legacy", "/bench/legacy-session", "default"),
+    ("w=majority", "/api/v1/sessions", "majority"),
+    ("w=1", "/api/v1/sessions", "1"),
+]
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+async def measure(client: httpx.AsyncClient, path: str, num_sessions: int, concurrency: int):
+    latencies: List[float] = []
+    remaining = iter(range(num_sessions))
+
+    async def worker():
+        for i in remaining:
+            start = time.perf_counter()
+            response = await client.post(path, json={"session_type": "daily-riddle", "user_id": f"bench-{i}", "riddle_id": "bench-riddle"})
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    wall_start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return num_sessions / (time.perf_counter() - wall_start), latencies
+
+async def run(num_sessions: int, concurrency: int):
+    await connect_to_mongo()
+    scratch = f"nuudle_bench_{uuid.uuid4().hex[:8]}"
+    database.db.database = database.db.client[scratch]
+    results = []
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            for label, path, write_concern in MODES:
+                database.WRITE_CONCERNS["session_create"] = write_concern
+                # Warm up connections before timing
+                await measure(client, path, concurrency, concurrency)
+                results.append((label, *await measure(client, path, num_sessions, concurrency)))
+    finally:
+        await database.db.client.drop_database(scratch)
+        await close_mongo_connection()
+
+    print(f"\n=== Session creation ({num_sessions} sessions, {concurrency} in flight) ===")
+    print(f"  {'mode':<14}{'sessions/s':>12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for label, throughput, latencies in results:
+        print(f"  {label:<14}{throughput:>12.0f}{percentile(latencies, 0.5) * 1000:>10.1f}"
+              f"{percentile(latencies, 0.95) * 1000:>10.1f}{percentile(latencies, 0.99) * 1000:>10.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(run(args.sessions, args.concurrency))
@@ -0,0 +1,83 @@
+"""
+Circuit Breaker
+Stops sending requests to a failing upstream for a cool-down period so callers
+fail fast (and use their fallbacks) instead of each waiting for a timeout.
+
+States:
+- closed: requests flow normally; consecutive failures are counted
+- open: requests are rejected immediately until reset_timeout has passed
+- half_open: one probe request is let through; success closes the breaker,
+  failure opens it again
+"""
+import time
+from typing import Optional, Dict, Any
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose breaker is open"""
+    pass
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.probe_in_flight = False
+        self.trips = 0
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now"""
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                self.rejected += 1
+                return False
+            self.state = "half_open"
+            self.probe_in_flight = False
+
+        if self.state == "half_open":
+            if self.probe_in_flight:
+                self.rejected += 1
+                return False
+            self.probe_in_flight = True
+
+        return True
+
+    def check(self):
+        """Raise CircuitOpenError if a request may not be sent now"""
+        if not self.allow():
+            raise CircuitOpenError(f"Circuit breaker '{self.name}' is open")
+
+    def record_success(self):
+        if self.state != "closed":
+            print(f"Circuit breaker '{self.name}' closed")
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.probe_in_flight = False
+
+    def release(self):
+        """Give up a half-open probe that ended without a verdict (e.g. cancelled)"""
+        self.probe_in_flight = False
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+            if self.state != "open":
+                self.trips += 1
+                print(f"Circuit breaker '{self.name}' opened after {self.consecutive_failures} consecutive failures")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+            self.probe_in_flight = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutiveFailures": self.consecutive_failures,
+            "failureThreshold": self.failure_threshold,
+            "resetTimeout": self.reset_timeout,
+            "trips": self.trips,
+            "rejected": self.rejected,
+            "openForSeconds": time.monotonic() - self.opened_at if self.state == "open" else 0.0
+        }
@@ -0,0 +1,233 @@
+"""
+Content Resolver
+Loads the riddle or puzzle a session refers to with at most one query.
+
+Sessions store riddle_id/puzzle_id as the hex string of the content's
+ObjectId. normalize_content_id() turns that (or an ObjectId) into the stored
+_id type, so the lookup is a single _id hit instead of trying the string, then
+an ObjectId, then a date. Ids that are not ObjectIds (older UUID-keyed
+content) are looked up as strings.
+
+Today's content is served from the daily content cache, and anything else is
+memoized by id for the life of the worker: a stored riddle or puzzle never
+changes, it is only replaced by a new document (force overwrite), which
+forgets the old id through forget_content().
+
+migrate_content_ids() normalizes what is already stored so the above holds
+for old data too. It runs once per database, on one worker (locked and
+recorded in the `migrations` collection); set MONGO_AUTO_MIGRATE=false to
+skip it at startup.
+"""
+import os
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, Union, Tuple
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+# Import database functions - hybrid import for local/production compatibility
+try:
+    from backend.database import get_database
+    from backend.daily_content import get_daily_content, daily_content, CONTENT_COLLECTIONS
+except ImportError:
+    from database import get_database
+    from daily_content import get_daily_content, daily_content, CONTENT_COLLECTIONS
+
+CONTENT_CACHE_MAX_ENTRIES = int(os.getenv("CONTENT_CACHE_MAX_ENTRIES", "512"))
+MONGO_AUTO_MIGRATE = os.getenv("MONGO_AUTO_MIGRATE", "true").lower() == "true"
+
+CONTENT_ID_MIGRATION = "content_ids_v1"
+# How long a migration lock holds before another worker may take over
+MIGRATION_LOCK_SECONDS = int(os.getenv("MIGRATION_LOCK_SECONDS", "600"))
+
+class ContentResolver:
+    # (kind, normalized id) -> content document
+    entries: "OrderedDict[Tuple[str, Union[ObjectId, str]], Dict[str, Any]]" = OrderedDict()
+    daily_hits: int = 0
+    hits: int = 0
+    queries: int = 0
+    not_found: int = 0
+    migration: Optional[Dict[str, Any]] = None
+
+# Global content resolver
+content_resolver = ContentResolver()
+
+def normalize_content_id(content_id: Any) -> Optional[Union[ObjectId, str]]:
+    """The stored _id for a riddle_id/puzzle_id value (ObjectId when it is one)"""
+    if content_id is None or isinstance(content_id, ObjectId):
+        return content_id
+    content_id = str(content_id).strip()
+    if not content_id:
+        return None
+    return ObjectId(content_id) if ObjectId.is_valid(content_id) else content_id
+
+async def resolve_content(kind: str, content_id: Any) -> Optional[Dict[str, Any]]:
+    """
+    Get the riddle or puzzle with an id.
+
+    Args:
+        kind: "riddle" or "puzzle"
+        content_id: The session's riddle_id/puzzle_id (string or ObjectId)
+
+    Returns:
+        The document, or None if there is no content with that id.
+        Cached documents are shared and must not be mutated.
+    """
+    key = normalize_content_id(content_id)
+    if key is None:
+        return None
+
+    today = daily_content.entries.get(kind)
+    if today is not None and today["_id"] == key:
+        content_resolver.daily_hits += 1
+        return today
+
+    cached = content_resolver.entries.get((kind, key))
+    if cached is not None:
+        content_resolver.entries.move_to_end((kind, key))
+        content_resolver.hits += 1
+        return cached
+
+    db = get_database()
+    content_resolver.queries += 1
+    doc = await db[CONTENT_COLLECTIONS[kind]].find_one({"_id": key})
+    if doc is None:
+        content_resolver.not_found += 1
+        return None
+    content_resolver.entries[(kind, key)] = doc
+    while len(content_resolver.entries) > CONTENT_CACHE_MAX_ENTRIES:
+        content_resolver.entries.popitem(last=False)
+    return doc
+
+async def resolve_session_content(kind: str, session: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Get the riddle or puzzle a session was started on.
+
+    Sessions without a (resolvable) id fall back to today's content, by
+    Pacific date like the daily endpoints.
+    """
+    doc = await resolve_content(kind, session.get(f"{kind}_id"))
+    if doc is None:
+        print(f"Session {session.get('_id')} has no resolvable {kind}_id, using today's {kind}")
+        doc = await get_daily_content(kind)
+    return doc
+
+def forget_content(kind: str, content_id: Any):
+    """Drop replaced or deleted content from this worker's memo"""
+    content_resolver.entries.pop((kind, normalize_content_id(content_id)), None)
+
+async def _acquire_migration_lock(db, name: str) -> Optional[Dict[str, Any]]:
+    """
+    Claim a migration for this worker.
+
+    Returns:
+        None if this worker holds the lock now, else the migration's record
+        (completed, or being run by another worker)
+    """
+    now = datetime.utcnow()
+    try:
+        await db.migrations.find_one_and_update(
+            {
+                "_id": name,
+                "completed_at": {"$exists": False},
+                "$or": [{"locked_until": {"$exists": False}}, {"locked_until": {"$lt": now}}]
+            },
+            {"$set": {"locked_until": now + timedelta(seconds=MIGRATION_LOCK_SECONDS), "started_at": now}},
+            upsert=True
+        )
+        return None
+    except DuplicateKeyError:
+        # The record exists and did not match: completed, or locked by another worker
+        return await db.migrations.find_one({"_id": name}) or {}
+
+async def _rekey(collection, doc: Dict[str, Any]) -> bool:
+    """
+    Move a document stored under a hex-string _id to the ObjectId _id.
+
+    The original is never deleted before its copy exists: it first moves to a
+    placeholder date (freeing the unique date for the copy, and keeping the
+    real date on the document so an interrupted run can resume), then the
+    copy is inserted, then the original is deleted.
+    """
+    old_id = doc["_id"]
+    new_id = ObjectId(old_id)
+    date = doc.get("migrating_date", doc.get("date"))
+    await collection.update_one(
+        {"_id": old_id},
+        {"$set": {"date": f"migrating:{old_id}", "migrating_date": date}}
+    )
+    copy = {key: value for key, value in doc.items() if key != "migrating_date"}
+    copy["_id"] = new_id
+    copy["date"] = date
+    try:
+        await collection.insert_one(copy)
+    except DuplicateKeyError:
+        if await collection.find_one({"_id": new_id}, {"_id": 1}) is None:
+            # Another document took the date in the meantime; keep the parked
+            # original (its date is in migrating_date) for a later run
+            print(f"Could not re-key {collection.name} {old_id}: another document has date {date}")
+            return False
+        # Copied by an interrupted run
+    await collection.delete_one({"_id": old_id})
+    return True
+
+async def migrate_content_ids() -> Optional[Dict[str, Any]]:
+    """
+    One-time normalization of stored content ids:
+    - riddles/puzzles whose _id is an ObjectId hex string are re-keyed to the ObjectId
+    - sessions whose riddle_id/puzzle_id is an ObjectId are rewritten as the hex string
+
+    Only one worker runs it: the others see the lock in `migrations` and skip.
+    A worker that dies mid-run leaves a lock that expires after
+    MIGRATION_LOCK_SECONDS, and the next start resumes; every step is safe
+    to repeat.
+
+    Returns:
+        Counts of documents changed, the earlier run's counts if it already
+        ran, or None if another worker is running it
+    """
+    db = get_database()
+    record = await _acquire_migration_lock(db, CONTENT_ID_MIGRATION)
+    if record is not None:
+        content_resolver.migration = record.get("result")
+        if "completed_at" not in record:
+            print("Content id migration is running on another worker, skipping")
+        return content_resolver.migration
+
+    result: Dict[str, Any] = {}
+    for kind, collection_name in CONTENT_COLLECTIONS.items():
+        collection = db[collection_name]
+        rekeyed = 0
+        async for doc in collection.find({"_id": {"$type": "string"}}):
+            if ObjectId.is_valid(doc["_id"]) and await _rekey(collection, doc):
+                rekeyed += 1
+
+        field = f"{kind}_id"
+        sessions = 0
+        async for session in db.sessions.find({field: {"$type": "objectId"}}, {field: 1}):
+            await db.sessions.update_one({"_id": session["_id"]}, {"$set": {field: str(session[field])}})
+            sessions += 1
+        result[collection_name] = rekeyed
+        result[f"sessions.{field}"] = sessions
+
+    await db.migrations.update_one(
+        {"_id": CONTENT_ID_MIGRATION},
+        {"$set": {"result": result, "completed_at": datetime.utcnow()}, "$unset": {"locked_until": ""}}
+    )
+    content_resolver.migration = result
+    print(f"✓ Content id migration complete: {result}")
+    return result
+
+def get_content_resolver_stats() -> Dict[str, Any]:
+    """Get content resolver statistics"""
+    lookups = content_resolver.daily_hits + content_resolver.hits + content_resolver.queries
+    return {
+        "entries": len(content_resolver.entries),
+        "maxEntries": CONTENT_CACHE_MAX_ENTRIES,
+        "dailyHits": content_resolver.daily_hits,
+        "hits": content_resolver.hits,
+        "queries": content_resolver.queries,
+        "notFound": content_resolver.not_found,
+        "hitRate": (content_resolver.daily_hits + content_resolver.hits) / lookups if lookups else 0.0,
+        "migration": content_resolver.migration
+    }
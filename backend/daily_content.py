@@ -0,0 +1,158 @@
+"""
+Daily Content Cache
+Holds today's riddle and puzzle in memory, so the daily endpoints serve them
+without a database read. Content changes once per Pacific day:
+
+- The cache is keyed by Pacific date. The first request after midnight
+  misses and loads the new day's document; the midnight job and
+  store_daily_riddle/store_daily_puzzle also put new content in directly.
+- Workers learn about content stored by another worker (e.g. a
+  force-overwrite) through the `content_versions` collection: every store
+  bumps a per-kind generation there, and each worker polls it every
+  DAILY_CONTENT_SYNC_INTERVAL seconds and reloads what changed.
+
+Cached documents are shared between requests and must not be mutated.
+"""
+import os
+import asyncio
+from datetime import datetime
+from typing import Optional, Dict, Any
+import pytz
+from pymongo import ReturnDocument
+
+# Import database functions - hybrid import for local/production compatibility
+try:
+    from backend.database import get_database
+except ImportError:
+    from database import get_database
+
+DAILY_CONTENT_SYNC_INTERVAL = float(os.getenv("DAILY_CONTENT_SYNC_INTERVAL", "15"))
+
+PACIFIC_TZ = pytz.timezone('America/Los_Angeles')
+
+# kind -> collection holding its daily documents
+CONTENT_COLLECTIONS = {"riddle": "riddles", "puzzle": "puzzles"}
+
+class DailyContentCache:
+    # kind -> today's document; its "date" says which day it is for
+    entries: Dict[str, Dict[str, Any]] = {}
+    # kind -> last content_versions generation this worker has loaded
+    generations: Dict[str, int] = {}
+    sync_task: Optional["asyncio.Task"] = None
+    hits: int = 0
+    misses: int = 0
+    loads: int = 0
+    invalidations: int = 0
+
+# Global daily content cache
+daily_content = DailyContentCache()
+
+def pacific_today() -> str:
+    """Today's date in Pacific Time (handles PST/PDT automatically)"""
+    return datetime.now(PACIFIC_TZ).strftime("%Y-%m-%d")
+
+async def _load(kind: str, date: str) -> Optional[Dict[str, Any]]:
+    db = get_database()
+    doc = await db[CONTENT_COLLECTIONS[kind]].find_one({"date": date})
+    daily_content.loads += 1
+    if doc is not None:
+        daily_content.entries[kind] = doc
+    else:
+        # Not generated yet; keep missing until it is, rather than serving yesterday's
+        daily_content.entries.pop(kind, None)
+    return doc
+
+async def get_daily_content(kind: str, date: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Get the riddle or puzzle for a Pacific date (default today).
+
+    Returns:
+        The document, or None if none exists for that date yet
+    """
+    date = date or pacific_today()
+    cached = daily_content.entries.get(kind)
+    if cached is not None and cached.get("date") == date:
+        daily_content.hits += 1
+        return cached
+    daily_content.misses += 1
+    return await _load(kind, date)
+
+def set_daily_content(kind: str, doc: Dict[str, Any]):
+    """Put a just-stored (or just-found) daily document into this worker's cache"""
+    daily_content.entries[kind] = doc
+
+async def publish_daily_content(kind: str, date: str, content_id: str):
+    """Tell the other workers that a kind's daily content changed"""
+    try:
+        db = get_database()
+        result = await db.content_versions.find_one_and_update(
+            {"_id": kind},
+            {"$set": {"date": date, "content_id": content_id, "updated_at": datetime.utcnow()}, "$inc": {"generation": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        if result is not None:
+            # This worker already has the new content
+            daily_content.generations[kind] = result["generation"]
+    except Exception as e:
+        print(f"Failed to publish daily {kind} change: {e}")
+
+async def sync_daily_content():
+    """Reload every kind whose generation changed since this worker last loaded it"""
+    db = get_database()
+    async for version in db.content_versions.find({"_id": {"$in": list(CONTENT_COLLECTIONS)}}):
+        kind = version["_id"]
+        seen = daily_content.generations.get(kind)
+        daily_content.generations[kind] = version.get("generation", 0)
+        if seen is None or seen == version.get("generation", 0):
+            continue
+        daily_content.invalidations += 1
+        print(f"Daily {kind} changed on another worker, reloading")
+        await _load(kind, pacific_today())
+
+async def refresh_daily_content():
+    """Load today's riddle and puzzle (e.g. after the midnight job)"""
+    today = pacific_today()
+    for kind in CONTENT_COLLECTIONS:
+        await _load(kind, today)
+
+async def _sync_loop():
+    while True:
+        await asyncio.sleep(DAILY_CONTENT_SYNC_INTERVAL)
+        try:
+            await sync_daily_content()
+        except Exception as e:
+            print(f"Daily content sync failed: {e}")
+
+async def start_daily_content_sync():
+    """Record the current generations and start polling for changes"""
+    try:
+        await sync_daily_content()
+    except Exception as e:
+        print(f"Daily content sync failed: {e}")
+    if daily_content.sync_task is None or daily_content.sync_task.done():
+        daily_content.sync_task = asyncio.create_task(_sync_loop())
+
+async def stop_daily_content_sync():
+    """Stop polling for changes"""
+    if daily_content.sync_task is not None:
+        daily_content.sync_task.cancel()
+        try:
+            await daily_content.sync_task
+        except asyncio.CancelledError:
+            pass
+        daily_content.sync_task = None
+
+def get_daily_content_stats() -> Dict[str, Any]:
+    """Get daily content cache statistics"""
+    lookups = daily_content.hits + daily_content.misses
+    return {
+        "syncInterval": DAILY_CONTENT_SYNC_INTERVAL,
+        "cached": {kind: doc.get("date") for kind, doc in daily_content.entries.items()},
+        "generations": dict(daily_content.generations),
+        "hits": daily_content.hits,
+        "misses": daily_content.misses,
+        "loads": daily_content.loads,
+        "invalidations": daily_content.invalidations,
+        "hitRate": daily_content.hits / lookups if lookups else 0.0
+    }
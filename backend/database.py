@@ -1,6 +1,8 @@
 import os
 from motor.motor_asyncio import AsyncIOMotorClient
-from typing import Optional
+from typing import Optional, Dict, Any, Tuple
+from pymongo import WriteConcern
+from pymongo.errors import DuplicateKeyError
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -13,6 +15,19 @@ class Database:
 # Global database instance
 db = Database()
 
+# Write concern per write path: "majority", a node count ("1"), "0" for
+# unacknowledged, or "default" for the connection's. Overridable per path
+# with MONGO_WRITE_CONCERN_<PATH>, e.g. MONGO_WRITE_CONCERN_SESSION_CREATE=majority.
+WRITE_CONCERN_DEFAULTS = {
+    # Starting a session is retried by the user if it is lost; one node is enough
+    "session_create": "1",
+    "session_patch": "default",
+}
+WRITE_CONCERNS = {
+    path: os.getenv(f"MONGO_WRITE_CONCERN_{path.upper()}", default).lower()
+    for path, default in WRITE_CONCERN_DEFAULTS.items()
+}
+
 async def connect_to_mongo():
     """Create database connection"""
     mongodb_uri = os.getenv("MONGODB_URI")
@@ -39,4 +54,42 @@ async def close_mongo_connection():
 
 def get_database():
     """Get database instance"""
-    return db.database
\ No newline at end of file
+    return db.database
+
+def write_concern_for(path: str) -> Optional[WriteConcern]:
+    """Configured write concern for a write path, or None for the connection default"""
+    value = WRITE_CONCERNS.get(path, "default")
+    if value == "default":
+        return None
+    return WriteConcern(w=value if value == "majority" else int(value))
+
+def get_collection(name: str, write_path: Optional[str] = None):
+    """Get a collection, with the write concern configured for write_path if given"""
+    collection = db.database[name]
+    write_concern = write_concern_for(write_path) if write_path else None
+    return collection.with_options(write_concern=write_concern) if write_concern else collection
+
+async def insert_or_conflict(collection, document: Dict[str, Any], conflict_filter: Optional[Dict[str, Any]] = None) -> Tuple[bool, Any]:
+    """
+    Insert a document guarded by a unique index in one round trip, instead of
+    checking for an existing document first (which costs a read and races).
+
+    Args:
+        collection: Motor collection to insert into
+        document: Document to insert
+        conflict_filter: Query for the document already holding the unique key;
+            if given, that document is fetched on a conflict
+
+    Returns:
+        (True, inserted_id) on insert, or (False, existing document or None) on a
+        duplicate key
+    """
+    try:
+        result = await collection.insert_one(document)
+        return True, result.inserted_id
+    except DuplicateKeyError:
+        # insert_one set _id on the document even though it was not written
+        document.pop("_id", None)
+        if conflict_filter is None:
+            return False, None
+        return False, await collection.find_one(conflict_filter)
@@ -0,0 +1,165 @@
+"""
+Gameplay Context Cache
+Keeps what a riddle or puzzle submission needs about its session in memory:
+the resolved content, the solved components and the recent conversation
+history. A player's follow-up questions then need no session or content read
+before the LLM call.
+
+Writes go through to Mongo with targeted operators ($push onto the
+conversation history, $addToSet for solved components) instead of rewriting
+the arrays, and return the stored solved components and recent history, so
+each write also refreshes the cached copy with whatever other workers added.
+
+Contexts are dropped when the session is solved, patched or deleted, and
+expire after GAMEPLAY_CACHE_TTL seconds without a submission (an abandoned
+game). GAMEPLAY_CACHE_TTL=0 disables the cache.
+"""
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional, Dict, Any, List
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+# Import database functions - hybrid import for local/production compatibility
+try:
+    from backend.database import get_database
+    from backend.content_resolver import resolve_session_content
+except ImportError:
+    from database import get_database
+    from content_resolver import resolve_session_content
+
+GAMEPLAY_CACHE_TTL = float(os.getenv("GAMEPLAY_CACHE_TTL", "900"))
+GAMEPLAY_CACHE_MAX_ENTRIES = int(os.getenv("GAMEPLAY_CACHE_MAX_ENTRIES", "5000"))
+
+# Conversation entries kept in the context (analyze_puzzle_submission reads the last 10)
+HISTORY_WINDOW = 10
+
+class GameplayCache:
+    # session id -> context: kind, content_id, content, solved_components, history, expires_at
+    entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+    hits: int = 0
+    misses: int = 0
+    expired: int = 0
+    evictions: int = 0
+    writes: int = 0
+
+# Global gameplay context cache
+gameplay_cache = GameplayCache()
+
+def _projection(kind: str) -> Dict[str, Any]:
+    return {
+        f"{kind}_id": 1,
+        "solved_components": 1,
+        "conversation_history": {"$slice": -HISTORY_WINDOW}
+    }
+
+def _refresh(context: Dict[str, Any], session: Dict[str, Any]):
+    context["solved_components"] = list(session.get("solved_components") or [])
+    context["history"] = list(session.get("conversation_history") or [])
+    context["expires_at"] = time.monotonic() + GAMEPLAY_CACHE_TTL
+
+def _store(session_id: str, context: Dict[str, Any]):
+    if GAMEPLAY_CACHE_TTL <= 0 or context["content"] is None:
+        return
+    gameplay_cache.entries[session_id] = context
+    gameplay_cache.entries.move_to_end(session_id)
+    while len(gameplay_cache.entries) > GAMEPLAY_CACHE_MAX_ENTRIES:
+        gameplay_cache.entries.popitem(last=False)
+
+async def get_gameplay_context(session_id: str, kind: str) -> Optional[Dict[str, Any]]:
+    """
+    Get the gameplay context of a riddle or puzzle session.
+
+    Args:
+        session_id: The session's ObjectId as a string
+        kind: "riddle" or "puzzle"
+
+    Returns:
+        The context, or None if the session does not exist. Its content_id is
+        None when the session has no riddle/puzzle, and content is None when
+        that content cannot be found.
+    """
+    context = gameplay_cache.entries.get(session_id)
+    if context is not None and context["kind"] == kind:
+        if context["expires_at"] > time.monotonic():
+            gameplay_cache.entries.move_to_end(session_id)
+            gameplay_cache.hits += 1
+            return context
+        del gameplay_cache.entries[session_id]
+        gameplay_cache.expired += 1
+    gameplay_cache.misses += 1
+
+    db = get_database()
+    session = await db.sessions.find_one({"_id": ObjectId(session_id)}, _projection(kind))
+    if session is None:
+        return None
+    content_id = session.get(f"{kind}_id")
+    context = {
+        "kind": kind,
+        "content_id": content_id,
+        "content": await resolve_session_content(kind, session) if content_id else None
+    }
+    _refresh(context, session)
+    _store(session_id, context)
+    return context
+
+async def record_exchange(session_id: str, context: Dict[str, Any], user_text: str, assistant_text: str, component_index: Optional[int] = None):
+    """Append a question and its answer (and a newly solved component) to the session"""
+    update: Dict[str, Any] = {
+        "$push": {"conversation_history": {"$each": [
+            {"role": "user", "text": user_text},
+            {"role": "assistant", "text": assistant_text}
+        ]}}
+    }
+    if component_index is not None:
+        update["$addToSet"] = {"solved_components": component_index}
+
+    db = get_database()
+    gameplay_cache.writes += 1
+    session = await db.sessions.find_one_and_update(
+        {"_id": ObjectId(session_id)},
+        update,
+        projection=_projection(context["kind"]),
+        return_document=ReturnDocument.AFTER
+    )
+    if session is not None:
+        _refresh(context, session)
+
+async def mark_solved(session_id: str, context: Dict[str, Any], solved_components: Optional[List[int]] = None, user_text: Optional[str] = None, assistant_text: Optional[str] = None):
+    """Mark the session solved (appending the final exchange, if any) and drop its context"""
+    fields: Dict[str, Any] = {"solved": True, "solved_at": datetime.utcnow()}
+    if solved_components is not None:
+        fields["solved_components"] = solved_components
+    update: Dict[str, Any] = {"$set": fields}
+    if user_text is not None:
+        update["$push"] = {"conversation_history": {"$each": [
+            {"role": "user", "text": user_text},
+            {"role": "assistant", "text": assistant_text or ""}
+        ]}}
+
+    db = get_database()
+    gameplay_cache.writes += 1
+    await db.sessions.update_one({"_id": ObjectId(session_id)}, update)
+    evict_gameplay_context(session_id)
+
+def evict_gameplay_context(session_id: str):
+    """Drop a session's context (solved, changed or deleted)"""
+    if gameplay_cache.entries.pop(session_id, None) is not None:
+        gameplay_cache.evictions += 1
+
+def get_gameplay_cache_stats() -> Dict[str, Any]:
+    """Get gameplay context cache statistics"""
+    lookups = gameplay_cache.hits + gameplay_cache.misses
+    return {
+        "ttlSeconds": GAMEPLAY_CACHE_TTL,
+        "entries": len(gameplay_cache.entries),
+        "maxEntries": GAMEPLAY_CACHE_MAX_ENTRIES,
+        "hits": gameplay_cache.hits,
+        "misses": gameplay_cache.misses,
+        "expired": gameplay_cache.expired,
+        "evictions": gameplay_cache.evictions,
+        "writes": gameplay_cache.writes,
+        "hitRate": gameplay_cache.hits / lookups if lookups else 0.0
+    }
@@ -0,0 +1,188 @@
+"""
+Mongo Index Manager
+Declares the indexes each collection's hot queries need and applies them at
+startup. create_index is a no-op for an index that already exists with the
+same keys and options, so applying the declarations on every start is safe.
+
+An index that cannot be built (e.g. a unique index over existing duplicate
+values, or an index with the same name but different options) is reported and
+skipped instead of failing startup. The last report is exposed through
+get_index_report() for the metrics endpoint.
+
+Indexes replaced by a new declaration are listed in RETIRED_INDEXES and
+dropped once every declared index of their collection is present, so queries
+are never left without one.
+
+Set MONGO_AUTO_INDEX=false to only report missing indexes without building
+them (e.g. when index builds are run by hand on a large deployment).
+"""
+import os
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import DuplicateKeyError, OperationFailure
+
+# Import database functions - hybrid import for local/production compatibility
+try:
+    from backend.database import get_database
+except ImportError:
+    from database import get_database
+
+MONGO_AUTO_INDEX = os.getenv("MONGO_AUTO_INDEX", "true").lower() == "true"
+
+# collection -> declared indexes. Each name is explicit so a changed
+# definition surfaces as a conflict instead of a silently added second index.
+REQUIRED_INDEXES: Dict[str, List[Dict[str, Any]]] = {
+    "users": [
+        # Login and registration lookups; one account per email
+        {"name": "email_unique", "keys": [("email", ASCENDING)], "unique": True},
+    ],
+    "sessions": [
+        # Session history: find({"user_id"}).sort("created_at", -1), keyset-paginated on (created_at, _id)
+        {"name": "user_id_created_at_id", "keys": [("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]},
+        # Solved-session lookups for the daily riddle and puzzle
+        {"name": "daily_riddle_solved", "keys": [("session_type", ASCENDING), ("user_id", ASCENDING), ("riddle_id", ASCENDING), ("solved", ASCENDING)]},
+        {"name": "daily_puzzle_solved", "keys": [("session_type", ASCENDING), ("user_id", ASCENDING), ("puzzle_id", ASCENDING), ("solved", ASCENDING)]},
+    ],
+    "riddles": [
+        # One riddle per Pacific date
+        {"name": "date_unique", "keys": [("date", ASCENDING)], "unique": True},
+    ],
+    "puzzles": [
+        # One puzzle per Pacific date
+        {"name": "date_unique", "keys": [("date", ASCENDING)], "unique": True},
+    ],
+    "scenarios": [
+        {"name": "date", "keys": [("date", ASCENDING)]},
+    ],
+    "scenario_sessions": [
+        {"name": "id", "keys": [("id", ASCENDING)]},
+    ],
+    "ai_interactions": [
+        # Rate-limit rebuild: $match on session_id, $group on stage (covered by the index)
+        {"name": "session_id_stage", "keys": [("session_id", ASCENDING), ("stage", ASCENDING)]},
+    ],
+    "riddle_answers": [
+        # Shared answer cache lookups and upserts
+        {"name": "riddle_kind_question", "keys": [("riddle_id", ASCENDING), ("kind", ASCENDING), ("question_key", ASCENDING)], "unique": True},
+    ],
+}
+
+# collection -> names of indexes that are no longer declared and get dropped
+RETIRED_INDEXES: Dict[str, List[str]] = {
+    # Replaced by user_id_created_at_id (keyset pagination needs _id in the index)
+    "sessions": ["user_id_created_at"],
+}
+
+class IndexReport:
+    # collection -> {index name: status}; status is "present", "created", "missing" or an error
+    collections: Dict[str, Dict[str, str]] = {}
+    # "collection.name" of retired indexes dropped by the last check
+    dropped: List[str] = []
+    checked_at: Optional[str] = None
+
+# Last index check
+index_report = IndexReport()
+
+def _same_keys(info: Dict[str, Any], spec: Dict[str, Any]) -> bool:
+    return [(field, int(direction)) for field, direction in info.get("key", [])] == list(spec["keys"])
+
+async def check_indexes() -> Dict[str, List[str]]:
+    """
+    Compare the declared indexes with what exists.
+
+    Returns:
+        {collection: [missing index names]} for collections with missing indexes
+    """
+    db = get_database()
+    missing: Dict[str, List[str]] = {}
+    for collection, specs in REQUIRED_INDEXES.items():
+        existing = await db[collection].index_information()
+        for spec in specs:
+            info = existing.get(spec["name"])
+            if info is None or not _same_keys(info, spec) or info.get("unique", False) != spec.get("unique", False):
+                missing.setdefault(collection, []).append(spec["name"])
+    return missing
+
+async def ensure_indexes(build: Optional[bool] = None) -> Dict[str, List[str]]:
+    """
+    Create every declared index that does not exist yet (idempotent).
+
+    Args:
+        build: Build missing indexes; defaults to MONGO_AUTO_INDEX
+
+    Returns:
+        {collection: [index names]} still missing afterwards
+    """
+    db = get_database()
+    build = MONGO_AUTO_INDEX if build is None else build
+    missing = await check_indexes()
+    report: Dict[str, Dict[str, str]] = {
+        collection: {spec["name"]: "present" for spec in specs}
+        for collection, specs in REQUIRED_INDEXES.items()
+    }
+
+    still_missing: Dict[str, List[str]] = {}
+    for collection, names in missing.items():
+        for spec in REQUIRED_INDEXES[collection]:
+            if spec["name"] not in names:
+                continue
+            if not build:
+                report[collection][spec["name"]] = "missing"
+                still_missing.setdefault(collection, []).append(spec["name"])
+                continue
+            try:
+                await db[collection].create_index(spec["keys"], name=spec["name"], unique=spec.get("unique", False))
+                report[collection][spec["name"]] = "created"
+                print(f"Created index {collection}.{spec['name']}")
+            except DuplicateKeyError as e:
+                report[collection][spec["name"]] = "duplicate values"
+                still_missing.setdefault(collection, []).append(spec["name"])
+                print(f"Cannot build unique index {collection}.{spec['name']}, existing documents have duplicate values: {e}")
+            except OperationFailure as e:
+                report[collection][spec["name"]] = f"error: {e.code}"
+                still_missing.setdefault(collection, []).append(spec["name"])
+                print(f"Cannot build index {collection}.{spec['name']}: {e}")
+
+    index_report.dropped = await _drop_retired_indexes(still_missing) if build else []
+    index_report.collections = report
+    index_report.checked_at = datetime.utcnow().isoformat()
+    if still_missing:
+        print(f"Missing indexes: {', '.join(f'{c}.{n}' for c, names in still_missing.items() for n in names)}")
+    else:
+        print("✓ All required indexes present")
+    return still_missing
+
+async def _drop_retired_indexes(still_missing: Dict[str, List[str]]) -> List[str]:
+    """Drop retired indexes of collections whose declared indexes are all present"""
+    db = get_database()
+    dropped: List[str] = []
+    for collection, names in RETIRED_INDEXES.items():
+        if collection in still_missing:
+            continue
+        existing = await db[collection].index_information()
+        for name in names:
+            if name not in existing:
+                continue
+            try:
+                await db[collection].drop_index(name)
+                dropped.append(f"{collection}.{name}")
+                print(f"Dropped retired index {collection}.{name}")
+            except OperationFailure as e:
+                print(f"Cannot drop retired index {collection}.{name}: {e}")
+    return dropped
+
+def get_index_report() -> Dict[str, Any]:
+    """Get the result of the last index check"""
+    return {
+        "autoIndex": MONGO_AUTO_INDEX,
+        "checkedAt": index_report.checked_at,
+        "collections": index_report.collections,
+        "dropped": index_report.dropped,
+        "missing": [
+            f"{collection}.{name}"
+            for collection, statuses in index_report.collections.items()
+            for name, status in statuses.items()
+            if status not in ("present", "created")
+        ]
+    }
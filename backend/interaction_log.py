@@ -0,0 +1,149 @@
+"""
+Write-Behind Interaction Log
+Buffers ai_interactions documents in memory and writes them with insert_many,
+so logging an interaction does not add a Mongo round trip to the request.
+
+A batch is flushed when it reaches AI_LOG_BATCH_SIZE documents or
+AI_LOG_FLUSH_INTERVAL seconds after the first buffered document, whichever
+comes first, and the buffer is drained on shutdown. Documents get their _id
+when they are queued, so callers can return the interaction id straight away.
+Documents that are still buffered are visible through pending_interactions().
+
+Set AI_LOG_WRITE_BEHIND=false to write every interaction with insert_one.
+"""
+import os
+import time
+import asyncio
+from collections import deque
+from typing import Optional, Dict, Any, List
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+
+# Import database functions - hybrid import for local/production compatibility
+try:
+    from backend.database import get_database
+except ImportError:
+    from database import get_database
+
+AI_LOG_WRITE_BEHIND = os.getenv("AI_LOG_WRITE_BEHIND", "true").lower() == "true"
+AI_LOG_BATCH_SIZE = int(os.getenv("AI_LOG_BATCH_SIZE", "50"))
+AI_LOG_FLUSH_INTERVAL = float(os.getenv("AI_LOG_FLUSH_INTERVAL", "1.0"))
+# Oldest documents are dropped beyond this many if Mongo stays unreachable
+AI_LOG_MAX_PENDING = int(os.getenv("AI_LOG_MAX_PENDING", "10000"))
+
+# Recent flush durations kept for percentile reporting
+FLUSH_WINDOW = 200
+
+class InteractionLog:
+    pending: List[Dict[str, Any]] = []
+    timer: Optional[asyncio.TimerHandle] = None
+    flushing: Optional["asyncio.Task"] = None
+    queued: int = 0
+    written: int = 0
+    dropped: int = 0
+    flushes: int = 0
+    failed_flushes: int = 0
+    peak_pending: int = 0
+    flush_latencies = deque(maxlen=FLUSH_WINDOW)
+
+# Global write-behind buffer
+interaction_log = InteractionLog()
+
+async def log_interaction_document(doc: Dict[str, Any]) -> str:
+    """
+    Queue an ai_interactions document for writing.
+
+    Returns:
+        The document's id (assigned here, before it is written)
+    """
+    doc["_id"] = ObjectId()
+    interaction_log.queued += 1
+
+    if not AI_LOG_WRITE_BEHIND:
+        await get_database().ai_interactions.insert_one(doc)
+        interaction_log.written += 1
+        return str(doc["_id"])
+
+    interaction_log.pending.append(doc)
+    interaction_log.peak_pending = max(interaction_log.peak_pending, len(interaction_log.pending))
+    if len(interaction_log.pending) >= AI_LOG_BATCH_SIZE:
+        _schedule_flush()
+    elif interaction_log.timer is None:
+        interaction_log.timer = asyncio.get_running_loop().call_later(AI_LOG_FLUSH_INTERVAL, _schedule_flush)
+    return str(doc["_id"])
+
+def pending_interactions(session_id: str) -> List[Dict[str, Any]]:
+    """Buffered (not yet written) interaction documents for a session"""
+    return [doc for doc in interaction_log.pending if doc["session_id"] == session_id]
+
+def _schedule_flush():
+    if interaction_log.timer is not None:
+        interaction_log.timer.cancel()
+        interaction_log.timer = None
+    if interaction_log.flushing is None or interaction_log.flushing.done():
+        interaction_log.flushing = asyncio.ensure_future(flush_interactions())
+
+async def flush_interactions():
+    """Write every buffered document, one insert_many per batch"""
+    while interaction_log.pending:
+        batch = interaction_log.pending[:AI_LOG_BATCH_SIZE]
+        start = time.perf_counter()
+        failed: List[Dict[str, Any]] = []
+        try:
+            await get_database().ai_interactions.insert_many(batch, ordered=False)
+        except BulkWriteError as e:
+            # Duplicate keys were written by an earlier, partly failed flush
+            failed = [batch[error["index"]] for error in e.details.get("writeErrors", []) if error.get("code") != 11000]
+        except Exception as e:
+            print(f"Interaction log flush of {len(batch)} documents failed: {e}")
+            failed = batch
+
+        # Documents stay buffered (and visible to pending_interactions) until written
+        del interaction_log.pending[:len(batch)]
+        interaction_log.written += len(batch) - len(failed)
+        if failed:
+            interaction_log.failed_flushes += 1
+            interaction_log.pending[:0] = failed
+            overflow = len(interaction_log.pending) - AI_LOG_MAX_PENDING
+            if overflow > 0:
+                del interaction_log.pending[:overflow]
+                interaction_log.dropped += overflow
+                print(f"Dropped {overflow} buffered interactions")
+            # Retry on the next interval instead of spinning on an unavailable database
+            if interaction_log.timer is None:
+                interaction_log.timer = asyncio.get_running_loop().call_later(AI_LOG_FLUSH_INTERVAL, _schedule_flush)
+            return
+
+        interaction_log.flush_latencies.append((time.perf_counter() - start) * 1000)
+        interaction_log.flushes += 1
+
+async def drain_interaction_log():
+    """Flush everything still buffered (called on shutdown)"""
+    if interaction_log.timer is not None:
+        interaction_log.timer.cancel()
+        interaction_log.timer = None
+    if interaction_log.flushing is not None and not interaction_log.flushing.done():
+        await interaction_log.flushing
+    await flush_interactions()
+    if interaction_log.pending:
+        print(f"Could not write {len(interaction_log.pending)} buffered interactions on shutdown")
+    else:
+        print("Interaction log drained")
+
+def get_interaction_log_stats() -> Dict[str, Any]:
+    """Get write-behind queue depth and flush latency statistics"""
+    recent = sorted(interaction_log.flush_latencies)
+    return {
+        "writeBehind": AI_LOG_WRITE_BEHIND,
+        "batchSize": AI_LOG_BATCH_SIZE,
+        "flushInterval": AI_LOG_FLUSH_INTERVAL,
+        "queueDepth": len(interaction_log.pending),
+        "peakQueueDepth": interaction_log.peak_pending,
+        "queued": interaction_log.queued,
+        "written": interaction_log.written,
+        "dropped": interaction_log.dropped,
+        "flushes": interaction_log.flushes,
+        "failedFlushes": interaction_log.failed_flushes,
+        "avgFlushMs": sum(recent) / len(recent) if recent else 0.0,
+        "p95FlushMs": recent[min(len(recent) - 1, int(len(recent) * 0.95))] if recent else 0.0
+    }
@@ -0,0 +1,137 @@
+"""
+JSON Extraction
+Finds the JSON value in a model response with a decode pass starting at the
+first { or [ (and at the next one, if prose like "[see below]" got there
+first). Handles the usual ways model output deviates from bare JSON:
+- markdown fences and prose before or after the value
+- raw newlines, tabs and other control characters inside strings
+- braces and brackets inside strings or in trailing prose
+
+parse_partial_json also accepts a value that was cut off mid-stream and
+returns its complete members, dropping the one the cut fell in.
+"""
+import re
+import json
+from typing import Any, List, Optional, Tuple
+
+# Tokens the scanner stops at: a whole string (group 1 is empty if the text ends
+# inside it), a bracket or a comma. Everything in between, including string
+# contents, is skipped by the regex engine instead of a Python loop.
+_TOKENS = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*(")?|[{}\[\],]', re.S)
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+# strict=False accepts raw control characters inside strings
+_decoder = json.JSONDecoder(strict=False)
+
+def _find_start(text: str, begin: int = 0) -> int:
+    """Index of the first { or [ in text at or after begin, or -1"""
+    brace = text.find("{", begin)
+    bracket = text.find("[", begin)
+    if brace < 0:
+        return bracket
+    if bracket < 0:
+        return brace
+    return min(brace, bracket)
+
+def _scan(text: str, start: int) -> Tuple[int, List[List[Any]], bool]:
+    """
+    Scan a JSON value beginning at start.
+
+    Returns:
+        Tuple of (end, open_containers, in_string). end is the index just past
+        the closing bracket, or -1 if the text ends first. open_containers holds
+        [opening_char, cut] for every unclosed container, where cut is the index
+        to truncate at to drop its last incomplete member.
+    """
+    stack: List[List[Any]] = []
+    for match in _TOKENS.finditer(text, start):
+        token = match.group()
+        if token[0] == '"':
+            if match.group(1) is None:
+                return -1, stack, True
+        elif token in _CLOSERS:
+            stack.append([token, match.end()])
+        elif token == ",":
+            if stack:
+                stack[-1][1] = match.start()
+        else:
+            if stack:
+                stack.pop()
+            if not stack:
+                return match.end(), stack, False
+    return -1, stack, False
+
+def extract_json(text: str) -> Any:
+    """
+    Parse the first JSON object or array in a model response.
+
+    Raises:
+        json.JSONDecodeError: No complete JSON value was found, or it is invalid
+    """
+    start = _find_start(text)
+    if start < 0:
+        raise json.JSONDecodeError("No JSON object or array found", text, 0)
+    first_error = None
+    while start >= 0:
+        try:
+            # raw_decode stops at the end of the value, so whatever follows it is ignored
+            return _decoder.raw_decode(text, start)[0]
+        except json.JSONDecodeError as e:
+            first_error = first_error or e
+        end, _, _ = _scan(text, start)
+        if end < 0:
+            # Cut off: any later bracket is inside this value
+            break
+        # Complete but invalid, e.g. a bracket in prose ("Note [see below]: {...}");
+        # try the next candidate after it
+        start = _find_start(text, end)
+    raise first_error
+
+def parse_partial_json(text: str) -> Optional[Any]:
+    """
+    Parse a JSON value that may be cut off, e.g. a response still streaming in
+    or one that hit max_tokens.
+
+    Complete values parse as with extract_json. For a truncated value the open
+    containers are closed after the last complete member: a string or number
+    the cut fell in is dropped with its key, never returned shortened. Containers
+    that were cut off keep the members they completed.
+
+    Returns:
+        The parsed value, or None if no JSON value has started yet
+    """
+    start = _find_start(text)
+    while start >= 0:
+        try:
+            return _decoder.raw_decode(text, start)[0]
+        except json.JSONDecodeError:
+            pass
+        end, stack, in_string = _scan(text, start)
+        if end < 0:
+            break
+        # Complete but invalid (e.g. a bracket in prose), try the next candidate
+        start = _find_start(text, end)
+    if start < 0:
+        return None
+
+    # The cut fell between members or after a complete string, literal or
+    # container: closing the open containers keeps everything. A number at the
+    # end may have been cut short, so it is dropped like an open string.
+    tail = text[start:].rstrip()
+    if not in_string and not tail[-1].isdigit():
+        closers = "".join(_CLOSERS[opening] for opening, _ in reversed(stack))
+        try:
+            return _decoder.decode(tail + closers)
+        except json.JSONDecodeError:
+            pass
+
+    # Drop members from the innermost container outwards until the prefix parses
+    for depth in range(len(stack) - 1, -1, -1):
+        cut = stack[depth][1]
+        closers = "".join(_CLOSERS[opening] for opening, _ in reversed(stack[:depth + 1]))
+        try:
+            return _decoder.decode(text[start:cut] + closers)
+        except json.JSONDecodeError:
+            continue
+    return None
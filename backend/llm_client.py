@@ -0,0 +1,301 @@
+"""
+Async LLM Client Layer
+Shares a single non-blocking Anthropic client with a bounded, keep-alive HTTP
+connection pool across every AI call in the backend.
+"""
+import os
+import json
+import asyncio
+import hashlib
+from typing import Optional, Dict, Any, AsyncIterator
+import httpx
+from anthropic import AsyncAnthropic, DefaultAsyncHttpxClient, APIConnectionError, APIStatusError
+from dotenv import load_dotenv
+
+# Import circuit breaker - hybrid import for local/production compatibility
+try:
+    from backend.circuit_breaker import CircuitBreaker
+except ImportError:
+    from circuit_breaker import CircuitBreaker
+
+load_dotenv()
+
+# Connection pool and concurrency settings (overridable via environment)
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "10"))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "30"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_REQUEST_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT", "60"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_SINGLE_FLIGHT = os.getenv("LLM_SINGLE_FLIGHT", "true").lower() == "true"
+LLM_BREAKER_FAILURE_THRESHOLD = int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", "5"))
+LLM_BREAKER_RESET_TIMEOUT = float(os.getenv("LLM_BREAKER_RESET_TIMEOUT", "30"))
+
+class LLMClient:
+    client: Optional[AsyncAnthropic] = None
+    semaphore: Optional[asyncio.Semaphore] = None
+    in_flight: int = 0
+    peak_in_flight: int = 0
+    total_requests: int = 0
+    # Single-flight: identical requests already on the wire, keyed by request hash
+    flights: Dict[str, "asyncio.Task"] = {}
+    issued_calls: int = 0
+    coalesced_calls: int = 0
+    # Hedging: duplicate requests sent when the first is slow, and how often they won
+    hedged_calls: int = 0
+    hedge_wins: int = 0
+    deadline_exceeded: int = 0
+    # One circuit breaker per model, so a failing model does not block the others
+    breakers: Dict[str, CircuitBreaker] = {}
+
+# Global LLM client instance
+llm = LLMClient()
+
+def init_llm_client(transport: Optional[httpx.AsyncBaseTransport] = None) -> AsyncAnthropic:
+    """
+    Create the shared async Anthropic client.
+
+    Args:
+        transport: Optional httpx transport override (used by the benchmarks to
+            simulate upstream latency without calling the real API)
+    """
+    limits = httpx.Limits(
+        max_connections=LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=LLM_KEEPALIVE_EXPIRY
+    )
+    http_client = DefaultAsyncHttpxClient(
+        limits=limits,
+        timeout=httpx.Timeout(LLM_REQUEST_TIMEOUT, connect=10.0),
+        transport=transport
+    )
+    llm.client = AsyncAnthropic(
+        api_key=os.getenv("CLAUDE_API_KEY") or "missing-api-key",
+        http_client=http_client,
+        max_retries=LLM_MAX_RETRIES
+    )
+    llm.semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+    print(f"LLM client ready (pool={LLM_MAX_CONNECTIONS}, keepalive={LLM_MAX_KEEPALIVE_CONNECTIONS}, concurrency={LLM_MAX_CONCURRENCY})")
+    return llm.client
+
+def get_llm_client() -> AsyncAnthropic:
+    """Get the shared async Anthropic client, creating it on first use"""
+    if llm.client is None:
+        init_llm_client()
+    return llm.client
+
+async def _send_message(**kwargs):
+    """
+    Send a Messages API request through the shared pool.
+    Concurrency is capped by LLM_MAX_CONCURRENCY so a traffic spike queues
+    here instead of exhausting the connection pool.
+    """
+    client = get_llm_client()
+    async with llm.semaphore:
+        llm.in_flight += 1
+        llm.total_requests += 1
+        llm.peak_in_flight = max(llm.peak_in_flight, llm.in_flight)
+        try:
+            return await client.messages.create(**kwargs)
+        finally:
+            llm.in_flight -= 1
+
+def _flight_key(kwargs: Dict[str, Any]) -> str:
+    """Hash of everything that determines the response (model, system, messages, temperature, ...)"""
+    payload = json.dumps(kwargs, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+_USAGE_TOKEN_FIELDS = ("input_tokens", "output_tokens", "cache_read_input_tokens", "cache_creation_input_tokens")
+
+def _without_usage(message):
+    """Copy of a shared message whose usage reports no tokens"""
+    usage = message.usage.model_copy(update={
+        field: 0 for field in _USAGE_TOKEN_FIELDS if getattr(message.usage, field, None) is not None
+    })
+    return message.model_copy(update={"usage": usage})
+
+async def _create_coalesced(**kwargs):
+    """
+    Send a Messages API request, coalescing identical in-flight requests.
+
+    When the same request is already waiting on the upstream, callers share
+    its result instead of issuing a second call. The shared call runs as its
+    own task so one caller disconnecting does not cancel it for the others.
+    Only the caller that issued it gets the message's usage; the others get a
+    copy reporting zero tokens, so the call is counted and billed once.
+    """
+    if not LLM_SINGLE_FLIGHT:
+        llm.issued_calls += 1
+        return await _send_message(**kwargs)
+
+    key = _flight_key(kwargs)
+    flight = llm.flights.get(key)
+    if flight is not None:
+        llm.coalesced_calls += 1
+        return _without_usage(await asyncio.shield(flight))
+
+    llm.issued_calls += 1
+    flight = asyncio.ensure_future(_send_message(**kwargs))
+    llm.flights[key] = flight
+    flight.add_done_callback(lambda _: llm.flights.pop(key, None))
+    return await asyncio.shield(flight)
+
+async def _create_hedged(hedge_after: float, **kwargs):
+    """
+    Send a request and, if it has not answered within hedge_after seconds, send
+    a duplicate. The first successful response wins and the other is cancelled.
+    """
+    primary = asyncio.ensure_future(_create_coalesced(**kwargs))
+    pending = {primary}
+    try:
+        done, pending = await asyncio.wait(pending, timeout=hedge_after)
+        if done:
+            return primary.result()
+
+        # The hedge bypasses single-flight, otherwise it would join the slow call
+        llm.hedged_calls += 1
+        llm.issued_calls += 1
+        hedge = asyncio.ensure_future(_send_message(**kwargs))
+        pending = {primary, hedge}
+
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is not primary:
+                        llm.hedge_wins += 1
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+def _get_breaker(model: str) -> CircuitBreaker:
+    breaker = llm.breakers.get(model)
+    if breaker is None:
+        breaker = CircuitBreaker(model, LLM_BREAKER_FAILURE_THRESHOLD, LLM_BREAKER_RESET_TIMEOUT)
+        llm.breakers[model] = breaker
+    return breaker
+
+def _is_upstream_failure(error: Exception) -> bool:
+    """Errors that mean the upstream is unhealthy (as opposed to a bad request)"""
+    if isinstance(error, (asyncio.TimeoutError, APIConnectionError)):
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+async def _within_deadline(call, deadline: float):
+    try:
+        return await asyncio.wait_for(call, deadline)
+    except asyncio.TimeoutError:
+        llm.deadline_exceeded += 1
+        raise asyncio.TimeoutError(f"LLM call exceeded its {deadline}s deadline")
+
+async def _guarded(breaker: CircuitBreaker, call):
+    """Await an upstream call and report its outcome to the circuit breaker"""
+    try:
+        result = await call
+    except asyncio.CancelledError:
+        breaker.release()
+        raise
+    except Exception as e:
+        if _is_upstream_failure(e):
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        raise
+    breaker.record_success()
+    return result
+
+async def create_message(deadline: Optional[float] = None, hedge_after: Optional[float] = None, **kwargs):
+    """
+    Send a Messages API request with the call's reliability policy.
+
+    Args:
+        deadline: Overall time budget in seconds (including SDK retries and
+            hedges); asyncio.TimeoutError is raised when it is exceeded
+        hedge_after: If set, send a duplicate request when the first has not
+            answered after this many seconds
+        **kwargs: Messages API arguments
+
+    Raises:
+        CircuitOpenError: The model's circuit breaker is open, so no request was sent
+    """
+    breaker = _get_breaker(kwargs.get("model", "default"))
+    breaker.check()
+
+    call = _create_hedged(hedge_after, **kwargs) if hedge_after else _create_coalesced(**kwargs)
+    if deadline:
+        call = _within_deadline(call, deadline)
+    return await _guarded(breaker, call)
+
+async def stream_message(**kwargs) -> AsyncIterator[Any]:
+    """
+    Stream a Messages API response through the shared pool.
+
+    Yields the SDK stream events as they arrive ("text" events carry token
+    deltas, the final "message_stop" event carries the complete message with
+    usage). Streams are never coalesced - each caller gets its own stream.
+    """
+    client = get_llm_client()
+    breaker = _get_breaker(kwargs.get("model", "default"))
+    breaker.check()
+    async with llm.semaphore:
+        llm.in_flight += 1
+        llm.total_requests += 1
+        llm.issued_calls += 1
+        llm.peak_in_flight = max(llm.peak_in_flight, llm.in_flight)
+        try:
+            async with client.messages.stream(**kwargs) as stream:
+                async for event in stream:
+                    yield event
+        except Exception as e:
+            if _is_upstream_failure(e):
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            raise
+        except BaseException:
+            breaker.release()
+            raise
+        else:
+            breaker.record_success()
+        finally:
+            llm.in_flight -= 1
+
+def get_llm_client_stats() -> Dict[str, Any]:
+    """Get connection pool and concurrency statistics"""
+    return {
+        "maxConnections": LLM_MAX_CONNECTIONS,
+        "maxKeepaliveConnections": LLM_MAX_KEEPALIVE_CONNECTIONS,
+        "maxConcurrency": LLM_MAX_CONCURRENCY,
+        "inFlight": llm.in_flight,
+        "peakInFlight": llm.peak_in_flight,
+        "totalRequests": llm.total_requests,
+        "singleFlight": {
+            "enabled": LLM_SINGLE_FLIGHT,
+            "issued": llm.issued_calls,
+            "coalesced": llm.coalesced_calls,
+            "pending": len(llm.flights)
+        },
+        "hedging": {
+            "hedged": llm.hedged_calls,
+            "hedgeWins": llm.hedge_wins
+        },
+        "deadlineExceeded": llm.deadline_exceeded
+    }
+
+def get_circuit_breaker_stats() -> Dict[str, Any]:
+    """Get state and trip counts of every model's circuit breaker"""
+    return {model: breaker.get_stats() for model, breaker in llm.breakers.items()}
+
+async def close_llm_client():
+    """Close the shared client and release pooled connections"""
+    if llm.client is not None:
+        await llm.client.close()
+        llm.client = None
+        llm.semaphore = None
+        print("LLM client closed")
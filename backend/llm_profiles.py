@@ -0,0 +1,154 @@
+"""
+LLM Call Profiles
+Named per-call-site settings (model, output budget, temperature, timeout) so
+small classification calls can use a faster model and a tight token budget
+while open-ended coaching calls keep the larger model.
+
+Defaults live in DEFAULT_PROFILES and can be overridden:
+1. From a JSON file named by LLM_PROFILES_FILE, e.g.
+   {"classification": {"model": "claude-sonnet-4-5", "max_tokens": 400}}
+2. From environment variables LLM_PROFILE_<NAME>_<FIELD>, e.g.
+   LLM_PROFILE_RIDDLE_JUDGE_MODEL=claude-sonnet-4-5
+Environment variables win over the file.
+
+timeout is the call's overall deadline in seconds. hedge_after (0 = off) sends
+a duplicate request when the first has not answered after that many seconds.
+"""
+import os
+import json
+from collections import deque
+from typing import Dict, Any
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SONNET_MODEL = "claude-sonnet-4-5"
+HAIKU_MODEL = "claude-haiku-4-5"
+
+# Recent latencies kept per profile for percentile reporting
+LATENCY_WINDOW = 500
+
+DEFAULT_PROFILES: Dict[str, Dict[str, Any]] = {
+    # Open-ended coaching questions (the original get_claude_response settings)
+    "guidance": {"model": SONNET_MODEL, "max_tokens": 1024, "temperature": 0.4, "timeout": 60},
+    # Option lists, summaries of the conversation so far, fear/contingency plans
+    "options": {"model": SONNET_MODEL, "max_tokens": 1024, "temperature": 0.4, "timeout": 60},
+    "summary": {"model": SONNET_MODEL, "max_tokens": 1024, "temperature": 0.4, "timeout": 90},
+    # Short JSON verdicts: problem statement validation, root cause depth, triage
+    "classification": {"model": HAIKU_MODEL, "max_tokens": 300, "temperature": 0.1, "timeout": 15},
+    # Riddle yes/no judge, single question and micro-batched
+    "riddle_judge": {"model": HAIKU_MODEL, "max_tokens": 200, "temperature": 0.3, "timeout": 15, "hedge_after": 3.0},
+    "riddle_judge_batch": {"model": HAIKU_MODEL, "max_tokens": 1024, "temperature": 0.3, "timeout": 20},
+    # Answer checking against the solution - correctness matters more than speed
+    "solution_check": {"model": SONNET_MODEL, "max_tokens": 512, "temperature": 0.2, "timeout": 30},
+    "verification": {"model": SONNET_MODEL, "max_tokens": 512, "temperature": 0.1, "timeout": 30},
+    "puzzle_analysis": {"model": SONNET_MODEL, "max_tokens": 1024, "temperature": 0.3, "timeout": 30},
+    # Daily riddle/puzzle generation (scheduler only, latency is irrelevant)
+    "content_concept": {"model": SONNET_MODEL, "max_tokens": 1024, "temperature": 0.9, "timeout": 120},
+    "content_draft": {"model": SONNET_MODEL, "max_tokens": 1024, "temperature": 0.7, "timeout": 120},
+    "content_components": {"model": SONNET_MODEL, "max_tokens": 1024, "temperature": 0.5, "timeout": 120},
+}
+
+PROFILE_FIELDS = {"model": str, "max_tokens": int, "temperature": float, "timeout": float, "hedge_after": float}
+
+# Fields a profile may leave out
+PROFILE_FIELD_DEFAULTS = {"hedge_after": 0.0}
+
+class CallProfile:
+    """Settings and usage counters for one named call site"""
+
+    def __init__(self, name: str, model: str, max_tokens: int, temperature: float, timeout: float, hedge_after: float = 0.0):
+        self.name = name
+        self.model = model
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.timeout = timeout
+        self.hedge_after = hedge_after
+        self.calls = 0
+        self.errors = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cache_read_tokens = 0
+        self.cache_write_tokens = 0
+        self.total_latency_ms = 0.0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def record(self, latency_ms: float, input_tokens: int = 0, output_tokens: int = 0, error: bool = False,
+               cache_read_tokens: int = 0, cache_write_tokens: int = 0):
+        self.calls += 1
+        self.total_latency_ms += latency_ms
+        self.latencies.append(latency_ms)
+        if error:
+            self.errors += 1
+        else:
+            self.input_tokens += input_tokens
+            self.output_tokens += output_tokens
+            self.cache_read_tokens += cache_read_tokens
+            self.cache_write_tokens += cache_write_tokens
+
+    def get_stats(self) -> Dict[str, Any]:
+        recent = sorted(self.latencies)
+        return {
+            "model": self.model,
+            "maxTokens": self.max_tokens,
+            "temperature": self.temperature,
+            "timeout": self.timeout,
+            "hedgeAfter": self.hedge_after,
+            "calls": self.calls,
+            "errors": self.errors,
+            "inputTokens": self.input_tokens,
+            "outputTokens": self.output_tokens,
+            "cacheReadTokens": self.cache_read_tokens,
+            "cacheWriteTokens": self.cache_write_tokens,
+            "avgLatencyMs": self.total_latency_ms / self.calls if self.calls else 0.0,
+            "p50LatencyMs": recent[len(recent) // 2] if recent else 0.0,
+            "p95LatencyMs": recent[min(len(recent) - 1, int(len(recent) * 0.95))] if recent else 0.0
+        }
+
+def _load_overrides() -> Dict[str, Dict[str, Any]]:
+    """Read profile overrides from LLM_PROFILES_FILE and LLM_PROFILE_* variables"""
+    overrides: Dict[str, Dict[str, Any]] = {}
+
+    path = os.getenv("LLM_PROFILES_FILE")
+    if path:
+        try:
+            with open(path) as f:
+                overrides = {name: dict(values) for name, values in json.load(f).items()}
+        except Exception as e:
+            print(f"Could not load LLM profiles from {path}: {e}")
+
+    for name in set(DEFAULT_PROFILES) | set(overrides):
+        for field in PROFILE_FIELDS:
+            value = os.getenv(f"LLM_PROFILE_{name.upper()}_{field.upper()}")
+            if value is not None:
+                overrides.setdefault(name, {})[field] = value
+
+    return overrides
+
+def _build_profiles() -> Dict[str, CallProfile]:
+    profiles = {}
+    overrides = _load_overrides()
+    for name in set(DEFAULT_PROFILES) | set(overrides):
+        settings = {**PROFILE_FIELD_DEFAULTS, **DEFAULT_PROFILES.get(name, DEFAULT_PROFILES["guidance"]), **overrides.get(name, {})}
+        try:
+            values = {field: cast(settings[field]) for field, cast in PROFILE_FIELDS.items()}
+        except (KeyError, ValueError) as e:
+            print(f"Invalid LLM profile '{name}' ({e}), using defaults")
+            values = {**PROFILE_FIELD_DEFAULTS, **DEFAULT_PROFILES.get(name, DEFAULT_PROFILES["guidance"])}
+        profiles[name] = CallProfile(name, **values)
+    return profiles
+
+# Global profile registry
+profiles: Dict[str, CallProfile] = _build_profiles()
+
+def get_profile(name: str) -> CallProfile:
+    """Get a call profile by name, falling back to the guidance profile for unknown names"""
+    profile = profiles.get(name)
+    if profile is None:
+        print(f"Unknown LLM profile '{name}', using 'guidance'")
+        profile = profiles["guidance"]
+    return profile
+
+def get_profile_stats() -> Dict[str, Any]:
+    """Get settings, latency and token usage for every profile"""
+    return {name: profile.get_stats() for name, profile in sorted(profiles.items())}
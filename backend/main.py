@@ -1,30 +1,59 @@
 from fastapi import FastAPI, HTTPException, Depends, Response, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, EmailStr
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, EmailStr, ValidationError
 import json
+import base64
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta, timezone
-from passlib.context import CryptContext
 from jose import JWTError, jwt
 import os
+import secrets
 from dotenv import load_dotenv
 from bson import ObjectId
-import pytz
+from pymongo import ReturnDocument
+from pymongo.errors import OperationFailure
 
 # Load environment variables - handle both local and production environments
 load_dotenv()
 
 # Import database functions - hybrid import for local/production compatibility
 try:
-    from backend.database import connect_to_mongo, close_mongo_connection, get_database
+    from backend.database import connect_to_mongo, close_mongo_connection, get_database, get_collection, insert_or_conflict
+    from backend.llm_client import close_llm_client, get_llm_client_stats, get_circuit_breaker_stats
+    from backend.answer_cache import get_answer_cache_stats
+    from backend.similarity_index import get_similarity_stats
+    from backend.llm_profiles import get_profile_stats
+    from backend.structured_output import get_parse_stats
+    from backend.rate_limits import get_rate_limit_stats
+    from backend.interaction_log import drain_interaction_log, get_interaction_log_stats
+    from backend.indexes import ensure_indexes, get_index_report
+    from backend.user_cache import get_cached_user, cache_user, invalidate_user, get_user_cache_stats
+    from backend.password_hashing import hash_password, verify_and_update_password, close_password_hasher, get_password_hash_stats, PasswordHashBusy
+    from backend.daily_content import get_daily_content, start_daily_content_sync, stop_daily_content_sync, get_daily_content_stats, pacific_today
+    from backend.content_resolver import migrate_content_ids, get_content_resolver_stats, MONGO_AUTO_MIGRATE
+    from backend.gameplay_cache import get_gameplay_context, record_exchange, mark_solved, evict_gameplay_context, get_gameplay_cache_stats
 except ImportError:
-    from database import connect_to_mongo, close_mongo_connection, get_database
+    from database import connect_to_mongo, close_mongo_connection, get_database, get_collection, insert_or_conflict
+    from llm_client import close_llm_client, get_llm_client_stats, get_circuit_breaker_stats
+    from answer_cache import get_answer_cache_stats
+    from similarity_index import get_similarity_stats
+    from llm_profiles import get_profile_stats
+    from structured_output import get_parse_stats
+    from rate_limits import get_rate_limit_stats
+    from interaction_log import drain_interaction_log, get_interaction_log_stats
+    from indexes import ensure_indexes, get_index_report
+    from user_cache import get_cached_user, cache_user, invalidate_user, get_user_cache_stats
+    from password_hashing import hash_password, verify_and_update_password, close_password_hasher, get_password_hash_stats, PasswordHashBusy
+    from daily_content import get_daily_content, start_daily_content_sync, stop_daily_content_sync, get_daily_content_stats, pacific_today
+    from content_resolver import migrate_content_ids, get_content_resolver_stats, MONGO_AUTO_MIGRATE
+    from gameplay_cache import get_gameplay_context, record_exchange, mark_solved, evict_gameplay_context, get_gameplay_cache_stats
 
 # Import AI service functions - hybrid import for local/production compatibility
 try:
-    from backend.ai_service import get_ai_response, get_ai_summary, analyze_self_awareness, generate_action_options, refine_action, get_next_action_planning_question, get_next_cause_analysis_question, get_fear_analysis_options, get_riddle_question_response, evaluate_riddle_solution_with_ai, get_claude_response, triage_classify_input, semantic_match_component, verify_solution, analyze_puzzle_submission
+    from backend.ai_service import get_ai_response, get_ai_summary, analyze_self_awareness, generate_action_options, refine_action, get_next_action_planning_question, get_next_cause_analysis_question, get_fear_analysis_options, get_riddle_question_response, evaluate_riddle_solution_with_ai, get_claude_response, triage_classify_input, semantic_match_component, verify_solution, analyze_puzzle_submission, get_riddle_batch_stats, stream_ai_response, stream_ai_summary, PROMPTS
 except ImportError:
-    from ai_service import get_ai_response, get_ai_summary, analyze_self_awareness, generate_action_options, refine_action, get_next_action_planning_question, get_next_cause_analysis_question, get_fear_analysis_options, get_riddle_question_response, evaluate_riddle_solution_with_ai, get_claude_response, triage_classify_input, semantic_match_component, verify_solution, analyze_puzzle_submission
+    from ai_service import get_ai_response, get_ai_summary, analyze_self_awareness, generate_action_options, refine_action, get_next_action_planning_question, get_next_cause_analysis_question, get_fear_analysis_options, get_riddle_question_response, evaluate_riddle_solution_with_ai, get_claude_response, triage_classify_input, semantic_match_component, verify_solution, analyze_puzzle_submission, get_riddle_batch_stats, stream_ai_response, stream_ai_summary, PROMPTS
 # Import riddle models - hybrid import for local/production compatibility
 try:
     from backend.models import DailyRiddle, RiddleSession, RiddleQuestion, DailyScenario, ScenarioSession, ScenarioDecision
@@ -47,9 +76,8 @@ app = FastAPI()
 SECRET_KEY = os.getenv("SECRET_KEY", "fallback_secret_key_for_development_only")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
-
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Shared secret for the internal endpoints (X-Internal-Token header); unset disables them
+INTERNAL_METRICS_TOKEN = os.getenv("INTERNAL_METRICS_TOKEN", "")
 
 # CORS configuration - more secure for production
 origins = [
@@ -257,6 +285,27 @@ class SessionRead(BaseModel):
     puzzle_id: Optional[str] = None
     scenario_id: Optional[str] = None
 
+class SessionPatchFields(SessionCreate):
+    # Patchable fields that are not part of a new session
+    summary_header: Optional[str] = None
+
+class SessionPatch(BaseModel):
+    # field -> new value ($set)
+    set: Optional[Dict[str, Any]] = None
+    # list field -> items to append ($push)
+    push: Optional[Dict[str, List[Any]]] = None
+    # If given, the patch only applies while the session is at this version
+    expected_version: Optional[int] = None
+
+class SessionPatchResponse(BaseModel):
+    success: bool
+    id: str
+    version: int
+
+class SessionPage(BaseModel):
+    sessions: List[Dict[str, Any]]
+    next_cursor: Optional[str] = None
+
 class UnifiedSessionCreate(BaseModel):
     session_type: str
     user_id: str
@@ -278,31 +327,48 @@ async def get_user_by_email(email: str):
     user = await db.users.find_one({"email": email})
     return user
 
+async def get_user_by_id(user_id: str):
+    """Get user by id from MongoDB"""
+    if not ObjectId.is_valid(user_id):
+        return None
+    db = get_database()
+    return await db.users.find_one({"_id": ObjectId(user_id)}, {"email": 1})
+
 async def create_user(email: str, password: str):
-    """Create new user in MongoDB"""
-    hashed_password = get_password_hash(password)
+    """Create new user in MongoDB, or return None if the email is already registered"""
     db = get_database()
-    
-    # Check if user already exists
-    existing_user = await get_user_by_email(email)
-    if existing_user:
+    # Cheap indexed check first so a known email does not cost a bcrypt hash
+    if await db.users.find_one({"email": email}, {"_id": 1}):
         return None
-    
+    hashed_password = await hash_password(password)
     user_doc = {
         "email": email,
         "hashed_password": hashed_password,
         "created_at": datetime.utcnow()
     }
     
-    result = await db.users.insert_one(user_doc)
-    return str(result.inserted_id)
+    # The unique index on users.email still rejects an email registered concurrently
+    inserted, user_id = await insert_or_conflict(db.users, user_doc)
+    if not inserted:
+        return None
+    return str(user_id)
 
 # Authentication helper functions
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
-
-def get_password_hash(password):
-    return pwd_context.hash(password)
+async def verify_password(user: dict, plain_password: str) -> bool:
+    """Check a user's password off the event loop, upgrading the stored hash if its cost changed"""
+    valid, new_hash = await verify_and_update_password(plain_password, user["hashed_password"])
+    if valid and new_hash:
+        db = get_database()
+        await db.users.update_one({"_id": user["_id"]}, {"$set": {"hashed_password": new_hash}})
+    return valid
+
+def password_hash_busy() -> HTTPException:
+    """503 returned when the password hashing pool is saturated"""
+    return HTTPException(
+        status_code=503,
+        detail="Too many sign-in attempts right now, please try again shortly",
+        headers={"Retry-After": "1"}
+    )
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -314,30 +380,60 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(request: Request):
-    """Get current user from JWT token"""
+def get_token_claims(request: Request) -> Optional[dict]:
+    """Decode the access token cookie, or None if it is missing or invalid"""
     token = request.cookies.get("access_token")
     if not token:
         return None
     
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+
+async def get_current_user(request: Request):
+    """Get current user from JWT token"""
+    payload = get_token_claims(request)
+    if payload is None:
+        return None
+    
+    user_id: Optional[str] = payload.get("uid")
+    if user_id:
+        # Fast path: the token names the user, so a cached user needs no database read
+        cached_user = get_cached_user(user_id)
+        if cached_user is not None:
+            return cached_user
+        user = await get_user_by_id(user_id)
+    else:
+        # Tokens issued before the uid claim only carry the email
         email: str = payload.get("sub")
         if email is None:
             return None
-    except JWTError:
-        return None
+        user = await get_user_by_email(email)
     
-    user = await get_user_by_email(email)
     if user is None:
         return None
     
-    return User(id=str(user["_id"]), email=user["email"])
+    current_user = User(id=str(user["_id"]), email=user["email"])
+    cache_user(current_user.id, current_user)
+    return current_user
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize database connection and scheduler on application startup"""
     await connect_to_mongo()
+    # Build any missing indexes before the first query needs them
+    try:
+        await ensure_indexes()
+    except Exception as e:
+        print(f"Index check failed: {e}")
+    # Normalize stored riddle/puzzle ids once, so content lookups are a single _id hit
+    if MONGO_AUTO_MIGRATE:
+        try:
+            await migrate_content_ids()
+        except Exception as e:
+            print(f"Content id migration failed: {e}")
+    await start_daily_content_sync()
     # Start the scheduler for daily content generation
     start_scheduler()
     
@@ -352,6 +448,11 @@ async def startup_event():
 async def shutdown_event():
     """Close database connection and stop scheduler on application shutdown"""
     stop_scheduler()
+    await stop_daily_content_sync()
+    await close_llm_client()
+    close_password_hasher()
+    # Write buffered AI interactions before the connection goes away
+    await drain_interaction_log()
     await close_mongo_connection()
     print("✓ Application shutdown complete")
 
@@ -372,20 +473,18 @@ def extract_summary_header(ai_summary: Optional[dict], pain_point: str) -> str:
 # Authentication Endpoints
 @app.post("/api/auth/register", response_model=AuthResponse)
 async def register(user_data: UserCreate, response: Response):
-    # Check if user already exists
-    existing_user = await get_user_by_email(user_data.email)
-    if existing_user:
-        return AuthResponse(success=False, error="Email already registered")
-    
-    # Create new user
-    user_id = await create_user(user_data.email, user_data.password)
+    # Create new user (a single insert; the unique email index catches existing accounts)
+    try:
+        user_id = await create_user(user_data.email, user_data.password)
+    except PasswordHashBusy:
+        raise password_hash_busy()
     if user_id is None:
-        return AuthResponse(success=False, error="Failed to create user")
+        return AuthResponse(success=False, error="Email already registered")
     
     # Create access token
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user_data.email}, expires_delta=access_token_expires
+        data={"sub": user_data.email, "uid": user_id}, expires_delta=access_token_expires
     )
     
     # Set secure cookie
@@ -399,19 +498,23 @@ async def register(user_data: UserCreate, response: Response):
     )
     
     user = User(id=user_id, email=user_data.email)
+    cache_user(user_id, user)
     return AuthResponse(success=True, user=user)
 
 @app.post("/api/auth/login", response_model=AuthResponse)
 async def login(user_data: UserLogin, response: Response):
     # Verify user credentials
     user = await get_user_by_email(user_data.email)
-    if not user or not verify_password(user_data.password, user["hashed_password"]):
-        return AuthResponse(success=False, error="Invalid email or password")
+    try:
+        if not user or not await verify_password(user, user_data.password):
+            return AuthResponse(success=False, error="Invalid email or password")
+    except PasswordHashBusy:
+        raise password_hash_busy()
     
     # Create access token
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user_data.email}, expires_delta=access_token_expires
+        data={"sub": user_data.email, "uid": str(user["_id"])}, expires_delta=access_token_expires
     )
     
     # Set secure cookie
@@ -425,6 +528,7 @@ async def login(user_data: UserLogin, response: Response):
     )
     
     user_obj = User(id=str(user["_id"]), email=user["email"])
+    cache_user(user_obj.id, user_obj)
     return AuthResponse(success=True, user=user_obj)
 
 @app.get("/api/auth/status", response_model=AuthResponse)
@@ -436,7 +540,12 @@ async def auth_status(request: Request):
         return AuthResponse(success=False, error="Not authenticated")
 
 @app.post("/api/auth/logout", response_model=AuthResponse)
-async def logout(response: Response):
+async def logout(request: Request, response: Response):
+    # The token stays valid until it expires, but this worker stops serving its cached user
+    payload = get_token_claims(request)
+    if payload and payload.get("uid"):
+        invalidate_user(payload["uid"])
+    
     response.delete_cookie(
         key="access_token",
         httponly=True,
@@ -452,8 +561,6 @@ async def create_session(session: SessionCreate, request: Request):
     current_user = await get_current_user(request)
     user_id = current_user.id if current_user else None
     
-    db = get_database()
-    
     # Extract summary header from AI summary or create fallback
     summary_header = extract_summary_header(session.ai_summary, session.pain_point or "")
     
@@ -481,27 +588,30 @@ async def create_session(session: SessionCreate, request: Request):
         "user_id": user_id,
         "riddle_id": session.riddle_id,
         "scenario_id": session.scenario_id,
+        "version": 0,
     }
     
-    result = await db.sessions.insert_one(session_doc)
+    result = await get_collection("sessions", "session_create").insert_one(session_doc)
     session_id = str(result.inserted_id)
     
-    return SessionRead(
-        id=session_id,
-        created_at=session_doc["created_at"].isoformat(),
-        session_type=session.session_type,
-        pain_point=session.pain_point,
-        issue_tree=issue_tree,
-        assumptions=session.assumptions,
-        perpetuations=session.perpetuations,
-        solutions=session.solutions,
-        fears=session.fears,
-        action_plan=session.action_plan,
-        ai_summary=session.ai_summary,
-        summary_header=summary_header,
-        riddle_id=session.riddle_id,
-        scenario_id=session.scenario_id,
-    )
+    # A plain dict: the response model validates it once, while serializing
+    return {
+        "id": session_id,
+        "created_at": session_doc["created_at"].isoformat(),
+        "session_type": session_doc["session_type"],
+        "pain_point": session_doc["pain_point"],
+        "issue_tree": session_doc["issue_tree"],
+        "assumptions": session_doc["assumptions"],
+        "perpetuations": session_doc["perpetuations"],
+        "solutions": session_doc["solutions"],
+        "fears": session_doc["fears"],
+        "action_plan": session_doc["action_plan"],
+        "ai_summary": session_doc["ai_summary"],
+        "summary_header": summary_header,
+        "riddle_id": session_doc["riddle_id"],
+        "puzzle_id": None,
+        "scenario_id": session_doc["scenario_id"],
+    }
 
 @app.get("/api/sessions", response_model=List[SessionRead])
 async def get_sessions(request: Request):
@@ -518,34 +628,113 @@ async def get_sessions(request: Request):
     
     sessions = []
     async for session_doc in cursor:
-        # Skip documents without a valid _id (defensive programming for migration issues)
-        if not session_doc.get("_id"):
-            print(f"Skipping session document without _id: {session_doc}")
-            continue
-            
-        try:
-            sessions.append(SessionRead(
-                id=str(session_doc["_id"]),
-                created_at=session_doc.get("created_at", datetime.utcnow()).isoformat(),
-                session_type=session_doc.get("session_type", "problem-solver"),
-                pain_point=session_doc.get("pain_point", "No pain point recorded"),
-                issue_tree=IssueTree(**session_doc.get("issue_tree")) if session_doc.get("issue_tree") else None,
-                assumptions=session_doc.get("assumptions", []),
-                perpetuations=session_doc.get("perpetuations", []),
-                solutions=session_doc.get("solutions", []),
-                fears=[Fear(**fear) for fear in session_doc.get("fears", [])],
-                action_plan=session_doc.get("action_plan", ""),
-                ai_summary=session_doc.get("ai_summary"),
-                summary_header=session_doc.get("summary_header"),
-                riddle_id=session_doc.get("riddle_id"),
-                scenario_id=session_doc.get("scenario_id"),
-            ))
-        except Exception as e:
-            print(f"Skipping malformed session document {session_doc.get('_id')}: {e}")
-            continue
+        session = session_doc_to_read(session_doc)
+        if session is not None:
+            sessions.append(session)
     
     return sessions
 
+# Keyset pagination for session listings
+SESSION_PAGE_DEFAULT = 20
+SESSION_PAGE_MAX = 100
+SESSION_LIST_FIELDS = set(SessionRead.model_fields) - {"id"}
+
+def session_doc_to_read(session_doc: dict) -> Optional[SessionRead]:
+    """Build a SessionRead from a (possibly projected) session document, or None if it is malformed"""
+    # Skip documents without a valid _id (defensive programming for migration issues)
+    if not session_doc.get("_id"):
+        print(f"Skipping session document without _id: {session_doc}")
+        return None
+    
+    try:
+        return SessionRead(
+            id=str(session_doc["_id"]),
+            created_at=(session_doc.get("created_at") or datetime.utcnow()).isoformat(),
+            session_type=session_doc.get("session_type", "problem-solver"),
+            pain_point=session_doc.get("pain_point", "No pain point recorded"),
+            issue_tree=IssueTree(**session_doc.get("issue_tree")) if session_doc.get("issue_tree") else None,
+            assumptions=session_doc.get("assumptions", []),
+            perpetuations=session_doc.get("perpetuations", []),
+            solutions=session_doc.get("solutions", []),
+            fears=[Fear(**fear) for fear in session_doc.get("fears", [])],
+            action_plan=session_doc.get("action_plan", ""),
+            ai_summary=session_doc.get("ai_summary"),
+            summary_header=session_doc.get("summary_header"),
+            riddle_id=session_doc.get("riddle_id"),
+            puzzle_id=session_doc.get("puzzle_id"),
+            scenario_id=session_doc.get("scenario_id"),
+        )
+    except Exception as e:
+        print(f"Skipping malformed session document {session_doc.get('_id')}: {e}")
+        return None
+
+def encode_session_cursor(session_doc: dict) -> str:
+    """Opaque cursor pointing just past a session in (created_at, _id) descending order"""
+    created_at = session_doc.get("created_at")
+    position = {"t": created_at.isoformat() if created_at else None, "id": str(session_doc["_id"])}
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode().rstrip("=")
+
+def decode_session_cursor(cursor: str) -> dict:
+    """Query clause selecting the sessions after a cursor"""
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        last_id = ObjectId(position["id"])
+        created_at = datetime.fromisoformat(position["t"]) if position["t"] else None
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    if created_at is None:
+        # Sessions without created_at sort last; only the _id tie-breaker is left
+        return {"created_at": None, "_id": {"$lt": last_id}}
+    return {"$or": [
+        {"created_at": {"$lt": created_at}},
+        {"created_at": created_at, "_id": {"$lt": last_id}},
+        {"created_at": None},
+    ]}
+
+@app.get("/api/v1/sessions", response_model=SessionPage)
+async def list_sessions(request: Request, limit: int = SESSION_PAGE_DEFAULT, cursor: Optional[str] = None, fields: Optional[str] = None):
+    """
+    Lists the current user's sessions, newest first, one page at a time.
+    
+    Pass next_cursor back as cursor to get the following page (it is null on
+    the last page). fields is a comma-separated list of session fields to
+    return (id is always included), e.g. fields=summary_header,session_type,created_at.
+    """
+    current_user = await get_current_user(request)
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    
+    limit = max(1, min(limit, SESSION_PAGE_MAX))
+    projection = None
+    include = None
+    if fields:
+        include = {field.strip() for field in fields.split(",") if field.strip()}
+        unknown = include - SESSION_LIST_FIELDS
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown session fields: {', '.join(sorted(unknown))}")
+        # created_at is always read because the cursor is built from it
+        projection = {field: 1 for field in include | {"created_at"}}
+    
+    query: Dict[str, Any] = {"user_id": current_user.id}
+    if cursor:
+        query.update(decode_session_cursor(cursor))
+    
+    db = get_database()
+    # Fetch one extra document to know whether another page follows
+    docs = await db.sessions.find(query, projection).sort([("created_at", -1), ("_id", -1)]).limit(limit + 1).to_list(length=limit + 1)
+    
+    sessions = []
+    for session_doc in docs[:limit]:
+        session = session_doc_to_read(session_doc)
+        if session is not None:
+            sessions.append(session.model_dump(include=include | {"id"}) if include else session.model_dump())
+    
+    return SessionPage(
+        sessions=sessions,
+        next_cursor=encode_session_cursor(docs[limit - 1]) if len(docs) > limit else None
+    )
+
 @app.get("/api/sessions/{session_id}", response_model=SessionRead)
 async def get_session(session_id: str, request: Request):
     current_user = await get_current_user(request)
@@ -583,6 +772,107 @@ async def get_session(session_id: str, request: Request):
         scenario_id=session_doc.get("scenario_id"),
     )
 
+# Fields a PATCH may $set, and the list fields it may $push to
+SESSION_PATCH_SET_FIELDS = {"pain_point", "causes", "assumptions", "perpetuations", "solutions", "fears", "action_plan", "ai_summary", "summary_header"}
+SESSION_PATCH_PUSH_FIELDS = {"assumptions", "perpetuations", "solutions", "fears"}
+
+def build_session_update(patch: SessionPatch) -> Dict[str, Any]:
+    """Validate a PATCH body against SessionPatchFields and turn it into a Mongo update"""
+    set_fields = patch.set or {}
+    push_fields = patch.push or {}
+    unknown = (set(set_fields) - SESSION_PATCH_SET_FIELDS) | (set(push_fields) - SESSION_PATCH_PUSH_FIELDS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Fields cannot be patched: {', '.join(sorted(unknown))}")
+    overlap = set(set_fields) & set(push_fields)
+    if overlap:
+        raise HTTPException(status_code=400, detail=f"Fields both set and pushed: {', '.join(sorted(overlap))}")
+    if not set_fields and not push_fields:
+        raise HTTPException(status_code=400, detail="Empty patch")
+    
+    try:
+        # SessionPatchFields validates the values (e.g. fears must be Fear objects)
+        validated = SessionPatchFields(**set_fields).model_dump(include=set(set_fields))
+        pushed = SessionPatchFields(**push_fields).model_dump(include=set(push_fields))
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False))
+    
+    if "causes" in validated:
+        # Stored as issue_tree, as in create_session
+        causes = validated.pop("causes")
+        validated["issue_tree"] = IssueTree(primary_cause=causes[0], sub_causes=causes[1:]).model_dump() if causes else None
+    if "ai_summary" in validated and "summary_header" not in validated:
+        ai_summary = validated["ai_summary"]
+        if isinstance(ai_summary, dict) and ai_summary.get("title"):
+            validated["summary_header"] = extract_summary_header(ai_summary, "")
+    
+    update: Dict[str, Any] = {
+        "$set": {**validated, "updated_at": datetime.utcnow()},
+        "$inc": {"version": 1},
+    }
+    if pushed:
+        update["$push"] = {field: {"$each": items} for field, items in pushed.items()}
+    return update
+
+@app.patch("/api/sessions/{session_id}", response_model=SessionPatchResponse)
+async def patch_session(session_id: str, patch: SessionPatch, request: Request):
+    """
+    Applies a field-level update to a session, so autosave can send only what changed.
+    
+    set replaces fields, push appends to list fields (assumptions, perpetuations,
+    solutions, fears). With expected_version the update only applies if nobody
+    else saved in between; otherwise it fails with 409 and the current version.
+    Anonymous callers can only patch sessions that belong to no user.
+    """
+    current_user = await get_current_user(request)
+    
+    db = get_database()
+    
+    try:
+        object_id = ObjectId(session_id)
+    except:
+        raise HTTPException(status_code=400, detail="Invalid session ID")
+    
+    update = build_session_update(patch)
+    
+    # Users can only update their own sessions, and anonymous callers only anonymous ones
+    query: Dict[str, Any] = {"_id": object_id, "user_id": current_user.id if current_user else None}
+    versioned_query = dict(query)
+    if patch.expected_version is not None:
+        # Sessions saved before versioning have no version field and count as version 0
+        versioned_query["version"] = {"$in": [0, None]} if patch.expected_version == 0 else patch.expected_version
+    
+    sessions = get_collection("sessions", "session_patch")
+    try:
+        result = await sessions.find_one_and_update(
+            versioned_query,
+            update,
+            projection={"version": 1},
+            return_document=ReturnDocument.AFTER
+        )
+    except OperationFailure:
+        if "$push" not in update:
+            raise
+        # $push fails on a list field stored as null; store those as empty lists and retry
+        for field in update["$push"]:
+            await sessions.update_one({**query, field: None}, {"$set": {field: []}})
+        result = await sessions.find_one_and_update(
+            versioned_query,
+            update,
+            projection={"version": 1},
+            return_document=ReturnDocument.AFTER
+        )
+    evict_gameplay_context(session_id)
+    if result is None:
+        current = await db.sessions.find_one(query, {"version": 1})
+        if current is None:
+            raise HTTPException(status_code=404, detail="Session not found")
+        raise HTTPException(
+            status_code=409,
+            detail={"error": "Session was modified", "version": current.get("version", 0)}
+        )
+    
+    return SessionPatchResponse(success=True, id=session_id, version=result["version"])
+
 @app.delete("/api/sessions/{session_id}")
 async def delete_session(session_id: str, request: Request):
     """Delete a session"""
@@ -603,6 +893,7 @@ async def delete_session(session_id: str, request: Request):
     
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Session not found")
+    evict_gameplay_context(session_id)
     
     return {"success": True, "message": "Session deleted successfully"}
 
@@ -733,6 +1024,10 @@ async def ai_assist(request: AIAssistRequest, current_request: Request):
     if not request.sessionId or not request.stage or not request.sessionContext:
         raise HTTPException(status_code=400, detail="sessionId, stage, and sessionContext are required")
     
+    # The stage names the prompt and keys the stage's rate limit counter
+    if request.stage not in PROMPTS:
+        raise HTTPException(status_code=400, detail="Unknown stage")
+    
     # userInput can be empty for identify_assumptions stage
     if not request.userInput and request.stage != 'identify_assumptions':
         raise HTTPException(status_code=400, detail="userInput is required for this stage")
@@ -792,6 +1087,59 @@ async def ai_summary(request: AISummaryRequest, current_request: Request):
         print(f"Summary generation error: {e}")
         raise HTTPException(status_code=500, detail={"success": False, "error": "Internal Server Error"})
 
+def _sse_response(events) -> StreamingResponse:
+    """Send AI stream events to the client as server-sent events"""
+    async def event_source():
+        async for event in events:
+            yield f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/api/ai/assist/stream")
+async def ai_assist_stream(request: AIAssistRequest, current_request: Request):
+    """Streaming variant of /api/ai/assist - sends tokens as server-sent events as they are generated"""
+    current_user = await get_current_user(current_request)
+    user_id = current_user.id if current_user else "anonymous"
+    
+    if not request.sessionId or not request.stage or not request.sessionContext:
+        raise HTTPException(status_code=400, detail="sessionId, stage, and sessionContext are required")
+    
+    if request.stage not in PROMPTS:
+        raise HTTPException(status_code=400, detail="Unknown stage")
+    
+    if not request.userInput and request.stage != 'identify_assumptions':
+        raise HTTPException(status_code=400, detail="userInput is required for this stage")
+    
+    return _sse_response(stream_ai_response(
+        user_id=user_id,
+        session_id=request.sessionId,
+        stage=request.stage,
+        user_input=request.userInput,
+        session_context=request.sessionContext,
+        force_guidance=request.forceGuidance
+    ))
+
+@app.post("/api/ai/summary/stream")
+async def ai_summary_stream(request: AISummaryRequest, current_request: Request):
+    """Streaming variant of /api/ai/summary - sends the summary as server-sent events as it is generated"""
+    current_user = await get_current_user(current_request)
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Authentication required")
+    
+    if not request.sessionId or not request.sessionData:
+        raise HTTPException(status_code=400, detail="sessionId and sessionData are required")
+    
+    return _sse_response(stream_ai_summary(
+        user_id=current_user.id,
+        session_id=request.sessionId,
+        session_data=request.sessionData,
+        ai_interaction_log=request.aiInteractionLog or []
+    ))
+
 @app.get("/api/ai/usage/{session_id}")
 async def get_ai_usage(session_id: str, current_request: Request):
     """Get AI usage statistics for a session"""
@@ -995,63 +1343,97 @@ class DailyRiddleResponse(BaseModel):
     id: str
     riddle_text: str
     date: str
+
+class DailyContentStatus(BaseModel):
     is_solved: bool = False
     solved_session_id: Optional[str] = None
 
-@app.get("/api/v1/riddles/daily")
-async def get_daily_riddle(request: Request):
-    """Fetches the current day's riddle (Pacific timezone) with solved status."""
-    db = get_database()
+def daily_content_headers(kind: str, doc: dict) -> Dict[str, str]:
+    """
+    ETag and Cache-Control for a piece of daily content (the same for every user).
+    
+    Content can be replaced before the day ends (generate-now overwrites it), so
+    caches must revalidate every time; a matching ETag makes that a cheap 304.
+    """
+    return {
+        "ETag": f'"{kind}-{doc["_id"]}-{doc["date"]}"',
+        "Cache-Control": "public, no-cache"
+    }
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header names etag (weak comparison, as for GET)"""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in [candidate[2:] if candidate.startswith("W/") else candidate for candidate in candidates]
+
+def daily_content_unavailable(kind: str, today: str) -> HTTPException:
+    """503 for daily content that is not generated yet (never cached)"""
+    return HTTPException(
+        status_code=503,
+        detail={
+            "error": f"Today's {kind} is not yet available",
+            "message": f"The daily {kind} is generated at midnight Pacific Time. Please check back soon!",
+            "date": today
+        },
+        headers={"Cache-Control": "no-store"}
+    )
+
+async def get_daily_solved_status(kind: str, request: Request, response: Response) -> DailyContentStatus:
+    """Whether the current user has solved today's riddle or puzzle (per user, never cached)"""
+    response.headers["Cache-Control"] = "private, no-store"
     current_user = await get_current_user(request)
+    if not current_user:
+        # For anonymous users, the solved state is kept in localStorage by the frontend
+        return DailyContentStatus()
+    
+    content = await get_daily_content(kind)
+    if not content:
+        return DailyContentStatus()
     
-    # Get today's date in Pacific Time (handles PST/PDT automatically)
-    pacific_tz = pytz.timezone('America/Los_Angeles')
-    now_pacific = datetime.now(pacific_tz)
-    today = now_pacific.strftime("%Y-%m-%d")
+    db = get_database()
+    solved_session = await db.sessions.find_one({
+        "session_type": f"daily-{kind}",
+        "user_id": current_user.id,
+        f"{kind}_id": str(content["_id"]),
+        "solved": True
+    }, {"_id": 1})
+    if not solved_session:
+        return DailyContentStatus()
+    return DailyContentStatus(is_solved=True, solved_session_id=str(solved_session["_id"]))
+
+@app.get("/api/v1/riddles/daily", response_model=DailyRiddleResponse)
+async def get_daily_riddle(request: Request, response: Response):
+    """
+    Fetches the current day's riddle (Pacific timezone).
     
-    riddle = await db.riddles.find_one({"date": today})
+    The response is the same for every user and revalidated with its ETag;
+    the per-user solved state is at /api/v1/riddles/daily/status.
+    """
+    # Today's riddle from the in-process daily content cache
+    today = pacific_today()
+    riddle = await get_daily_content("riddle", today)
     
     if not riddle:
         # No riddle exists for today - this should only happen if the scheduler hasn't run yet
-        # Return an error to indicate the riddle isn't ready
-        raise HTTPException(
-            status_code=503,
-            detail={
-                "error": "Today's riddle is not yet available",
-                "message": "The daily riddle is generated at midnight Pacific Time. Please check back soon!",
-                "date": today
-            }
-        )
-    
-    # Check if user has solved today's riddle
-    is_solved = False
-    solved_session_id = None
+        raise daily_content_unavailable("riddle", today)
     
-    if current_user:
-        # Look for a solved session for this riddle and user
-        solved_session = await db.sessions.find_one({
-            "session_type": "daily-riddle",
-            "user_id": current_user.id,
-            "riddle_id": str(riddle["_id"]),
-            "solved": True
-        })
-        
-        if solved_session:
-            is_solved = True
-            solved_session_id = str(solved_session["_id"])
-    else:
-        # For anonymous users, check localStorage key (handled on frontend)
-        # We'll return the riddle info and let frontend handle the solved state
-        pass
+    headers = daily_content_headers("riddle", riddle)
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
     
+    response.headers.update(headers)
     return DailyRiddleResponse(
         id=str(riddle["_id"]),
         riddle_text=riddle["riddle_text"],
-        date=riddle["date"],
-        is_solved=is_solved,
-        solved_session_id=solved_session_id
+        date=riddle["date"]
     )
 
+@app.get("/api/v1/riddles/daily/status", response_model=DailyContentStatus)
+async def get_daily_riddle_status(request: Request, response: Response):
+    """Whether the current user has solved today's riddle, and in which session."""
+    return await get_daily_solved_status("riddle", request, response)
+
 @app.post("/api/v1/riddles/generate-now")
 async def generate_riddle_manually():
     """
@@ -1069,67 +1451,43 @@ class DailyPuzzleResponse(BaseModel):
     id: str
     puzzle_text: str
     date: str
-    is_solved: bool = False
-    solved_session_id: Optional[str] = None
     total_components: int = 0
     puzzle_components: Optional[List[str]] = []
 
-@app.get("/api/v1/puzzles/daily")
-async def get_daily_puzzle(request: Request):
-    """Fetches the current day's lateral thinking puzzle (Pacific timezone) with solved status."""
-    db = get_database()
-    current_user = await get_current_user(request)
-    
-    # Get today's date in Pacific Time (handles PST/PDT automatically)
-    pacific_tz = pytz.timezone('America/Los_Angeles')
-    now_pacific = datetime.now(pacific_tz)
-    today = now_pacific.strftime("%Y-%m-%d")
+@app.get("/api/v1/puzzles/daily", response_model=DailyPuzzleResponse)
+async def get_daily_puzzle(request: Request, response: Response):
+    """
+    Fetches the current day's lateral thinking puzzle (Pacific timezone).
     
-    puzzle = await db.puzzles.find_one({"date": today})
+    The response is the same for every user and revalidated with its ETag;
+    the per-user solved state is at /api/v1/puzzles/daily/status.
+    """
+    # Today's puzzle from the in-process daily content cache
+    today = pacific_today()
+    puzzle = await get_daily_content("puzzle", today)
     
     if not puzzle:
         # No puzzle exists for today - this should only happen if the scheduler hasn't run yet
-        # Return an error to indicate the puzzle isn't ready
-        raise HTTPException(
-            status_code=503,
-            detail={
-                "error": "Today's puzzle is not yet available",
-                "message": "The daily puzzle is generated at midnight Pacific Time. Please check back soon!",
-                "date": today
-            }
-        )
+        raise daily_content_unavailable("puzzle", today)
     
-    # Check if user has solved today's puzzle
-    is_solved = False
-    solved_session_id = None
-    
-    if current_user:
-        # Look for a solved session for this puzzle and user
-        solved_session = await db.sessions.find_one({
-            "session_type": "daily-puzzle",
-            "user_id": current_user.id,
-            "puzzle_id": str(puzzle["_id"]),
-            "solved": True
-        })
-        
-        if solved_session:
-            is_solved = True
-            solved_session_id = str(solved_session["_id"])
-    else:
-        # For anonymous users, check localStorage key (handled on frontend)
-        # We'll return the puzzle info and let frontend handle the solved state
-        pass
+    headers = daily_content_headers("puzzle", puzzle)
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
     
+    response.headers.update(headers)
     return DailyPuzzleResponse(
         id=str(puzzle["_id"]),
         puzzle_text=puzzle["puzzle_text"],
         date=puzzle["date"],
-        is_solved=is_solved,
-        solved_session_id=solved_session_id,
         total_components=len(puzzle.get("puzzle_components", [])),
         puzzle_components=puzzle.get("puzzle_components", [])
     )
 
+@app.get("/api/v1/puzzles/daily/status", response_model=DailyContentStatus)
+async def get_daily_puzzle_status(request: Request, response: Response):
+    """Whether the current user has solved today's puzzle, and in which session."""
+    return await get_daily_solved_status("puzzle", request, response)
+
 @app.post("/api/v1/puzzles/generate-now")
 async def generate_puzzle_manually():
     """
@@ -1177,27 +1535,16 @@ class RiddleSubmissionResponse(BaseModel):
 @app.post("/api/v1/riddles/sessions/{session_id}/question", response_model=RiddleQuestionResponse)
 async def process_riddle_question(session_id: str, request: RiddleQuestionRequest):
     """Processes a user's yes/no question about the riddle using AI."""
-    db = get_database()
-    
-    # Get the session to find the riddle_id
+    # Get the session's riddle to find the solution
     try:
-        session = await db.sessions.find_one({"_id": ObjectId(session_id)})
-        if not session:
+        context = await get_gameplay_context(session_id, "riddle")
+        if not context:
             raise HTTPException(status_code=404, detail="Session not found")
         
-        riddle_id = session.get("riddle_id")
-        if not riddle_id:
+        if not context["content_id"]:
             raise HTTPException(status_code=400, detail="No riddle associated with this session")
         
-        # Get the riddle to find the solution
-        # Note: riddle_id might be stored as a string (UUID) or ObjectId, so try both
-        riddle = await db.riddles.find_one({"_id": riddle_id}) if isinstance(riddle_id, str) else await db.riddles.find_one({"_id": ObjectId(riddle_id)})
-        
-        # If not found by _id, try finding by date (for daily riddles)
-        if not riddle:
-            from datetime import datetime
-            today = datetime.utcnow().strftime("%Y-%m-%d")
-            riddle = await db.riddles.find_one({"date": today})
+        riddle = context["content"]
         
         if not riddle:
             raise HTTPException(status_code=404, detail="Riddle not found")
@@ -1205,7 +1552,8 @@ async def process_riddle_question(session_id: str, request: RiddleQuestionReques
         # Use AI to determine the response
         ai_result = await get_riddle_question_response(
             question=request.question_text,
-            riddle_solution=riddle["solution"]
+            riddle_solution=riddle["solution"],
+            riddle_id=str(riddle["_id"])
         )
         
         return RiddleQuestionResponse(response=ai_result["response"])
@@ -1224,34 +1572,16 @@ class RiddleSolutionResponse(BaseModel):
 @app.post("/api/v1/riddles/sessions/{session_id}/solution", response_model=RiddleSolutionResponse)
 async def evaluate_riddle_solution(session_id: str, request: RiddleSolutionRequest):
     """Evaluates a user's proposed solution to the riddle using AI for semantic matching."""
-    db = get_database()
-    
     try:
         # Get session
-        session = await db.sessions.find_one({"_id": ObjectId(session_id)})
-        if not session:
+        context = await get_gameplay_context(session_id, "riddle")
+        if not context:
             raise HTTPException(status_code=404, detail="Session not found")
 
-        riddle_id = session.get("riddle_id")
-        if not riddle_id:
+        if not context["content_id"]:
             raise HTTPException(status_code=400, detail="No riddle associated with this session")
 
-        # Get riddle - try multiple lookup methods
-        riddle = None
-        if isinstance(riddle_id, str):
-            # Try as string UUID first
-            riddle = await db.riddles.find_one({"_id": riddle_id})
-            if not riddle:
-                # Try as ObjectId
-                try:
-                    riddle = await db.riddles.find_one({"_id": ObjectId(riddle_id)})
-                except:
-                    pass
-        
-        # Fallback: try finding by today's date
-        if not riddle:
-            today = datetime.utcnow().strftime("%Y-%m-%d")
-            riddle = await db.riddles.find_one({"date": today})
+        riddle = context["content"]
         
         if not riddle:
             raise HTTPException(status_code=404, detail="Riddle not found")
@@ -1278,31 +1608,16 @@ async def process_riddle_submission(session_id: str, request: RiddleSubmissionRe
     Step 1: Check if submission is a correct statement/question about the riddle
     Step 2: Verify if the submission is the complete correct answer
     """
-    db = get_database()
-    
     try:
         # Get session and riddle
-        session = await db.sessions.find_one({"_id": ObjectId(session_id)})
-        if not session:
+        context = await get_gameplay_context(session_id, "riddle")
+        if not context:
             raise HTTPException(status_code=404, detail="Session not found")
 
-        riddle_id = session.get("riddle_id")
-        if not riddle_id:
+        if not context["content_id"]:
             raise HTTPException(status_code=400, detail="No riddle associated with this session")
 
-        # Get riddle - try multiple lookup methods
-        riddle = None
-        if isinstance(riddle_id, str):
-            riddle = await db.riddles.find_one({"_id": riddle_id})
-            if not riddle:
-                try:
-                    riddle = await db.riddles.find_one({"_id": ObjectId(riddle_id)})
-                except:
-                    pass
-        
-        if not riddle:
-            today = datetime.utcnow().strftime("%Y-%m-%d")
-            riddle = await db.riddles.find_one({"date": today})
+        riddle = context["content"]
         
         if not riddle:
             raise HTTPException(status_code=404, detail="Riddle not found")
@@ -1319,7 +1634,8 @@ async def process_riddle_submission(session_id: str, request: RiddleSubmissionRe
         
         correctness_result = await get_riddle_question_response(
             question=submission_text,
-            riddle_solution=solution
+            riddle_solution=solution,
+            riddle_id=str(riddle["_id"])
         )
         
         is_statement_correct = correctness_result["response"] == "Yes"
@@ -1334,7 +1650,8 @@ async def process_riddle_submission(session_id: str, request: RiddleSubmissionRe
             submission_text,
             solution,
             [],  # No components in single-answer system
-            []   # No solved components
+            [],  # No solved components
+            riddle_id=str(riddle["_id"])
         )
         
         is_correct = verification_result.get("is_correct", False)
@@ -1345,13 +1662,7 @@ async def process_riddle_submission(session_id: str, request: RiddleSubmissionRe
         # Determine final response
         if is_correct:
             # Mark the session as completely solved
-            await db.sessions.update_one(
-                {"_id": ObjectId(session_id)},
-                {"$set": {
-                    "solved": True,
-                    "solved_at": datetime.utcnow()
-                }}
-            )
+            await mark_solved(session_id, context)
             
             print(f"\n[RIDDLE SOLVED]: Session marked as complete")
             
@@ -1400,31 +1711,16 @@ async def process_puzzle_submission(session_id: str, request: RiddleSubmissionRe
     
     Uses the new analyze_puzzle_submission function for context-aware, intelligent responses.
     """
-    db = get_database()
-    
     try:
         # Get session and puzzle
-        session = await db.sessions.find_one({"_id": ObjectId(session_id)})
-        if not session:
+        context = await get_gameplay_context(session_id, "puzzle")
+        if not context:
             raise HTTPException(status_code=404, detail="Session not found")
 
-        puzzle_id = session.get("puzzle_id")
-        if not puzzle_id:
+        if not context["content_id"]:
             raise HTTPException(status_code=400, detail="No puzzle associated with this session")
 
-        # Get puzzle - try multiple lookup methods
-        puzzle = None
-        if isinstance(puzzle_id, str):
-            puzzle = await db.puzzles.find_one({"_id": puzzle_id})
-            if not puzzle:
-                try:
-                    puzzle = await db.puzzles.find_one({"_id": ObjectId(puzzle_id)})
-                except:
-                    pass
-        
-        if not puzzle:
-            today = datetime.utcnow().strftime("%Y-%m-%d")
-            puzzle = await db.puzzles.find_one({"date": today})
+        puzzle = context["content"]
         
         if not puzzle:
             raise HTTPException(status_code=404, detail="Puzzle not found")
@@ -1434,9 +1730,9 @@ async def process_puzzle_submission(session_id: str, request: RiddleSubmissionRe
         puzzle_components = puzzle.get("puzzle_components", [])
         solution_context = puzzle.get("solution_context", [])
         
-        # Get solved components and conversation history from session
-        solved_components = session.get("solved_components", [])
-        conversation_history = session.get("conversation_history", [])
+        # Solved components and recent conversation history from the session
+        solved_components = list(context["solved_components"])
+        conversation_history = list(context["history"])
         
         print(f"\n=== PROCESSING PUZZLE SUBMISSION (Phase 2) ===")
         print(f"User Input: '{submission_text}'")
@@ -1467,25 +1763,16 @@ async def process_puzzle_submission(session_id: str, request: RiddleSubmissionRe
         print(f"  Message: {analysis_result.get('message')}")
         print(f"  Reasoning: {analysis_result.get('reasoning')}")
         
-        # Update conversation history
-        conversation_history.append({"role": "user", "text": submission_text})
-        conversation_history.append({"role": "assistant", "text": analysis_result.get("message", "")})
+        assistant_text = analysis_result.get("message", "")
         
         # Handle response based on type
         response_type = analysis_result.get("response_type")
         
         if response_type == "component_discovered":
-            # Component discovery - update session
+            # Component discovery - append the exchange and the component to the session
             component_index = analysis_result.get("component_index")
-            if component_index is not None and component_index not in solved_components:
-                solved_components.append(component_index)
-                await db.sessions.update_one(
-                    {"_id": ObjectId(session_id)},
-                    {"$set": {
-                        "solved_components": solved_components,
-                        "conversation_history": conversation_history
-                    }}
-                )
+            await record_exchange(session_id, context, submission_text, assistant_text, component_index)
+            solved_components = list(context["solved_components"])
             
             # Get icon/keyword for this component
             icon_keyword = None
@@ -1505,15 +1792,7 @@ async def process_puzzle_submission(session_id: str, request: RiddleSubmissionRe
             
         elif response_type == "solution_correct":
             # Complete solution - mark as solved
-            await db.sessions.update_one(
-                {"_id": ObjectId(session_id)},
-                {"$set": {
-                    "solved": True,
-                    "solved_at": datetime.utcnow(),
-                    "solved_components": list(range(len(puzzle_components))),
-                    "conversation_history": conversation_history
-                }}
-            )
+            await mark_solved(session_id, context, list(range(len(puzzle_components))), submission_text, assistant_text)
             
             print(f"\n[PUZZLE SOLVED]: Session marked as complete")
             
@@ -1529,10 +1808,7 @@ async def process_puzzle_submission(session_id: str, request: RiddleSubmissionRe
             
         elif response_type == "statement_correct":
             # Correct statement/question
-            await db.sessions.update_one(
-                {"_id": ObjectId(session_id)},
-                {"$set": {"conversation_history": conversation_history}}
-            )
+            await record_exchange(session_id, context, submission_text, assistant_text)
             
             print(f"\n[CORRECT STATEMENT]")
             
@@ -1546,10 +1822,7 @@ async def process_puzzle_submission(session_id: str, request: RiddleSubmissionRe
             
         else:  # statement_incorrect
             # Incorrect statement/question
-            await db.sessions.update_one(
-                {"_id": ObjectId(session_id)},
-                {"$set": {"conversation_history": conversation_history}}
-            )
+            await record_exchange(session_id, context, submission_text, assistant_text)
             
             print(f"\n[INCORRECT STATEMENT]")
             print(f"\n=== PUZZLE SUBMISSION COMPLETE ===\n")
@@ -1570,7 +1843,7 @@ async def process_puzzle_submission(session_id: str, request: RiddleSubmissionRe
 
 # Scenario Endpoints
 @app.get("/api/v1/scenarios/daily", response_model=DailyScenario)
-async def get_daily_scenario():
+async def get_daily_scenario(request: Request, response: Response):
     """Fetches the current day's scenario."""
     db = get_database()
     today = datetime.utcnow().strftime("%Y-%m-%d")
@@ -1595,6 +1868,11 @@ async def get_daily_scenario():
         await db.scenarios.insert_one(placeholder_scenario)
         scenario = await db.scenarios.find_one({"date": today})
 
+    headers = daily_content_headers("scenario", scenario)
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    
+    response.headers.update(headers)
     return DailyScenario(**scenario)
 
 class ScenarioDecisionRequest(BaseModel):
@@ -1648,8 +1926,6 @@ async def process_scenario_question(session_id: str, request: ScenarioQuestionRe
 @app.post("/api/v1/sessions", response_model=SessionRead)
 async def create_unified_session(session_data: UnifiedSessionCreate, request: Request):
     """Creates a new session for any module type."""
-    db = get_database()
-    
     # Get current user (optional for now to maintain compatibility)
     current_user = await get_current_user(request)
     user_id = current_user.id if current_user else session_data.user_id
@@ -1671,23 +1947,58 @@ async def create_unified_session(session_data: UnifiedSessionCreate, request: Re
         "action_plan": None,
         "ai_summary": None,
         "summary_header": None,
+        "version": 0,
     }
     
-    result = await db.sessions.insert_one(session_doc)
-    session_id = str(result.inserted_id)
-    
-    # Fetch the created document to return it
-    created_session = await db.sessions.find_one({"_id": result.inserted_id})
+    # One round trip: the response is built from the document as inserted, as a
+    # plain dict that the response model validates once while serializing
+    result = await get_collection("sessions", "session_create").insert_one(session_doc)
     
-    return SessionRead(
-        id=session_id,
-        created_at=created_session["created_at"].isoformat(),
-        session_type=created_session["session_type"],
-        user_id=created_session["user_id"],
-        riddle_id=created_session.get("riddle_id"),
-        puzzle_id=created_session.get("puzzle_id"),
-        scenario_id=created_session.get("scenario_id"),
-    )
+    return {
+        "id": str(result.inserted_id),
+        "created_at": session_doc["created_at"].isoformat(),
+        "session_type": session_doc["session_type"],
+        "pain_point": None,
+        "issue_tree": None,
+        "assumptions": [],
+        "perpetuations": [],
+        "solutions": [],
+        "fears": [],
+        "action_plan": None,
+        "ai_summary": None,
+        "summary_header": None,
+        "riddle_id": session_doc["riddle_id"],
+        "puzzle_id": session_doc["puzzle_id"],
+        "scenario_id": session_doc["scenario_id"],
+    }
+
+# Instrumentation Endpoints
+def require_internal_token(request: Request):
+    """Reject callers without the internal token, as if the endpoint did not exist"""
+    token = request.headers.get("X-Internal-Token", "")
+    if not INTERNAL_METRICS_TOKEN or not secrets.compare_digest(token.encode(), INTERNAL_METRICS_TOKEN.encode()):
+        raise HTTPException(status_code=404, detail="Not Found")
+
+@app.get("/api/internal/metrics", dependencies=[Depends(require_internal_token)])
+async def get_internal_metrics():
+    """Returns in-process performance counters for this worker (requires INTERNAL_METRICS_TOKEN)."""
+    return {
+        "llmClient": get_llm_client_stats(),
+        "llmProfiles": get_profile_stats(),
+        "circuitBreakers": get_circuit_breaker_stats(),
+        "answerCache": get_answer_cache_stats(),
+        "similarityIndex": get_similarity_stats(),
+        "riddleBatching": get_riddle_batch_stats(),
+        "structuredOutput": get_parse_stats(),
+        "rateLimits": get_rate_limit_stats(),
+        "interactionLog": get_interaction_log_stats(),
+        "indexes": get_index_report(),
+        "userCache": get_user_cache_stats(),
+        "passwordHashing": get_password_hash_stats(),
+        "dailyContent": get_daily_content_stats(),
+        "contentResolver": get_content_resolver_stats(),
+        "gameplayCache": get_gameplay_cache_stats(),
+    }
 
 # Analytics Endpoints
 @app.post("/api/v1/analytics/track")
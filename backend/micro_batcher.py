@@ -0,0 +1,75 @@
+"""
+Micro-Batcher
+Collects requests that share a key over a short window and hands them to a
+single batch handler, fanning the per-item results back to each waiting caller.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Set, Tuple
+
+class MicroBatcher:
+    """
+    Groups concurrent submissions by key.
+
+    A batch is flushed when its window elapses or when it reaches max_size,
+    whichever comes first. The handler receives the key and the list of items
+    and must return one result per item, in order.
+    """
+
+    def __init__(self, handler: Callable[[str, List[Any]], Awaitable[List[Any]]], window_ms: float = 100, max_size: int = 20):
+        self.handler = handler
+        self.window = window_ms / 1000
+        self.max_size = max_size
+        self.pending: Dict[str, List[Tuple[Any, asyncio.Future]]] = {}
+        self.timers: Dict[str, asyncio.TimerHandle] = {}
+        # Running batches; the event loop only keeps weak references to tasks
+        self.tasks: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.items = 0
+
+    async def submit(self, key: str, item: Any) -> Any:
+        """Queue an item and wait for its result"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self.pending.setdefault(key, [])
+        batch.append((item, future))
+
+        if len(batch) >= self.max_size:
+            self._flush(key)
+        elif len(batch) == 1:
+            self.timers[key] = loop.call_later(self.window, self._flush, key)
+
+        return await future
+
+    def _flush(self, key: str):
+        timer = self.timers.pop(key, None)
+        if timer:
+            timer.cancel()
+        batch = self.pending.pop(key, None)
+        if batch:
+            task = asyncio.ensure_future(self._run(key, batch))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def _run(self, key: str, batch: List[Tuple[Any, asyncio.Future]]):
+        self.batches += 1
+        self.items += len(batch)
+        try:
+            results = await self.handler(key, [item for item, _ in batch])
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "windowMs": self.window * 1000,
+            "maxSize": self.max_size,
+            "batches": self.batches,
+            "items": self.items,
+            "averageBatchSize": self.items / self.batches if self.batches else 0.0,
+            "pendingKeys": len(self.pending),
+            "runningBatches": len(self.tasks)
+        }
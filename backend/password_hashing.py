@@ -0,0 +1,133 @@
+"""
+Password Hashing Pool
+Runs bcrypt hashing and verification on a small dedicated thread pool instead
+of the event loop. A bcrypt call takes 100-300ms of CPU; inline, it stalls
+every other request on the worker for that long. bcrypt releases the GIL while
+it hashes, so threads are enough to keep the loop responsive.
+
+The pool has PASSWORD_HASH_WORKERS threads and queues at most
+PASSWORD_HASH_MAX_PENDING more calls. Beyond that calls fail fast with
+PasswordHashBusy instead of piling up, so a login storm is shed rather than
+turned into ever-growing latency.
+
+BCRYPT_ROUNDS sets the cost factor for new hashes. Hashes stored with a
+different cost still verify, and are re-hashed at the configured cost on the
+next successful login.
+"""
+import os
+import time
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, Tuple, Callable
+from passlib.context import CryptContext
+
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "16"))
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# Recent timings kept for percentile reporting
+TIMING_WINDOW = 200
+
+# Password hashing
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+class PasswordHashBusy(Exception):
+    """The hashing pool and its queue are full"""
+
+class PasswordHasher:
+    executor: Optional[ThreadPoolExecutor] = None
+    # Calls submitted and not finished yet (running + queued)
+    pending: int = 0
+    peak_pending: int = 0
+    # Completed calls; calls turned away because the pool was saturated are rejections
+    hashes: int = 0
+    verifications: int = 0
+    rehashes: int = 0
+    rejections: int = 0
+    wait_ms = deque(maxlen=TIMING_WINDOW)
+    run_ms = deque(maxlen=TIMING_WINDOW)
+
+# Global hashing pool
+hasher = PasswordHasher()
+
+async def _run(fn: Callable, *args) -> Any:
+    if hasher.pending >= PASSWORD_HASH_WORKERS + PASSWORD_HASH_MAX_PENDING:
+        hasher.rejections += 1
+        raise PasswordHashBusy(f"{hasher.pending} password hashes pending")
+    if hasher.executor is None:
+        hasher.executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+
+    submitted = time.perf_counter()
+
+    def timed():
+        started = time.perf_counter()
+        result = fn(*args)
+        return result, started, time.perf_counter()
+
+    hasher.pending += 1
+    hasher.peak_pending = max(hasher.peak_pending, hasher.pending)
+    try:
+        result, started, finished = await asyncio.get_running_loop().run_in_executor(hasher.executor, timed)
+    finally:
+        hasher.pending -= 1
+    hasher.wait_ms.append((started - submitted) * 1000)
+    hasher.run_ms.append((finished - started) * 1000)
+    return result
+
+async def hash_password(password: str) -> str:
+    """
+    Hash a password at the configured cost.
+
+    Raises:
+        PasswordHashBusy: The pool is saturated
+    """
+    hashed = await _run(pwd_context.hash, password)
+    hasher.hashes += 1
+    return hashed
+
+async def verify_and_update_password(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Check a password against its stored hash.
+
+    Returns:
+        Tuple of (valid, new_hash). new_hash is set when the stored hash uses
+        another cost factor and should be replaced.
+
+    Raises:
+        PasswordHashBusy: The pool is saturated
+    """
+    valid, new_hash = await _run(pwd_context.verify_and_update, password, hashed_password)
+    hasher.verifications += 1
+    if new_hash:
+        hasher.rehashes += 1
+    return valid, new_hash
+
+def close_password_hasher():
+    """Shut down the hashing threads"""
+    if hasher.executor is not None:
+        hasher.executor.shutdown(wait=False)
+        hasher.executor = None
+
+def _percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+def get_password_hash_stats() -> Dict[str, Any]:
+    """Get hashing pool saturation and timing statistics"""
+    return {
+        "workers": PASSWORD_HASH_WORKERS,
+        "maxPending": PASSWORD_HASH_MAX_PENDING,
+        "bcryptRounds": BCRYPT_ROUNDS,
+        "running": min(hasher.pending, PASSWORD_HASH_WORKERS),
+        "queued": max(hasher.pending - PASSWORD_HASH_WORKERS, 0),
+        "peakPending": hasher.peak_pending,
+        "saturation": min(hasher.pending, PASSWORD_HASH_WORKERS) / PASSWORD_HASH_WORKERS if PASSWORD_HASH_WORKERS else 0.0,
+        "hashes": hasher.hashes,
+        "verifications": hasher.verifications,
+        "rehashes": hasher.rehashes,
+        "rejections": hasher.rejections,
+        "avgWaitMs": sum(hasher.wait_ms) / len(hasher.wait_ms) if hasher.wait_ms else 0.0,
+        "p95WaitMs": _percentile(hasher.wait_ms, 0.95),
+        "avgHashMs": sum(hasher.run_ms) / len(hasher.run_ms) if hasher.run_ms else 0.0
+    }
@@ -3,101 +3,48 @@ Daily Lateral Thinking Puzzle Generation Service
 Generates unique multi-component narrative puzzles using the Storyteller's Framework
 """
 import os
-import json
 from typing import Dict, Any, List
 from datetime import datetime
 import pytz
 
 # Import database functions
 try:
-    from backend.database import get_database
+    from backend.database import get_database, insert_or_conflict
     from backend.ai_service import get_claude_response
+    from backend.daily_content import set_daily_content, publish_daily_content
+    from backend.content_resolver import forget_content
 except ImportError:
-    from database import get_database
+    from database import get_database, insert_or_conflict
     from ai_service import get_claude_response
+    from daily_content import set_daily_content, publish_daily_content
+    from content_resolver import forget_content
 
 # Define Pacific timezone
 PACIFIC_TZ = pytz.timezone('America/Los_Angeles')
 
 DIFFICULTY_LEVELS = ["Easy", "Medium", "Hard"]
 
-def clean_json_response(response_text: str) -> str:
-    """
-    Clean and prepare AI response text for JSON parsing.
-    Handles common issues like markdown code blocks and control characters.
-    """
-    import re
-    
-    # Remove markdown code blocks
-    if response_text.startswith('```json'):
-        response_text = response_text.replace('```json', '').replace('```', '').strip()
-    elif response_text.startswith('```'):
-        response_text = response_text.replace('```', '').strip()
-    
-    # Try to parse as-is first
-    try:
-        json.loads(response_text)
-        return response_text
-    except json.JSONDecodeError:
-        pass
-    
-    # Extract just the JSON object - find the first { and last }
-    first_brace = response_text.find('{')
-    last_brace = response_text.rfind('}')
-    
-    if first_brace != -1 and last_brace != -1 and last_brace > first_brace:
-        json_str = response_text[first_brace:last_brace + 1]
-    else:
-        json_str = response_text
-    
-    # AGGRESSIVE CLEANING: Replace ALL control characters and newlines
-    # This is a simpler, more reliable approach
-    cleaned_chars = []
-    in_string = False
-    prev_char = ''
-    
-    for i, char in enumerate(json_str):
-        # Track if we're inside a string value
-        if char == '"' and prev_char != '\\':
-            in_string = not in_string
-            cleaned_chars.append(char)
-            prev_char = char
-            continue
-        
-        # If we're inside a string, aggressively escape ALL control characters
-        if in_string:
-            char_code = ord(char)
-            if char_code < 32 or char_code == 127:  # Control characters
-                if char == '\n':
-                    cleaned_chars.append(' ')  # Replace newlines with spaces
-                elif char == '\r':
-                    continue  # Skip carriage returns
-                elif char == '\t':
-                    cleaned_chars.append(' ')  # Replace tabs with spaces
-                else:
-                    cleaned_chars.append(' ')  # Replace other control chars with spaces
-            else:
-                cleaned_chars.append(char)
-        else:
-            # Outside strings, preserve structure but clean up
-            if char in ['\n', '\r', '\t']:
-                cleaned_chars.append(' ')  # Replace with space for readability
-            else:
-                cleaned_chars.append(char)
-        
-        prev_char = char
-    
-    cleaned = ''.join(cleaned_chars)
-    
-    # Try parsing the cleaned version
-    try:
-        json.loads(cleaned)
-        return cleaned
-    except json.JSONDecodeError as e:
-        print(f"JSON parsing still failed after cleaning: {e}")
-        print(f"Cleaned JSON (first 300 chars): {cleaned[:300]}")
-        # Return the cleaned version anyway - it's the best we can do
-        return cleaned
+PUZZLE_CONCEPT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "theme": {"type": "string"},
+        "difficulty": {"type": "string"},
+        "scenario": {"type": "string"},
+        "hidden_context": {"type": "string"},
+        "puzzle_components": {"type": "array", "items": {"type": "string"}, "minItems": 1},
+        "logical_explanation": {"type": "string"}
+    },
+    "required": ["theme", "difficulty", "scenario", "hidden_context", "puzzle_components", "logical_explanation"]
+}
+
+PUZZLE_DRAFT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "puzzle_text": {"type": "string"},
+        "solution": {"type": "string"}
+    },
+    "required": ["puzzle_text", "solution"]
+}
 
 async def generate_core_concept(previous_puzzles: List[str]) -> Dict[str, Any]:
     """
@@ -252,12 +199,8 @@ All unusual details in the scenario must click together cleanly and satisfy the
 """
 
     try:
-        ai_result = await get_claude_response(concept_prompt, temperature=0.9)
-        response_text = ai_result['responseText'].strip()
-        
-        # Clean and parse JSON
-        cleaned_text = clean_json_response(response_text)
-        concept_data = json.loads(cleaned_text)
+        ai_result = await get_claude_response(concept_prompt, profile="content_concept", output_schema=PUZZLE_CONCEPT_SCHEMA, call_site="puzzle_concept")
+        concept_data = ai_result["data"]
         
         # Validate required fields
         required_fields = ["theme", "difficulty", "scenario", "hidden_context", "puzzle_components", "logical_explanation"]
@@ -345,12 +288,8 @@ Hard (Elevator):
 Generate your puzzle now. Remember: MYSTERIOUS, CLEAR, LOGICAL, SATISFYING. Return ONLY the JSON object."""
 
     try:
-        ai_result = await get_claude_response(puzzle_prompt, temperature=0.7)
-        response_text = ai_result['responseText'].strip()
-        
-        # Clean and parse JSON
-        cleaned_text = clean_json_response(response_text)
-        puzzle_data = json.loads(cleaned_text)
+        ai_result = await get_claude_response(puzzle_prompt, profile="content_draft", output_schema=PUZZLE_DRAFT_SCHEMA, call_site="puzzle_draft")
+        puzzle_data = ai_result["data"]
         
         # Validate required fields
         required_fields = ["puzzle_text", "solution"]
@@ -365,6 +304,15 @@ Generate your puzzle now. Remember: MYSTERIOUS, CLEAR, LOGICAL, SATISFYING. Retu
         raise
 
 
+PUZZLE_COMPONENTS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "puzzle_components": {"type": "array", "items": {"type": "string"}, "minItems": 1},
+        "solution_context": {"type": "array", "items": {"type": "string"}, "minItems": 1}
+    },
+    "required": ["puzzle_components", "solution_context"]
+}
+
 async def extract_puzzle_components(puzzle_text: str, solution: str, difficulty: str) -> Dict[str, Any]:
     """
     Step 3: Extract 1-5 distinct puzzle components for a LATERAL THINKING PUZZLE.
@@ -463,16 +411,8 @@ The solution_context should contain 5-10 keywords that semantically relate to th
 Extract the puzzle components now."""
 
     try:
-        ai_result = await get_claude_response(extraction_prompt, temperature=0.5)
-        response_text = ai_result['responseText'].strip()
-        
-        # Clean up JSON formatting
-        if response_text.startswith('```json'):
-            response_text = response_text.replace('```json', '').replace('```', '').strip()
-        elif response_text.startswith('```'):
-            response_text = response_text.replace('```', '').strip()
-        
-        component_data = json.loads(response_text)
+        ai_result = await get_claude_response(extraction_prompt, profile="content_components", output_schema=PUZZLE_COMPONENTS_SCHEMA, call_site="puzzle_components")
+        component_data = ai_result["data"]
         
         # Validate required fields
         required_fields = ["puzzle_components", "solution_context"]
@@ -588,16 +528,13 @@ async def store_daily_puzzle(puzzle_data: Dict[str, Any], force_overwrite: bool
     now_pacific = datetime.now(PACIFIC_TZ)
     today = now_pacific.strftime("%Y-%m-%d")
     
-    # Check if a puzzle already exists for today
-    existing_puzzle = await db.puzzles.find_one({"date": today})
-    if existing_puzzle:
-        if force_overwrite:
-            # Delete the existing puzzle to allow overwrite
+    if force_overwrite:
+        # Delete the existing puzzle to allow overwrite
+        existing_puzzle = await db.puzzles.find_one({"date": today})
+        if existing_puzzle:
             await db.puzzles.delete_one({"_id": existing_puzzle["_id"]})
+            forget_content("puzzle", existing_puzzle["_id"])
             print(f"Force overwrite: Deleted existing puzzle for {today}")
-        else:
-            print(f"Puzzle already exists for {today}, skipping storage")
-            return str(existing_puzzle["_id"])
     
     # Create the puzzle document
     puzzle_doc = {
@@ -610,9 +547,24 @@ async def store_daily_puzzle(puzzle_data: Dict[str, Any], force_overwrite: bool
         "created_at": datetime.utcnow()
     }
     
-    # Insert into database
-    result = await db.puzzles.insert_one(puzzle_doc)
-    puzzle_id = str(result.inserted_id)
+    # Insert into database; the unique index on date keeps the puzzle that is already there
+    for _ in range(2):
+        inserted, result = await insert_or_conflict(db.puzzles, puzzle_doc, {"date": today})
+        # result is None if the puzzle holding the date was deleted after the
+        # conflict (e.g. by a force overwrite); the date is free again, so retry
+        if inserted or result is not None:
+            break
+    if not inserted:
+        if result is None:
+            raise RuntimeError(f"Could not store the puzzle for {today}: the conflicting puzzle was deleted before it could be read")
+        print(f"Puzzle already exists for {today}, skipping storage")
+        set_daily_content("puzzle", result)
+        return str(result["_id"])
+    puzzle_id = str(result)
+    
+    # Serve it from this worker's cache and have the other workers reload
+    set_daily_content("puzzle", puzzle_doc)
+    await publish_daily_content("puzzle", today, puzzle_id)
     
     print(f"Stored new puzzle for {today} with ID: {puzzle_id}")
     return puzzle_id
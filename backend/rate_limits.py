@@ -0,0 +1,174 @@
+"""
+AI Rate Limit Counters
+Per-(session, stage) AI request counts, so a rate-limit check does not have to
+aggregate ai_interactions. A request claims its slot atomically before the LLM
+call (reserve_slot) and gives it back if the call fails (release_slot).
+
+Stores (RATE_LIMIT_STORE):
+- memory (default): per-worker LRU of session counts. Reservations are atomic
+  because nothing awaits between the check and the increment. Each worker
+  only sees the requests it handled itself after it loaded a session, so
+  multi-worker deployments that need exact limits should use the mongo store.
+- mongo: one `ai_usage_counters` document per session, reserved with a
+  conditional find_one_and_update and shared by every worker.
+
+A session the store has no counts for (new worker, evicted, or logged before
+the counters existed) is rebuilt once from ai_interactions.
+"""
+import os
+from collections import OrderedDict
+from typing import Dict, Any, Tuple
+from pymongo import ReturnDocument
+
+# Import database functions - hybrid import for local/production compatibility
+try:
+    from backend.database import get_database
+    from backend.interaction_log import pending_interactions
+except ImportError:
+    from database import get_database
+    from interaction_log import pending_interactions
+
+RATE_LIMIT_STORE = os.getenv("RATE_LIMIT_STORE", "memory").lower()
+RATE_LIMIT_MAX_SESSIONS = int(os.getenv("RATE_LIMIT_MAX_SESSIONS", "10000"))
+
+class RateLimitCounters:
+    sessions: "OrderedDict[str, Dict[str, int]]" = OrderedDict()
+    reads: int = 0
+    rebuilds: int = 0
+    reservations: int = 0
+    rejections: int = 0
+    releases: int = 0
+
+# Global counter state
+counters = RateLimitCounters()
+
+async def rebuild_stage_counts(session_id: str) -> Dict[str, int]:
+    """Count a session's logged interactions per stage from ai_interactions and the write-behind buffer"""
+    db = get_database()
+    counts: Dict[str, int] = {}
+    pipeline = [
+        {"$match": {"session_id": session_id}},
+        {"$group": {"_id": "$stage", "count": {"$sum": 1}}}
+    ]
+    async for result in db.ai_interactions.aggregate(pipeline):
+        counts[result["_id"]] = result["count"]
+    # Interactions still waiting in the write-behind buffer
+    for doc in pending_interactions(session_id):
+        counts[doc["stage"]] = counts.get(doc["stage"], 0) + 1
+    counters.rebuilds += 1
+    return counts
+
+def _remember(session_id: str, counts: Dict[str, int]) -> Dict[str, int]:
+    counters.sessions[session_id] = counts
+    counters.sessions.move_to_end(session_id)
+    while len(counters.sessions) > RATE_LIMIT_MAX_SESSIONS:
+        counters.sessions.popitem(last=False)
+    return counts
+
+def _stored_counts(doc: Dict[str, Any]) -> Dict[str, int]:
+    # Skips anything but counters (e.g. nested documents written for dotted stage names)
+    return {stage: count for stage, count in doc.get("stages", {}).items() if isinstance(count, int)}
+
+async def _mongo_stage_counts(session_id: str) -> Dict[str, int]:
+    db = get_database()
+    doc = await db.ai_usage_counters.find_one({"_id": session_id}, {"stages": 1})
+    if doc is not None:
+        return _stored_counts(doc)
+    counts = await rebuild_stage_counts(session_id)
+    # $setOnInsert keeps whatever another worker wrote first
+    await db.ai_usage_counters.update_one(
+        {"_id": session_id},
+        {"$setOnInsert": {"stages": counts}},
+        upsert=True
+    )
+    return counts
+
+async def get_stage_counts(session_id: str) -> Dict[str, int]:
+    """Get {stage: count} of AI requests (logged or in flight) for a session"""
+    counters.reads += 1
+    if RATE_LIMIT_STORE == "mongo":
+        return await _mongo_stage_counts(session_id)
+
+    counts = counters.sessions.get(session_id)
+    if counts is not None:
+        counters.sessions.move_to_end(session_id)
+        return counts
+    counts = await rebuild_stage_counts(session_id)
+    # Another request may have loaded (and incremented) the session meanwhile
+    existing = counters.sessions.get(session_id)
+    return existing if existing is not None else _remember(session_id, counts)
+
+def _stage_field(stage: str) -> str:
+    """The counter document field of a stage; stage names must be plain keys"""
+    if not stage or "." in stage or stage.startswith("$"):
+        raise ValueError(f"Invalid stage name: {stage!r}")
+    return f"stages.{stage}"
+
+async def _mongo_reserve(session_id: str, stage: str, limit: int) -> Tuple[bool, Dict[str, int]]:
+    db = get_database()
+    field = _stage_field(stage)
+    for _ in range(2):
+        # Matches only while the stage is under its limit, so check and increment are one atomic write
+        doc = await db.ai_usage_counters.find_one_and_update(
+            {"_id": session_id, field: {"$not": {"$gte": limit}}},
+            {"$inc": {field: 1}},
+            projection={"stages": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        if doc is not None:
+            return True, _stored_counts(doc)
+        # Either the stage is at its limit or the session has no counter document yet
+        counts = await _mongo_stage_counts(session_id)
+        if counts.get(stage, 0) >= limit:
+            return False, counts
+    return False, counts
+
+async def reserve_slot(session_id: str, stage: str, limit: int) -> Tuple[bool, Dict[str, int]]:
+    """
+    Claim one request for a session's stage if it is under limit.
+
+    The check and the increment are atomic, so concurrent requests cannot all
+    pass the check before any of them is counted. A claimed slot stays counted
+    (the interaction it leads to is the commit) unless release_slot gives it back.
+
+    Returns:
+        Tuple of (claimed, {stage: count} including the claim)
+    """
+    if RATE_LIMIT_STORE == "mongo":
+        claimed, counts = await _mongo_reserve(session_id, stage, limit)
+    else:
+        counts = await get_stage_counts(session_id)
+        # No await between the check and the increment
+        claimed = counts.get(stage, 0) < limit
+        if claimed:
+            counts[stage] = counts.get(stage, 0) + 1
+
+    if claimed:
+        counters.reservations += 1
+    else:
+        counters.rejections += 1
+    return claimed, counts
+
+async def release_slot(session_id: str, stage: str):
+    """Give back a slot claimed with reserve_slot whose request did not produce an interaction"""
+    counters.releases += 1
+    if RATE_LIMIT_STORE == "mongo":
+        field = _stage_field(stage)
+        await get_database().ai_usage_counters.update_one({"_id": session_id, field: {"$gt": 0}}, {"$inc": {field: -1}})
+        return
+
+    counts = counters.sessions.get(session_id)
+    if counts is not None and counts.get(stage, 0) > 0:
+        counts[stage] -= 1
+
+def get_rate_limit_stats() -> Dict[str, Any]:
+    """Get counter store statistics"""
+    return {
+        "store": RATE_LIMIT_STORE,
+        "cachedSessions": len(counters.sessions),
+        "reads": counters.reads,
+        "rebuilds": counters.rebuilds,
+        "reservations": counters.reservations,
+        "rejections": counters.rejections,
+        "releases": counters.releases
+    }
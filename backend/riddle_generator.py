@@ -3,101 +3,51 @@ Daily Riddle Generation Service
 Generates unique riddles using AI with varying difficulty and categories
 """
 import os
-import json
 from typing import Dict, Any, List
 from datetime import datetime
 import pytz
 
 # Import database functions
 try:
-    from backend.database import get_database
+    from backend.database import get_database, insert_or_conflict
     from backend.ai_service import get_claude_response
+    from backend.answer_cache import invalidate_riddle_answers
+    from backend.similarity_index import drop_similarity_index
+    from backend.daily_content import set_daily_content, publish_daily_content
+    from backend.content_resolver import forget_content
 except ImportError:
-    from database import get_database
+    from database import get_database, insert_or_conflict
     from ai_service import get_claude_response
+    from answer_cache import invalidate_riddle_answers
+    from similarity_index import drop_similarity_index
+    from daily_content import set_daily_content, publish_daily_content
+    from content_resolver import forget_content
 
 # Define Pacific timezone
 PACIFIC_TZ = pytz.timezone('America/Los_Angeles')
 
 DIFFICULTY_LEVELS = ["Easy", "Medium", "Hard"]
 
-def clean_json_response(response_text: str) -> str:
-    """
-    Clean and prepare AI response text for JSON parsing.
-    Handles common issues like markdown code blocks and control characters.
-    """
-    import re
-    
-    # Remove markdown code blocks
-    if response_text.startswith('```json'):
-        response_text = response_text.replace('```json', '').replace('```', '').strip()
-    elif response_text.startswith('```'):
-        response_text = response_text.replace('```', '').strip()
-    
-    # Try to parse as-is first
-    try:
-        json.loads(response_text)
-        return response_text
-    except json.JSONDecodeError:
-        pass
-    
-    # Extract just the JSON object - find the first { and last }
-    first_brace = response_text.find('{')
-    last_brace = response_text.rfind('}')
-    
-    if first_brace != -1 and last_brace != -1 and last_brace > first_brace:
-        json_str = response_text[first_brace:last_brace + 1]
-    else:
-        json_str = response_text
-    
-    # AGGRESSIVE CLEANING: Replace ALL control characters and newlines
-    # This is a simpler, more reliable approach
-    cleaned_chars = []
-    in_string = False
-    prev_char = ''
-    
-    for i, char in enumerate(json_str):
-        # Track if we're inside a string value
-        if char == '"' and prev_char != '\\':
-            in_string = not in_string
-            cleaned_chars.append(char)
-            prev_char = char
-            continue
-        
-        # If we're inside a string, aggressively escape ALL control characters
-        if in_string:
-            char_code = ord(char)
-            if char_code < 32 or char_code == 127:  # Control characters
-                if char == '\n':
-                    cleaned_chars.append(' ')  # Replace newlines with spaces
-                elif char == '\r':
-                    continue  # Skip carriage returns
-                elif char == '\t':
-                    cleaned_chars.append(' ')  # Replace tabs with spaces
-                else:
-                    cleaned_chars.append(' ')  # Replace other control chars with spaces
-            else:
-                cleaned_chars.append(char)
-        else:
-            # Outside strings, preserve structure but clean up
-            if char in ['\n', '\r', '\t']:
-                cleaned_chars.append(' ')  # Replace with space for readability
-            else:
-                cleaned_chars.append(char)
-        
-        prev_char = char
-    
-    cleaned = ''.join(cleaned_chars)
-    
-    # Try parsing the cleaned version
-    try:
-        json.loads(cleaned)
-        return cleaned
-    except json.JSONDecodeError as e:
-        print(f"JSON parsing still failed after cleaning: {e}")
-        print(f"Cleaned JSON (first 300 chars): {cleaned[:300]}")
-        # Return the cleaned version anyway - it's the best we can do
-        return cleaned
+RIDDLE_CONCEPT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "theme": {"type": "string"},
+        "difficulty": {"type": "string", "enum": DIFFICULTY_LEVELS},
+        "answer": {"type": "string"},
+        "properties": {"type": "array", "items": {"type": "string"}, "minItems": 1},
+        "logical_explanation": {"type": "string"}
+    },
+    "required": ["theme", "difficulty", "answer", "properties", "logical_explanation"]
+}
+
+RIDDLE_DRAFT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "riddle_text": {"type": "string"},
+        "solution": {"type": "string"}
+    },
+    "required": ["riddle_text", "solution"]
+}
 
 async def generate_core_concept(previous_riddles: List[str]) -> Dict[str, Any]:
     """
@@ -180,12 +130,8 @@ Hard:
 Generate a completely new, unique concept now."""
 
     try:
-        ai_result = await get_claude_response(concept_prompt, temperature=0.9)
-        response_text = ai_result['responseText'].strip()
-        
-        # Clean and parse JSON
-        cleaned_text = clean_json_response(response_text)
-        concept_data = json.loads(cleaned_text)
+        ai_result = await get_claude_response(concept_prompt, profile="content_concept", output_schema=RIDDLE_CONCEPT_SCHEMA, call_site="riddle_concept")
+        concept_data = ai_result["data"]
         
         # Validate required fields
         required_fields = ["theme", "difficulty", "answer", "properties", "logical_explanation"]
@@ -274,12 +220,8 @@ Hard (Silence):
 Generate your riddle now. Remember: SHORT, POETIC, METAPHORICAL. Return ONLY the JSON object."""
 
     try:
-        ai_result = await get_claude_response(riddle_prompt, temperature=0.7)
-        response_text = ai_result['responseText'].strip()
-        
-        # Clean and parse JSON
-        cleaned_text = clean_json_response(response_text)
-        riddle_data = json.loads(cleaned_text)
+        ai_result = await get_claude_response(riddle_prompt, profile="content_draft", output_schema=RIDDLE_DRAFT_SCHEMA, call_site="riddle_draft")
+        riddle_data = ai_result["data"]
         
         # Validate required fields
         required_fields = ["riddle_text", "solution"]
@@ -294,6 +236,15 @@ Generate your riddle now. Remember: SHORT, POETIC, METAPHORICAL. Return ONLY the
         raise
 
 
+RIDDLE_COMPONENTS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "answer": {"type": "string"},
+        "solution_context": {"type": "array", "items": {"type": "string"}, "minItems": 1}
+    },
+    "required": ["answer", "solution_context"]
+}
+
 async def extract_solution_components(riddle_text: str, solution: str, difficulty: str) -> Dict[str, Any]:
     """
     Step 3: Extract the single answer for a POETIC RIDDLE.
@@ -332,16 +283,8 @@ The solution_context should contain 5-10 keywords that semantically relate to th
 Extract the answer and keywords now."""
 
     try:
-        ai_result = await get_claude_response(extraction_prompt, temperature=0.5)
-        response_text = ai_result['responseText'].strip()
-        
-        # Clean up JSON formatting
-        if response_text.startswith('```json'):
-            response_text = response_text.replace('```json', '').replace('```', '').strip()
-        elif response_text.startswith('```'):
-            response_text = response_text.replace('```', '').strip()
-        
-        component_data = json.loads(response_text)
+        ai_result = await get_claude_response(extraction_prompt, profile="content_components", output_schema=RIDDLE_COMPONENTS_SCHEMA, call_site="riddle_components")
+        component_data = ai_result["data"]
         
         # Validate required fields
         required_fields = ["answer", "solution_context"]
@@ -455,16 +398,15 @@ async def store_daily_riddle(riddle_data: Dict[str, Any], force_overwrite: bool
     now_pacific = datetime.now(PACIFIC_TZ)
     today = now_pacific.strftime("%Y-%m-%d")
     
-    # Check if a riddle already exists for today
-    existing_riddle = await db.riddles.find_one({"date": today})
-    if existing_riddle:
-        if force_overwrite:
-            # Delete the existing riddle to allow overwrite
+    if force_overwrite:
+        # Delete the existing riddle to allow overwrite
+        existing_riddle = await db.riddles.find_one({"date": today})
+        if existing_riddle:
             await db.riddles.delete_one({"_id": existing_riddle["_id"]})
+            await invalidate_riddle_answers(str(existing_riddle["_id"]))
+            drop_similarity_index("riddle", str(existing_riddle["_id"]))
+            forget_content("riddle", existing_riddle["_id"])
             print(f"Force overwrite: Deleted existing riddle for {today}")
-        else:
-            print(f"Riddle already exists for {today}, skipping storage")
-            return str(existing_riddle["_id"])
     
     # Create the riddle document
     riddle_doc = {
@@ -477,9 +419,24 @@ async def store_daily_riddle(riddle_data: Dict[str, Any], force_overwrite: bool
         "created_at": datetime.utcnow()
     }
     
-    # Insert into database
-    result = await db.riddles.insert_one(riddle_doc)
-    riddle_id = str(result.inserted_id)
+    # Insert into database; the unique index on date keeps the riddle that is already there
+    for _ in range(2):
+        inserted, result = await insert_or_conflict(db.riddles, riddle_doc, {"date": today})
+        # result is None if the riddle holding the date was deleted after the
+        # conflict (e.g. by a force overwrite); the date is free again, so retry
+        if inserted or result is not None:
+            break
+    if not inserted:
+        if result is None:
+            raise RuntimeError(f"Could not store the riddle for {today}: the conflicting riddle was deleted before it could be read")
+        print(f"Riddle already exists for {today}, skipping storage")
+        set_daily_content("riddle", result)
+        return str(result["_id"])
+    riddle_id = str(result)
+    
+    # Serve it from this worker's cache and have the other workers reload
+    set_daily_content("riddle", riddle_doc)
+    await publish_daily_content("riddle", today, riddle_id)
     
     print(f"Stored new riddle for {today} with ID: {riddle_id}")
     return riddle_id
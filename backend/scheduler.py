@@ -12,9 +12,11 @@ import pytz
 try:
     from backend.riddle_generator import generate_and_store_daily_riddle
     from backend.puzzle_generator import generate_and_store_daily_puzzle
+    from backend.daily_content import refresh_daily_content
 except ImportError:
     from riddle_generator import generate_and_store_daily_riddle
     from puzzle_generator import generate_and_store_daily_puzzle
+    from daily_content import refresh_daily_content
 
 # Create scheduler instance
 scheduler = AsyncIOScheduler()
@@ -58,6 +60,12 @@ async def daily_content_job():
             
     except Exception as e:
         print(f"✗ Error in daily puzzle generation: {e}")
+    
+    # Switch this worker's cache to the new day's content
+    try:
+        await refresh_daily_content()
+    except Exception as e:
+        print(f"✗ Error refreshing daily content cache: {e}")
 
 def start_scheduler():
     """
@@ -0,0 +1,142 @@
+"""
+Reworded Question Index
+In-process index of answered questions per riddle, keyed by a normalized form
+of the question, so a trivially reworded question ("was it a murder?" vs
+"Was it murder", "isn't it alive?" vs "is it not alive?") can reuse a stored
+verdict instead of calling the LLM.
+
+Matching is deliberately exact on the normalized key: a wrong yes/no answer
+is worse than an LLM call, and in a riddle a single changed word (usually the
+noun being guessed) changes the verdict. Normalization only drops articles
+and filler words ("a kind of", "something") and spells out negated
+contractions; every other word, its form and the word order must match, so
+real paraphrases ("is it a living thing?" vs "is it alive?") and misspellings
+still go to the model.
+
+Puzzle verdicts are not indexed: they depend on the session's conversation
+history and solved components, not only on the question.
+
+Indexes are built incrementally as verdicts come back from the model.
+"""
+import os
+import re
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
+
+SIMILARITY_MAX_ENTRIES_PER_INDEX = int(os.getenv("SIMILARITY_MAX_ENTRIES_PER_INDEX", "2000"))
+SIMILARITY_MAX_INDEXES = int(os.getenv("SIMILARITY_MAX_INDEXES", "32"))
+
+# Only words that never change a yes/no verdict. Auxiliaries ("is"/"was",
+# "can"/"does"), pronouns and prepositions carry tense, subject and relation,
+# so they stay in the key.
+STOPWORDS = {
+    "a", "an", "the", "of", "thing", "something", "kind", "type"
+}
+
+# Words that flip the meaning of a yes/no question; the key keeps which ones
+# were used but not where, so "isn't it" and "is it not" agree
+NEGATIONS = {"not", "no", "never", "none", "nothing", "without"}
+
+# Negated contractions whose stem is not the word minus "n't"
+CONTRACTIONS = {"can't": "can", "cannot": "can", "won't": "will", "shan't": "shall"}
+
+def question_key(question: str) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """
+    Normalize a question into its lookup key.
+
+    Returns:
+        (sorted negation words, remaining words in order)
+    """
+    negations = []
+    words = []
+    for token in re.findall(r"[a-z0-9']+", question.lower()):
+        if token in NEGATIONS:
+            negations.append(token)
+        elif token in CONTRACTIONS:
+            negations.append("not")
+            words.append(CONTRACTIONS[token])
+        elif token.endswith("n't"):
+            negations.append("not")
+            words.append(token[:-3])
+        elif token not in STOPWORDS:
+            words.append(token)
+    return tuple(sorted(negations)), tuple(words)
+
+class SimilarityIndex:
+    """Normalized question -> verdict for one riddle"""
+
+    def __init__(self, max_entries: int = SIMILARITY_MAX_ENTRIES_PER_INDEX):
+        self.max_entries = max_entries
+        self.entries: Dict[Tuple[Tuple[str, ...], Tuple[str, ...]], Dict[str, Any]] = {}
+        self.lookups = 0
+        self.hits = 0
+
+    def add(self, question: str, verdict: Dict[str, Any]):
+        key = question_key(question)
+        if not key[1] or (len(self.entries) >= self.max_entries and key not in self.entries):
+            return
+        self.entries[key] = verdict
+
+    def lookup(self, question: str) -> Optional[Dict[str, Any]]:
+        self.lookups += 1
+        verdict = self.entries.get(question_key(question))
+        if verdict is not None:
+            self.hits += 1
+        return verdict
+
+# Per-content indexes, least recently used evicted first
+_indexes: "OrderedDict[Tuple[str, str], SimilarityIndex]" = OrderedDict()
+
+def _get_index(kind: str, content_id: str, create: bool = False) -> Optional[SimilarityIndex]:
+    key = (kind, str(content_id))
+    index = _indexes.get(key)
+    if index is None and create:
+        index = SimilarityIndex()
+        _indexes[key] = index
+        while len(_indexes) > SIMILARITY_MAX_INDEXES:
+            _indexes.popitem(last=False)
+    if index is not None:
+        _indexes.move_to_end(key)
+    return index
+
+def find_similar_verdict(kind: str, content_id: str, question: str) -> Optional[Dict[str, Any]]:
+    """
+    Find a stored verdict for a rewording of this question.
+
+    Args:
+        kind: "riddle"
+        content_id: ID of the riddle
+        question: The user's raw question text
+
+    Returns:
+        The stored verdict dict, or None if no question normalizes the same
+    """
+    index = _get_index(kind, content_id, create=True)
+    return index.lookup(question)
+
+def add_similar_verdict(kind: str, content_id: str, question: str, verdict: Dict[str, Any]):
+    """Add an answered question to the content's index"""
+    _get_index(kind, content_id, create=True).add(question, verdict)
+
+def drop_similarity_index(kind: str, content_id: str):
+    """Discard the index for a riddle (e.g. when it is overwritten)"""
+    _indexes.pop((kind, str(content_id)), None)
+
+def get_similarity_stats() -> Dict[str, Any]:
+    """Get hit-rate statistics overall and per index"""
+    lookups = sum(index.lookups for index in _indexes.values())
+    hits = sum(index.hits for index in _indexes.values())
+    return {
+        "lookups": lookups,
+        "hits": hits,
+        "hitRate": hits / lookups if lookups else 0.0,
+        "indexes": {
+            f"{kind}:{content_id}": {
+                "entries": len(index.entries),
+                "lookups": index.lookups,
+                "hits": index.hits,
+                "hitRate": index.hits / index.lookups if index.lookups else 0.0
+            }
+            for (kind, content_id), index in _indexes.items()
+        }
+    }
@@ -0,0 +1,121 @@
+"""
+Structured Output
+Call sites declare a JSON schema for the object they expect. With structured
+output enabled the model returns that object through a forced tool call, so
+no JSON has to be dug out of free text. With it disabled the object is parsed
+from the text response as before.
+
+Every parse is counted per call site and mode ("tool" or "text"), so the
+parse-failure rate of both modes can be compared.
+"""
+import os
+import json
+from typing import Optional, Dict, Any
+
+# Import JSON extraction - hybrid import for local/production compatibility
+try:
+    from backend.json_extract import extract_json
+except ImportError:
+    from json_extract import extract_json
+
+LLM_STRUCTURED_OUTPUT = os.getenv("LLM_STRUCTURED_OUTPUT", "true").lower() == "true"
+
+# Name of the tool the model is forced to call with its result
+RESULT_TOOL_NAME = "submit_result"
+
+class StructuredOutputError(json.JSONDecodeError):
+    """
+    The model's output did not contain an object matching the call site's schema.
+    Subclasses JSONDecodeError so existing JSON-failure fallbacks handle it.
+    """
+    def __init__(self, message: str, output: str = ""):
+        super().__init__(message, output or "", 0)
+        # Drop the "line 1 column 1 (char 0)" suffix, which means nothing here
+        self.args = (message,)
+
+# call site -> mode -> counters
+parse_stats: Dict[str, Dict[str, Dict[str, int]]] = {}
+
+def record_parse(call_site: str, mode: str, ok: bool):
+    """Count one parse attempt for a call site"""
+    counters = parse_stats.setdefault(call_site, {}).setdefault(mode, {"calls": 0, "failures": 0})
+    counters["calls"] += 1
+    if not ok:
+        counters["failures"] += 1
+
+def get_parse_stats() -> Dict[str, Any]:
+    """Get parse-failure counts and rates per call site and mode"""
+    return {
+        "enabled": LLM_STRUCTURED_OUTPUT,
+        "callSites": {
+            call_site: {
+                mode: {**counters, "failureRate": counters["failures"] / counters["calls"] if counters["calls"] else 0.0}
+                for mode, counters in modes.items()
+            }
+            for call_site, modes in sorted(parse_stats.items())
+        }
+    }
+
+def result_tool(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Tool definition the model is forced to call with an object matching schema"""
+    return {
+        "name": RESULT_TOOL_NAME,
+        "description": "Submit your final answer. Always call this tool with your result.",
+        "input_schema": schema
+    }
+
+def parse_text_output(text: str) -> Any:
+    """Parse the JSON value from a free-text response (fences, prose and raw control characters are tolerated)"""
+    return extract_json(text)
+
+_JSON_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "integer": int,
+    "number": (int, float),
+    "boolean": bool,
+    "null": type(None)
+}
+
+def validate(value: Any, schema: Dict[str, Any], path: str = "$") -> Optional[str]:
+    """
+    Check a value against the subset of JSON Schema the call sites use
+    (type, properties, required, items, enum, minItems).
+
+    Returns:
+        A description of the first mismatch, or None if the value matches
+    """
+    expected = schema.get("type")
+    if expected:
+        types = expected if isinstance(expected, list) else [expected]
+        matches = any(
+            isinstance(value, _JSON_TYPES[t]) and not (t in ("integer", "number") and isinstance(value, bool))
+            for t in types
+        )
+        if not matches:
+            return f"{path}: expected {expected}, got {type(value).__name__}"
+
+    if "enum" in schema and value not in schema["enum"]:
+        return f"{path}: {value!r} is not one of {schema['enum']}"
+
+    if isinstance(value, dict):
+        for key in schema.get("required", []):
+            if key not in value:
+                return f"{path}: missing required field '{key}'"
+        for key, sub_schema in schema.get("properties", {}).items():
+            if key in value:
+                error = validate(value[key], sub_schema, f"{path}.{key}")
+                if error:
+                    return error
+
+    if isinstance(value, list):
+        if len(value) < schema.get("minItems", 0):
+            return f"{path}: expected at least {schema['minItems']} items"
+        if "items" in schema:
+            for i, item in enumerate(value):
+                error = validate(item, schema["items"], f"{path}[{i}]")
+                if error:
+                    return error
+
+    return None
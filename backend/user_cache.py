@@ -0,0 +1,72 @@
+"""
+User Cache
+Resolved users by id, so an authenticated request whose token carries the
+user id (the `uid` claim) needs no database round trip for identity.
+
+Per-worker LRU with a TTL: entries expire after USER_CACHE_TTL seconds, which
+bounds how long another worker can serve a stale user after an account change.
+Logout and account changes on this worker drop the entry immediately through
+invalidate_user(). USER_CACHE_TTL=0 disables the cache.
+"""
+import os
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
+
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "300"))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
+
+class UserCache:
+    # user id -> (expires at (monotonic), user)
+    entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+    hits: int = 0
+    misses: int = 0
+    expired: int = 0
+    invalidations: int = 0
+
+# Global user cache instance
+user_cache = UserCache()
+
+def get_cached_user(user_id: str) -> Optional[Any]:
+    """Get a cached user by id, or None on a miss or expired entry"""
+    entry = user_cache.entries.get(user_id)
+    if entry is None:
+        user_cache.misses += 1
+        return None
+    expires_at, user = entry
+    if expires_at <= time.monotonic():
+        del user_cache.entries[user_id]
+        user_cache.expired += 1
+        user_cache.misses += 1
+        return None
+    user_cache.entries.move_to_end(user_id)
+    user_cache.hits += 1
+    return user
+
+def cache_user(user_id: str, user: Any):
+    """Remember a resolved user for USER_CACHE_TTL seconds"""
+    if USER_CACHE_TTL <= 0:
+        return
+    user_cache.entries[user_id] = (time.monotonic() + USER_CACHE_TTL, user)
+    user_cache.entries.move_to_end(user_id)
+    while len(user_cache.entries) > USER_CACHE_MAX_ENTRIES:
+        user_cache.entries.popitem(last=False)
+
+def invalidate_user(user_id: str):
+    """Drop a user's cached entry (logout, account change or deletion)"""
+    if user_cache.entries.pop(str(user_id), None) is not None:
+        user_cache.invalidations += 1
+
+def get_user_cache_stats() -> Dict[str, Any]:
+    """Get user cache statistics"""
+    lookups = user_cache.hits + user_cache.misses
+    return {
+        "ttlSeconds": USER_CACHE_TTL,
+        "entries": len(user_cache.entries),
+        "maxEntries": USER_CACHE_MAX_ENTRIES,
+        "hits": user_cache.hits,
+        "misses": user_cache.misses,
+        "expired": user_cache.expired,
+        "invalidations": user_cache.invalidations,
+        "hitRate": user_cache.hits / lookups if lookups else 0.0
+    }
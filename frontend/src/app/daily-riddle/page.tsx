@@ -26,6 +26,25 @@ interface Stats {
   totalQuestions: number;
 }
 
+// Fetch the daily riddle (shared and cacheable), then this user's solved status
+const fetchDailyRiddle = async (): Promise<DailyRiddle> => {
+  const response = await fetch('/api/v1/riddles/daily');
+  if (!response.ok) {
+    throw new Error('Failed to fetch daily riddle');
+  }
+  const data: DailyRiddle = await response.json();
+  data.is_solved = false;
+  const statusResponse = await fetch('/api/v1/riddles/daily/status', {
+    credentials: 'include' // Include cookies for authentication
+  });
+  if (statusResponse.ok) {
+    const status = await statusResponse.json();
+    data.is_solved = status.is_solved;
+    data.solved_session_id = status.solved_session_id;
+  }
+  return data;
+};
+
 const DailyRiddlePage: React.FC = () => {
   const [riddle, setRiddle] = useState<DailyRiddle | null>(null);
   const [sessionId, setSessionId] = useState<string | null>(null);
@@ -158,12 +177,8 @@ const DailyRiddlePage: React.FC = () => {
       // Delete old riddle text
       await typeText(riddle.riddle_text, true);
       
-      // Fetch new riddle
-      const response = await fetch('/api/v1/riddles/daily');
-      if (!response.ok) {
-        throw new Error('Failed to fetch new riddle');
-      }
-      const newRiddle: DailyRiddle = await response.json();
+      // Fetch new riddle and this user's solved status for it
+      const newRiddle = await fetchDailyRiddle();
       
       // Update riddle state
       setRiddle(newRiddle);
@@ -187,7 +202,7 @@ const DailyRiddlePage: React.FC = () => {
         setSessionId(sessionData.id);
         setHistory([]);
         setAttemptCount(0);
-        setSolved(false);
+        setSolved(newRiddle.is_solved);
         trackEvent('session_start', { session_type: 'daily-riddle', sessionId: sessionData.id });
       }
     } catch (err) {
@@ -234,14 +249,7 @@ const DailyRiddlePage: React.FC = () => {
   useEffect(() => {
     const initializeRiddle = async () => {
       try {
-        // Fetch the daily riddle with solved status
-        const response = await fetch('/api/v1/riddles/daily', {
-          credentials: 'include' // Include cookies for authentication
-        });
-        if (!response.ok) {
-          throw new Error('Failed to fetch daily riddle');
-        }
-        const data: DailyRiddle = await response.json();
+        const data = await fetchDailyRiddle();
         
         // Check if this is a different riddle than what's cached
         const cachedRiddleId = localStorage.getItem('current_riddle_id');
@@ -39,6 +39,25 @@ interface ComponentData {
   component_text?: string;
 }
 
+// Fetch the daily puzzle (shared and cacheable), then this user's solved status
+const fetchDailyPuzzle = async (): Promise<DailyPuzzle> => {
+  const response = await fetch('/api/v1/puzzles/daily');
+  if (!response.ok) {
+    throw new Error('Failed to fetch daily puzzle');
+  }
+  const data: DailyPuzzle = await response.json();
+  data.is_solved = false;
+  const statusResponse = await fetch('/api/v1/puzzles/daily/status', {
+    credentials: 'include' // Include cookies for authentication
+  });
+  if (statusResponse.ok) {
+    const status = await statusResponse.json();
+    data.is_solved = status.is_solved;
+    data.solved_session_id = status.solved_session_id;
+  }
+  return data;
+};
+
 const LateralThinkingPuzzlesPage: React.FC = () => {
   const [puzzle, setPuzzle] = useState<DailyPuzzle | null>(null);
   const [sessionId, setSessionId] = useState<string | null>(null);
@@ -174,12 +193,8 @@ const LateralThinkingPuzzlesPage: React.FC = () => {
       // Delete old puzzle text
       await typeText(puzzle.puzzle_text, true);
       
-      // Fetch new puzzle
-      const response = await fetch('/api/v1/puzzles/daily');
-      if (!response.ok) {
-        throw new Error('Failed to fetch new puzzle');
-      }
-      const newPuzzle: DailyPuzzle = await response.json();
+      // Fetch new puzzle and this user's solved status for it
+      const newPuzzle = await fetchDailyPuzzle();
       
       // Update puzzle state
       setPuzzle(newPuzzle);
@@ -203,7 +218,7 @@ const LateralThinkingPuzzlesPage: React.FC = () => {
         setSessionId(sessionData.id);
         setHistory([]);
         setAttemptCount(0);
-        setSolved(false);
+        setSolved(newPuzzle.is_solved);
         trackEvent('session_start', { session_type: 'daily-puzzle', sessionId: sessionData.id });
       }
     } catch (err) {
@@ -250,14 +265,7 @@ const LateralThinkingPuzzlesPage: React.FC = () => {
   useEffect(() => {
     const initializePuzzle = async () => {
       try {
-        // Fetch the daily puzzle with solved status
-        const response = await fetch('/api/v1/puzzles/daily', {
-          credentials: 'include' // Include cookies for authentication
-        });
-        if (!response.ok) {
-          throw new Error('Failed to fetch daily puzzle');
-        }
-        const data: DailyPuzzle = await response.json();
+        const data = await fetchDailyPuzzle();
         
         // Check if this is a different puzzle than what's cached
         const cachedPuzzleId = localStorage.getItem('current_puzzle_id');